@@ -0,0 +1,86 @@
+"""Per-element choice of the visualization order.
+
+The surface elements are split into two sets: elements where the function
+is close to linear are drawn with a low order, the ones with the strongest
+variation with a high order, as many as fit into a budget of function
+values (the size of the value buffers).
+
+The variation of an element is the largest deviation of an edge midpoint
+value from the mean of the two edge vertex values.
+"""
+
+import numpy as np
+
+# Vertices and edge midpoints of the reference triangle / quadrilateral; the
+# midpoint of edge (a, b) comes after the vertices in the same edge order.
+_TRIG_POINTS = [(1, 0), (0, 1), (0, 0), (0.5, 0.5), (0, 0.5), (0.5, 0)]
+_TRIG_EDGES = [(0, 1), (1, 2), (0, 2)]
+_QUAD_POINTS = [(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0), (1, 0.5), (0.5, 1), (0, 0.5)]
+_QUAD_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0)]
+
+
+def num_values(order, quads=False):
+    """Function values stored per element for a given visualization order."""
+    if quads:
+        # quads are drawn with twice the order, see FunctionData
+        order = 2 * order
+    return (order + 1) * (order + 2) // 2
+
+
+def element_variation(cf, mesh):
+    """Variation of *cf* on every surface element of *mesh*.
+
+    Returns ``None`` for meshes with mixed triangle/quad surfaces.
+    """
+    import ngsolve as ngs
+
+    vb = ngs.BND if mesh.dim == 3 else ngs.VOL
+    ne = mesh.GetNE(vb)
+    for et, points, edges in (
+        (ngs.ET.TRIG, _TRIG_POINTS, _TRIG_EDGES),
+        (ngs.ET.QUAD, _QUAD_POINTS, _QUAD_EDGES),
+    ):
+        ir = ngs.IntegrationRule(points=points, weights=[0.0] * len(points))
+        try:
+            pts = mesh.MapToAllElements({et: ir}, vb)
+        except Exception:
+            continue
+        if len(pts) == ne * len(points):
+            break
+    else:
+        return None
+
+    if mesh.dim == 3:
+        cf = ngs.BoundaryFromVolumeCF(cf)
+    vals = np.asarray(cf(pts.flatten()))
+    if cf.is_complex:
+        vals = np.abs(vals)
+    vals = vals.reshape(ne, len(points), -1)
+    nv = len(edges)
+    variation = np.zeros(ne)
+    for k, (a, b) in enumerate(edges):
+        dev = vals[:, nv + k] - 0.5 * (vals[:, a] + vals[:, b])
+        variation = np.maximum(variation, np.linalg.norm(dev, axis=1))
+    return variation
+
+
+def select_high_order(variation, low, high, budget, rtol=1e-3, quads=False):
+    """Boolean mask of the elements to draw with order *high*.
+
+    Elements are upgraded by decreasing variation while the total number of
+    function values stays within *budget*. Elements whose variation is
+    below *rtol* times the largest one stay at order *low*.
+    """
+    n = len(variation)
+    mask = np.zeros(n, dtype=bool)
+    extra = num_values(high, quads) - num_values(low, quads)
+    if n == 0 or extra <= 0:
+        return mask
+    free = budget - n * num_values(low, quads)
+    count = int(min(n, max(0, free // extra)))
+    vmax = float(np.max(variation))
+    if vmax <= 0:
+        return mask
+    count = min(count, int(np.count_nonzero(variation > rtol * vmax)))
+    mask[np.argsort(-variation, kind="stable")[:count]] = True
+    return mask
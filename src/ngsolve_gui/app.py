@@ -1,4 +1,3 @@
-import ctypes
 import os
 import threading
 import time
@@ -6,43 +5,93 @@ import time
 from ngapp.app import App
 from ngapp.components import *
 
+from . import progress, tracing
+from .cancel import job
 from .app_data import AppData
-from .file_loader import load_file
 from ngapp.keybindings import KeybindingManager, keybinding_styles
 from .navigator import Navigator
+from .project_store import ProjectStore
 from .property_panel import PropertyPanel
 from .styles import css, theme, flex_fill, panel_full
 from .system_monitor import SystemMonitor
+from .hibernation import IDLE_MINUTES, Hibernation
+from .ngs_timers import TimersPanel, measured
+from .profiler import ProfilerPanel
 
 
 class Panel(Div):
-    def __init__(self, app_data):
+    def __init__(self, app_data, hibernation=None, on_wake=None):
         self.app_data = app_data
         self.comp = None
+        self._name = None
+        self._hibernation = hibernation
+        # called when a hibernated tab is built again in the background
+        self._on_wake = on_wake
+        self._waking = set()
         super().__init__(ui_class=str(panel_full))
         self.set_tab()
 
     def set_tab(self):
-        name = self.app_data.active_tab
-        if name is None:
-            self.ui_children = []
-            return
-        tab = self.app_data.get_tab(name)
-        if tab is None:
-            self.ui_children = []
-            return
-        if "component" in tab:
-            self.comp = comp = tab["component"]
-        else:
-            cls = self._resolve_class(tab["type"])
-            self.comp = comp = cls(
-                tab["name"],
-                tab["data"],
-                app_data=self.app_data,
-            )
-            tab["component"] = comp
+        with self.app_data.tabs_lock:
+            name = self.app_data.active_tab
+            tab = self.app_data.get_tab(name) if name is not None else None
+            if self._hibernation is not None and self.comp is not None and self._name != name:
+                self._hibernation.tab_left(self._name)
+            self._name = name
+            if tab is None:
+                self.comp = None
+                self.ui_children = []
+                return
+            if self._hibernation is not None:
+                self._hibernation.tab_shown(name)
+            if "component" in tab:
+                self.comp = comp = tab["component"]
+            elif tab.get("hibernated"):
+                self.comp = None
+                self.ui_children = [self._thumbnail(tab)]
+                self._wake(name, tab)
+                return
+            else:
+                self.app_data.materialize_tab(name)
+                self.comp = comp = self._create(tab)
+                tab["component"] = comp
         self.ui_children = [comp]
 
+    def _create(self, tab):
+        cls = self._resolve_class(tab["type"])
+        return cls(
+            tab["name"],
+            tab["data"],
+            app_data=self.app_data,
+        )
+
+    def _thumbnail(self, tab):
+        if tab.get("thumbnail"):
+            return QImg(ui_src=tab["thumbnail"], ui_fit="contain", ui_style="width: 100%; height: 100%; opacity: 0.6;")
+        return Div()
+
+    def _wake(self, name, tab):
+        """Build the component of hibernated tab *name* in the background."""
+        if name in self._waking:
+            return
+        self._waking.add(name)
+
+        def run():
+            try:
+                with job(f"Restoring {tab['title']}"):
+                    comp = self._create(tab)
+                with self.app_data.tabs_lock:
+                    tab["component"] = comp
+                    tab.pop("hibernated", None)
+                if self.app_data.active_tab == name and self._on_wake is not None:
+                    self._on_wake()
+            except Exception as e:
+                print(f"Restoring {tab['title']} failed: {e}")
+            finally:
+                self._waking.discard(name)
+
+        threading.Thread(target=run, daemon=True, name="WakeTab").start()
+
     def _resolve_class(self, type_key):
         from .registry import get_component_info
 
@@ -78,35 +127,66 @@ class Settings(QMenu):
         )
         show_navcube.on_update_model_value(self.app.usersettings.update("navcube_visible"))
 
+        show_timing = QCheckbox(
+            ui_label="Show Timing HUD by Default",
+            ui_model_value=self.app.usersettings.get("timing_hud_visible", False),
+        )
+        show_timing.on_update_model_value(self.app.usersettings.update("timing_hud_visible"))
+
         scale_by_mag = QCheckbox(
             ui_label="Scale Vectors by Magnitude by Default",
             ui_model_value=self.app.usersettings.get("scale_by_magnitude", True),
         )
         scale_by_mag.on_update_model_value(self.app.usersettings.update("scale_by_magnitude"))
 
+        hibernate = QInput(
+            QTooltip(
+                "Release the GPU data of tabs that were not shown for this many "
+                "minutes (or earlier when the memory is low), they are rebuilt when "
+                "shown again. 0 keeps all tabs."
+            ),
+            ui_label="Hibernate Inactive Tabs After (Minutes)",
+            ui_type="number",
+            ui_model_value=self.app.usersettings.get("hibernate_minutes", IDLE_MINUTES),
+        )
+        hibernate.on_update_model_value(self._set_hibernate_minutes)
+
+        solver_process = QCheckbox(
+            QTooltip(
+                "Run Python scripts in their own process, solution vectors are "
+                "sent to the GUI through shared memory on Redraw (no interactive shell)"
+            ),
+            ui_label="Run Scripts in a Separate Process",
+            ui_model_value=self.app.usersettings.get("solver_process", False),
+        )
+        solver_process.on_update_model_value(self.app.usersettings.update("solver_process"))
+
         super().__init__(QCard(
             QCardSection("Settings"),
-            QCardSection(nthreads, show_axes, show_navcube, scale_by_mag),
+            QCardSection(
+                nthreads, show_axes, show_navcube, show_timing, scale_by_mag, hibernate,
+                solver_process,
+            ),
         ))
 
 
-class StatusBar(Div):
-    """Floating pill overlay at the bottom of the scene showing loading progress."""
+    def _set_hibernate_minutes(self, event):
+        self.app.usersettings.update("hibernate_minutes")(event)
+        self.app.hibernation.idle_minutes = float(
+            self.app.usersettings.get("hibernate_minutes", IDLE_MINUTES) or 0
+        )
 
-    # Outer wrapper — anchored to the bottom-center of the nearest
-    # position:relative ancestor (the scene container).
-    _VISIBLE = (
-        "position: fixed; bottom: 24px; left: 50%; transform: translateX(-50%); "
-        "z-index: 1000; display: flex; flex-direction: column; align-items: stretch; "
-        "background: rgba(15,23,42,0.88); backdrop-filter: blur(6px); "
-        "border-radius: 12px; padding: 10px 18px 12px; min-width: 320px; "
-        "max-width: 480px; box-shadow: 0 4px 24px rgba(0,0,0,0.25); "
-        "color: #e2e8f0; font-size: 0.82rem;"
+
+class _JobRow(Div):
+    """Label, percentage, cancel button and progress bar of one job."""
+
+    _BAR = (
+        "height: 100%; border-radius: 3px; "
+        "background: linear-gradient(90deg, #14B8A6, #0EA5E9); "
     )
-    _HIDDEN = "display: none;"
 
-    def __init__(self):
-        # Top row: icon + label + cancel
+    def __init__(self, job):
+        self.job = job
         self._label = Div(
             "",
             ui_style="white-space: nowrap; overflow: hidden; text-overflow: ellipsis;",
@@ -118,7 +198,7 @@ class StatusBar(Div):
                 "font-size: 0.78rem; color: #94a3b8; min-width: 36px; text-align: right;"
             ),
         )
-        self._cancel_btn = QBtn(
+        cancel_btn = QBtn(
             QTooltip("Cancel"),
             ui_icon="mdi-close",
             ui_flat=True,
@@ -128,25 +208,19 @@ class StatusBar(Div):
             ui_padding="2px",
             ui_color="grey-5",
         )
-        self._cancel_btn.on_click(self._on_cancel)
+        cancel_btn.on_click(lambda: job.token.cancel())
 
         top_row = Div(
             QSpinner(ui_color="accent", ui_size="18px"),
             self._label,
             QSpace(),
             self._pct_label,
-            self._cancel_btn,
+            cancel_btn,
             ui_style="display: flex; align-items: center; gap: 8px;",
         )
 
         # Progress bar (track + filled portion)
-        self._bar_fill = Div(
-            ui_style=(
-                "height: 100%; width: 0%; border-radius: 3px; "
-                "background: linear-gradient(90deg, #14B8A6, #0EA5E9); "
-                "transition: width 0.3s ease;"
-            ),
-        )
+        self._bar_fill = Div()
         bar_track = Div(
             self._bar_fill,
             ui_style=(
@@ -155,109 +229,102 @@ class StatusBar(Div):
                 "overflow: hidden;"
             ),
         )
-
-        self._thread = None
-        self._done_event = None
-        self._generation = 0
-
-        super().__init__(top_row, bar_track, ui_style=self._HIDDEN)
-
-    def show(self, filename, thread, done_event):
-        self._generation += 1
-        self._thread = thread
-        self._done_event = done_event
-        self._thread_name = thread.name if thread else ""
-        self._label.ui_children = [f"Running {filename} \u2026"]
-        self._pct_label.ui_children = [""]
-        self._bar_fill.ui_style = (
-            "height: 100%; width: 100%; border-radius: 3px; "
-            "background: linear-gradient(90deg, #14B8A6, #0EA5E9); "
-            "animation: indeterminate 1.4s ease infinite; "
-            "transition: none;"
-        )
-        self.ui_style = self._VISIBLE
-        self._start_poll(self._generation)
-
-    def hide(self):
-        self._thread = None
-        self._done_event = None
-        self.ui_style = self._HIDDEN
+        self._shown = None
+        super().__init__(top_row, bar_track)
+        self.update_progress()
+
+    def update_progress(self):
+        """Show the text and fraction of the job, if they changed."""
+        text, fraction = self.job.text, self.job.fraction
+        first = self._shown is None
+        if first or self._shown[0] != text:
+            self._label.ui_children = [text]
+        if first or self._shown[1] != fraction:
+            if fraction is None:
+                self._set_indeterminate()
+            else:
+                self._set_progress(100 * fraction)
+        self._shown = (text, fraction)
 
     def _set_progress(self, percent):
         """Set determinate progress (0–100)."""
         w = max(0, min(100, percent))
         self._bar_fill.ui_style = (
-            f"height: 100%; width: {w:.1f}%; border-radius: 3px; "
-            "background: linear-gradient(90deg, #14B8A6, #0EA5E9); "
-            "transition: width 0.3s ease;"
+            f"{self._BAR}width: {w:.1f}%; transition: width 0.3s ease;"
         )
         self._pct_label.ui_children = [f"{w:.0f}%"]
 
     def _set_indeterminate(self):
         self._bar_fill.ui_style = (
-            "height: 100%; width: 100%; border-radius: 3px; "
-            "background: linear-gradient(90deg, #14B8A6, #0EA5E9); "
-            "animation: indeterminate 1.4s ease infinite; "
-            "transition: none;"
+            f"{self._BAR}width: 100%; "
+            "animation: indeterminate 1.4s ease infinite; transition: none;"
         )
         self._pct_label.ui_children = [""]
 
-    def _start_poll(self, gen):
-        def poll():
-            from netgen.libngpy._meshing import _GetStatus
-
-            while gen == self._generation:
-                time.sleep(0.3)
-                done_event = self._done_event
-                if done_event is None:
-                    break
-                try:
-                    status_text, percent = _GetStatus()
-                except Exception:
-                    status_text, percent = "idle", 0.0
-
-                done = done_event.is_set()
-
-                if status_text and status_text != "idle":
-                    self._label.ui_children = [status_text]
-                    if percent > 0:
-                        self._set_progress(percent)
-                    else:
-                        self._set_indeterminate()
-                    # Script finished but netgen hasn't reset status yet
-                    if done:
-                        self.hide()
-                        break
-                elif done:
-                    self.hide()
-                    break
-
-        threading.Thread(target=poll, daemon=True, name="StatusPoll").start()
-
-    def _on_cancel(self):
-        self._generation += 1
-        thread = self._thread
-        # Only interrupt non-IPython threads; the IPython shell stays
-        # alive for interactive use — just dismiss the pill.
-        if (
-            thread
-            and thread.is_alive()
-            and self._thread_name != "IPythonEmbedder"
-        ):
-            try:
-                ctypes.pythonapi.PyThreadState_SetAsyncExc(
-                    ctypes.c_ulong(thread.ident),
-                    ctypes.py_object(KeyboardInterrupt),
-                )
-            except Exception:
-                pass
-        self.hide()
+
+class StatusBar(Div):
+    """Floating pill overlay at the bottom of the scene with a row per
+    running job (loading, meshing, drawing, ...).
+
+    Progress is pushed by the jobs through :mod:`ngsolve_gui.progress`; a
+    row is updated only when its values change. Jobs that end within
+    ``SHOW_DELAY`` seconds are not shown."""
+
+    SHOW_DELAY = 0.3
+
+    # Outer wrapper — anchored to the bottom-center of the nearest
+    # position:relative ancestor (the scene container).
+    _VISIBLE = (
+        "position: fixed; bottom: 24px; left: 50%; transform: translateX(-50%); "
+        "z-index: 1000; display: flex; flex-direction: column; align-items: stretch; "
+        "gap: 10px; "
+        "background: rgba(15,23,42,0.88); backdrop-filter: blur(6px); "
+        "border-radius: 12px; padding: 10px 18px 12px; min-width: 320px; "
+        "max-width: 480px; box-shadow: 0 4px 24px rgba(0,0,0,0.25); "
+        "color: #e2e8f0; font-size: 0.82rem;"
+    )
+    _HIDDEN = "display: none;"
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        super().__init__(ui_style=self._HIDDEN)
+        progress.subscribe(self._on_progress)
+
+    def _on_progress(self, event, job):
+        if event == "start":
+            timer = threading.Timer(self.SHOW_DELAY, self._add_row, (job,))
+            timer.daemon = True
+            timer.start()
+        elif event == "update":
+            row = self._rows.get(job.token)
+            if row is not None:
+                row.update_progress()
+        elif event == "end":
+            self._remove_row(job)
+
+    def _add_row(self, job):
+        with self._lock:
+            if job not in progress.running() or job.token in self._rows:
+                return
+            self._rows[job.token] = _JobRow(job)
+            self._show_rows()
+
+    def _remove_row(self, job):
+        with self._lock:
+            if self._rows.pop(job.token, None) is not None:
+                self._show_rows()
+
+    def _show_rows(self):
+        self.ui_children = list(self._rows.values())
+        self.ui_style = self._VISIBLE if self._rows else self._HIDDEN
 
 
 class NGSolveGui(App):
     def __init__(self, filename=None, local_path=None):
         self._local_path = local_path if local_path else os.path.expanduser("~")
         self.app_data = AppData()
+        self._project_store = None
 
         # Toolbar buttons
         upload_file = QBtn(QTooltip("Load File"), ui_flat=True, ui_icon="mdi-plus")
@@ -299,7 +366,25 @@ class NGSolveGui(App):
             ui_style="width: 200px;",
         )
 
-        self.system_monitor = SystemMonitor()
+        self.system_monitor = SystemMonitor(app_data=self.app_data)
+        self._trace_btn = QBtn(
+            QTooltip("Record Performance Trace (ctrl+alt+t)"),
+            ui_flat=True,
+            ui_icon="mdi-record-circle-outline",
+        )
+        self._trace_btn.on_click(self.toggle_trace_recording)
+        profiler_btn = QBtn(
+            ProfilerPanel(lambda: self._local_path),
+            QTooltip("Sampling Profiler"),
+            ui_flat=True,
+            ui_icon="mdi-chart-timeline-variant",
+        )
+        timers_btn = QBtn(
+            TimersPanel(),
+            QTooltip("NGSolve Timers of Draws and Redraws"),
+            ui_flat=True,
+            ui_icon="mdi-timer-outline",
+        )
 
         bar = QBar(
             ngs_logo,
@@ -307,6 +392,9 @@ class NGSolveGui(App):
             savebtn,
             loadbtn,
             QSpace(),
+            self._trace_btn,
+            profiler_btn,
+            timers_btn,
             self.system_monitor,
             self._nav_btn,
             self._prop_btn,
@@ -319,7 +407,11 @@ class NGSolveGui(App):
         # Three-column layout using flex
         self.navigator = Navigator(self.app_data, self._click_tab)
         self.property_panel = PropertyPanel()
-        self.tab_panel = Panel(self.app_data)
+        self.hibernation = Hibernation(
+            self.app_data,
+            idle_minutes=float(self.usersettings.get("hibernate_minutes", IDLE_MINUTES) or 0),
+        )
+        self.tab_panel = Panel(self.app_data, self.hibernation, on_wake=self._update)
         self.status_bar = StatusBar()
 
         self._nav_visible = self.usersettings.get("nav_visible", True)
@@ -366,11 +458,18 @@ class NGSolveGui(App):
         css.inject(self)
         keybinding_styles.inject(self)
         self._inject_status_bar_css()
+        self.on_mounted(self._watch_window_visibility)
         self.on_load(self.__on_load)
 
         # -- Global keybindings (always active) --
         kb = self.kb
         kb.add("h", kb.toggle_help, "Show keyboard shortcuts", "General")
+        kb.add(
+            "ctrl+alt+t",
+            self.toggle_trace_recording,
+            "Record performance trace",
+            "General",
+        )
         kb.add("ctrl+b", self._toggle_navigator, "Toggle navigator", "Panels")
         kb.add(
             "ctrl+alt+b", self._toggle_property_panel, "Toggle property panel", "Panels"
@@ -405,6 +504,15 @@ class NGSolveGui(App):
 
         self.call_js(_inject)
 
+    def _watch_window_visibility(self):
+        import webgpu.platform as pl
+
+        def on_change(_event):
+            self.system_monitor.set_visible(not pl.js.document.hidden)
+
+        self._visibility_proxy = pl.create_proxy(on_change)
+        pl.js.document.addEventListener("visibilitychange", self._visibility_proxy)
+
     def _load_file(self):
         from tkinter import Tk, filedialog
 
@@ -427,19 +535,31 @@ class NGSolveGui(App):
     def _load_with_status(self, filename):
         if not filename:
             return
-        result = load_file(filename, self)
-        if result:
-            thread, done_event = result
-            name = os.path.basename(str(filename))
-            self.status_bar.show(name, thread, done_event)
+        from .file_loader import load_file
+
+        # the loader runs as a job, its progress is shown by the status bar
+        load_file(filename, self)
+
+    @property
+    def project_store(self):
+        if self._project_store is None:
+            self._project_store = ProjectStore(self.storage)
+        return self._project_store
 
     def __on_before_save(self):
-        self.storage.set("app_data", self.app_data.get_save_data(), use_pickle=True)
+        self.project_store.save(self.app_data.get_save_data())
+        # Projects written before the manifest format kept one pickle
+        if "app_data" in self.storage:
+            self.storage.delete("app_data")
 
     def __on_load(self):
-        data = self.storage.get("app_data")
+        data = self.project_store.load()
+        if data is None:
+            data = self.storage.get("app_data")
         if data is not None:
             self.app_data._data.update(data)
+        self.app_data._materialize = self.project_store.materialize
+        self.app_data.restore_redraw_callbacks()
         self._update()
         self.app_data._update = self._update
 
@@ -453,6 +573,22 @@ class NGSolveGui(App):
         self.property_panel.set_component(comp, type_key)
         self.kb.set_component(comp)
 
+    def toggle_trace_recording(self):
+        """Start or stop recording a performance trace. The trace is written
+        as Chrome trace-event JSON to the directory of the last loaded file,
+        see :mod:`ngsolve_gui.tracing`."""
+        if not tracing.recording():
+            tracing.start()
+            self._trace_btn.ui_color = "red"
+            print("Recording performance trace...")
+            return
+        path = os.path.join(
+            self._local_path, time.strftime("ngsolve_gui_trace_%Y%m%d_%H%M%S.json")
+        )
+        trace = tracing.stop(path)
+        self._trace_btn.ui_color = None
+        print(f"Performance trace ({len(trace['traceEvents'])} events) written to {path}")
+
     def _toggle_navigator(self):
         self._nav_visible = not self._nav_visible
         self.usersettings.set("nav_visible", self._nav_visible)
@@ -492,8 +628,14 @@ class NGSolveGui(App):
             self._inner_splitter.ui_limits = [0, 0]
 
 
+    @tracing.traced("Redraw")
+    @measured("Redraw")
     def redraw(self, *args, **kwargs):
+        self.app_data.run_redraw_callbacks()
         self.app_data.set_needs_redraw()
+        if self._project_store is not None:
+            # Redraw means objects changed in place, re-hash them on next save
+            self._project_store.invalidate()
         comp = self.tab_panel.comp
         if comp is not None:
             if hasattr(comp, "redraw"):
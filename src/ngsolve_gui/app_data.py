@@ -1,5 +1,10 @@
-from ngsolve_webgpu import *
+import threading
+import traceback
+
 from webgpu.camera import Camera
+from webgpu.clipping import Clipping
+
+from .tracing import span
 
 
 class AppData:
@@ -11,9 +16,18 @@ class AppData:
     def __init__(self):
         self._data = {"tabs": {}, "active_tab": None}
         self._update = None
+        self._materialize = None
         self._gpu_cache = {}
         self._clipping = Clipping()
         self._camera = Camera()
+        # tab name -> callbacks run on every Redraw, also for inactive tabs
+        self._redraw_callbacks = {}
+        # tabs added in this session; the objects of the other (restored)
+        # tabs are unpickled copies
+        self._added_tabs = set()
+        # held while tabs are added or deleted and while the component of a
+        # tab is taken, set or dropped (tabs hibernate on another thread)
+        self.tabs_lock = threading.RLock()
 
     @property
     def clipping(self):
@@ -25,22 +39,115 @@ class AppData:
 
     def get_mesh_gpu_data(self, mesh):
         key = repr(mesh)
-        if key not in self._gpu_cache:
-            self._gpu_cache[key] = MeshData(mesh)
-        return self._gpu_cache[key]
+        with span("get_mesh_gpu_data", cached=key in self._gpu_cache):
+            if key not in self._gpu_cache:
+                from .timed_data import TimedMeshData
+
+                self._gpu_cache[key] = TimedMeshData(mesh)
+            return self._gpu_cache[key]
 
     def get_function_gpu_data(self, cf, mesh, **kwargs):
         key = hash((repr(cf), repr(mesh), tuple(sorted(kwargs.items()))))
-        if key not in self._gpu_cache:
-            mdata = self.get_mesh_gpu_data(mesh)
-            self._gpu_cache[key] = FunctionData(mdata, cf, **kwargs)
-        return self._gpu_cache[key]
+        with span("get_function_gpu_data", cached=key in self._gpu_cache, **kwargs):
+            if key not in self._gpu_cache:
+                from .timed_data import TimedFunctionData
+
+                mdata = self.get_mesh_gpu_data(mesh)
+                self._gpu_cache[key] = TimedFunctionData(mdata, cf, **kwargs)
+            return self._gpu_cache[key]
+
+    def drop_function_data(self, cf):
+        """Remove the cached GPU data of *cf*."""
+        for key in [k for k, d in self._gpu_cache.items() if getattr(d, "cf", None) is cf]:
+            del self._gpu_cache[key]
+
+    def hibernate_tab(self, name):
+        """Drop the component of the inactive tab *name* and the cached GPU
+        data only it used. Its data and settings stay in the tab, like in a
+        saved project, and the component is built again when the tab is
+        shown. Returns whether the tab was hibernated."""
+        from ngapp.observable import snapshot
+
+        with self.tabs_lock:
+            tab = self.get_tab(name)
+            if tab is None or name == self.active_tab or "component" not in tab:
+                return False
+            comp = tab.pop("component")
+            _release(comp)
+            tab["data"] = comp.data
+            tab["settings"] = snapshot(comp)
+            tab["hibernated"] = True
+            used = _component_gpu_data(comp)
+            for other in self._data["tabs"].values():
+                if "component" in other:
+                    for key in _component_gpu_data(other["component"]):
+                        used.pop(key, None)
+            for key in [k for k, d in self._gpu_cache.items() if id(d) in used]:
+                del self._gpu_cache[key]
+        return True
+
+    def gpu_cache_nbytes(self):
+        """Approximate size of the cached GPU data, from the CPU-side arrays
+        that are uploaded. Arrays shared between cache entries count once."""
+        seen = set()
+        total = 0
+        for data in list(self._gpu_cache.values()):
+            for arr in _uploaded_arrays(data):
+                if arr is not None and id(arr) not in seen:
+                    seen.add(id(arr))
+                    total += getattr(arr, "nbytes", None) or len(arr)
+        return total
 
     def set_needs_redraw(self):
         for tab in self._data["tabs"].values():
             if "component" in tab:
                 tab["component"]._redraw_needed = True
 
+    def on_redraw(self, name, callback):
+        """Call *callback* on every Redraw while the tab *name* exists."""
+        self._redraw_callbacks.setdefault(name, []).append(callback)
+
+    def run_redraw_callbacks(self):
+        for callbacks in list(self._redraw_callbacks.values()):
+            for callback in list(callbacks):
+                try:
+                    callback()
+                except Exception:
+                    traceback.print_exc()
+
+    def _live_function(self, name):
+        """Function and mesh of the function tab *name* if it was drawn in
+        this session, else ``None``."""
+        import ngsolve as ngs
+
+        tab = self.get_tab(name) if isinstance(name, str) else None
+        if tab is None or name not in self._added_tabs or "mesh" not in tab["data"]:
+            return None
+        mesh = tab["data"]["mesh"]
+        return tab["data"]["obj"], mesh.mesh if isinstance(mesh, ngs.Region) else mesh
+
+    def restore_redraw_callbacks(self):
+        """Record the point monitors of restored tabs (data ``"monitor"``,
+        the name of the function tab) on Redraw again, once their function
+        tab was drawn in this session: the recorded function of a restored
+        monitor is a copy the solver does not change. A tab is loaded on its
+        first recording and records the current function of its tab."""
+
+        def record(name):
+            tab = self.get_tab(name)
+            live = self._live_function(tab["data"]["monitor"])
+            if live is None:
+                return
+            self.materialize_tab(name)
+            monitor = tab["data"]["obj"]
+            if monitor.cf is not live[0]:
+                monitor.set_function(*live)
+            monitor.record()
+
+        for name, tab in self._data["tabs"].items():
+            if tab.get("data", {}).get("monitor") and name not in self._redraw_callbacks:
+                self.on_redraw(name, lambda name=name: record(name))
+
     def get_save_data(self):
         from ngapp.observable import snapshot
 
@@ -51,13 +158,9 @@ class AppData:
                 comp = tab_copy["component"]
                 # Resolve type key from registry if not already set
                 if "type" not in tab_copy or tab_copy["type"] == "unknown":
-                    from .registry import get_registry
+                    from .registry import find_type_key
 
-                    cls = type(comp)
-                    for key, info in get_registry().items():
-                        if info["cls"] is cls:
-                            tab_copy["type"] = key
-                            break
+                    tab_copy["type"], _ = find_type_key(type(comp))
                 tab_copy["data"] = comp.data
                 tab_copy["settings"] = snapshot(comp)
                 del tab_copy["component"]
@@ -67,26 +170,24 @@ class AppData:
     def add_tab(self, title: str, cls: type, *args, **kwargs):
         name = title.lower().replace(" ", "_")
         # Resolve type key and icon from registry
-        from .registry import get_registry
-
-        type_key = "unknown"
-        icon = "mdi-vector-triangle"
-        for key, info in get_registry().items():
-            if info["cls"] is cls:
-                type_key = key
-                icon = info["icon"]
-                break
-        self._data["tabs"][name] = {
-            "type": type_key,
-            "icon": icon,
-            "data": {},
-            "name": name,
-            "title": title,
-            "settings": {},
-        }
+        from .registry import find_type_key
+
+        type_key, icon = find_type_key(cls)
+        icon = icon or "mdi-vector-triangle"
+        with self.tabs_lock:
+            self._data["tabs"][name] = {
+                "type": type_key,
+                "icon": icon,
+                "data": {},
+                "name": name,
+                "title": title,
+                "settings": {},
+            }
         component = cls(name, *args, **kwargs)
-        self._data["tabs"][name]["component"] = component
-        self.active_tab = name
+        with self.tabs_lock:
+            self._added_tabs.add(name)
+            self._data["tabs"][name]["component"] = component
+            self.active_tab = name
         if self._update is not None:
             self._update()
         return component
@@ -102,6 +203,12 @@ class AppData:
     def get_tab(self, name):
         return self._data["tabs"].get(name, None)
 
+    def materialize_tab(self, name):
+        """Load the pickled objects of a restored tab that is still a placeholder."""
+        tab = self.get_tab(name)
+        if tab is not None and "blob" in tab and self._materialize is not None:
+            self._materialize(name, tab)
+
     def delete_tab(self, name):
         """
         Delete a tab by name.
@@ -109,11 +216,16 @@ class AppData:
         :param name: The name of the tab to delete.
         """
         if name in self._data["tabs"]:
-            del self._data["tabs"][name]
-            if self.active_tab == name:
-                self.active_tab = (
-                    list(self._data["tabs"].keys())[0] if self._data["tabs"] else None
-                )
+            with self.tabs_lock:
+                tab = self._data["tabs"].pop(name)
+                if "component" in tab:
+                    _release(tab["component"])
+                self._redraw_callbacks.pop(name, None)
+                self._added_tabs.discard(name)
+                if self.active_tab == name:
+                    self.active_tab = (
+                        list(self._data["tabs"].keys())[0] if self._data["tabs"] else None
+                    )
             if self._update is not None:
                 self._update()
 
@@ -132,3 +244,33 @@ class AppData:
         :param name: The name of the tab to set as active.
         """
         self._data["active_tab"] = name
+
+
+def _release(comp):
+    release = getattr(comp, "release", None)
+    if release is not None:
+        release()
+
+
+def _component_gpu_data(comp):
+    """``{id: data}`` of the MeshData and FunctionData *comp* draws."""
+    scene = getattr(getattr(comp, "wgpu", None), "scene", None)
+    renderers = list(getattr(scene, "render_objects", None) or [])
+    data = [getattr(comp, name, None) for name in ("func_data", "mdata")]
+    while renderers:
+        r = renderers.pop()
+        renderers += list(getattr(r, "render_objects", None) or [])
+        data.append(getattr(r, "data", None))
+    data += [getattr(d, "mesh_data", None) for d in data]
+    return {id(d): d for d in data if d is not None}
+
+
+def _uploaded_arrays(data):
+    """CPU mirrors of the GPU buffers of a MeshData or FunctionData."""
+    mesh_data = getattr(data, "mesh_data", None)
+    if mesh_data is not None:
+        yield getattr(data, "data_2d", None)
+        yield getattr(data, "data_3d", None)
+        data = mesh_data
+    yield getattr(data, "cpu_data", None)
+    yield from dict(getattr(data, "elements", None) or {}).values()
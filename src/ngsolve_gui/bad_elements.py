@@ -0,0 +1,52 @@
+"""Elements with a badly conditioned Jacobian (``DrawBadElements``).
+
+Without GUI imports, so that a solver process (see :mod:`ngsolve_gui.remote`)
+can search its meshes itself.
+"""
+
+import ngsolve as ngs
+import numpy as np
+
+from . import cancel, progress
+
+# Elements evaluated per chunk in find_bad_elements, cancel is checked
+# between chunks
+_BAD_ELEMENTS_CHUNK = 100_000
+
+
+def _max_per_element(cf, pnts, n):
+    """Maximum of *cf* over the *n* points per element of *pnts*."""
+    out = np.empty(len(pnts) // n)
+    step = _BAD_ELEMENTS_CHUNK * n
+    for start in range(0, len(pnts), step):
+        cancel.check_cancelled()
+        progress.report(fraction=start / len(pnts))
+        vals = np.asarray(cf(pnts[start : start + step])).reshape((-1, n))
+        out[start // n : start // n + len(vals)] = np.max(vals, axis=1)
+    return out
+
+
+def find_bad_elements(mesh: ngs.Mesh, threshold_3d=100, threshold_2d=20, intorder=4):
+    """Flag elements whose Jacobian condition number exceeds the thresholds.
+
+    Returns ``(el2d_bitarray, el3d_bitarray, max_badness_3d)``.
+    """
+    from ngsolve import Norm, Inv, specialcf
+
+    cf = Norm(specialcf.JacobianMatrix(3, 3)) * Norm(
+        Inv(specialcf.JacobianMatrix(3, 3))
+    )
+
+    intrule = ngs.IntegrationRule(ngs.ET.TET, intorder)
+    pnts = mesh.MapToAllElements(intrule, ngs.VOL).flatten()
+    max_val = _max_per_element(cf, pnts, len(intrule))
+    el3d_bitarray = max_val > threshold_3d
+    max_badness = np.max(max_val)
+
+    cf = ngs.BoundaryFromVolumeCF(cf)
+    intrule = ngs.IntegrationRule(ngs.ET.TRIG, intorder)
+    pnts = mesh.MapToAllElements(intrule, ngs.BND).flatten()
+    max_val = _max_per_element(cf, pnts, len(intrule))
+    el2d_bitarray = max_val > threshold_2d
+    el2d_bitarray = None
+    return el2d_bitarray, el3d_bitarray, max_badness
@@ -0,0 +1,238 @@
+"""Offscreen batch rendering of meshes, functions and geometries to PNG files.
+
+Renders in a headless Chromium (via ``webgpu.testing.headless_session``,
+requires playwright), no GUI window is opened::
+
+    from ngsolve_gui.batch_render import render_batch
+
+    jobs = [
+        (gfu, {"min": 0, "max": 1, "filename": "u.png"}, "xy"),
+        (mesh, {}, None),
+        (Norm(grad(gfu)), {"mesh": mesh, "clipping": {"nz": 1}}, camera),
+    ]
+    render_batch(jobs, "report/images", width=1200, height=900)
+
+Each job is ``(obj, settings, camera)``. *settings* takes the keyword
+arguments of ``Draw`` that apply to a static image (``mesh``, ``order``,
+``min``, ``max``, ``colormap``, ``discrete_colormap``, ``deformation``,
+``clipping``, ``wireframe``, ``draw_surf``, ``draw_vol``) plus an optional
+output ``filename``. *camera* is ``None`` (fit the object), one of
+``"xy"``, ``"xz"``, ``"yz"`` or a ``webgpu.camera.Camera``.
+
+Mesh and function data are taken from an ``AppData`` cache shared by all
+jobs, and the CoefficientFunctions of the next jobs are evaluated on worker
+threads while the current job is rendered and read back. The data of one
+mesh is built by one worker at a time; jobs with a deformation draw copies
+of the cached data on their own deformed mesh data.
+"""
+
+import copy
+import threading
+import weakref
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+from .app_data import AppData
+
+_VIEWS = ("xy", "xz", "yz")
+
+
+def _options():
+    return SimpleNamespace(timestamp=time.time())
+
+
+class BatchRenderer:
+    """Renders jobs one after the other, preparing the next ones in the background.
+
+    Args:
+        width, height: image size in pixels
+        app_data: ``AppData`` whose GPU data cache is used; a new one by default
+        prefetch: number of upcoming jobs evaluated ahead of the current one
+    """
+
+    def __init__(self, width=1024, height=768, app_data=None, prefetch=2):
+        self.width = width
+        self.height = height
+        self.app_data = app_data or AppData()
+        self.prefetch = prefetch
+        self._cache_lock = threading.Lock()
+        # mesh data -> lock held while it or function data on it is built
+        self._build_locks = weakref.WeakKeyDictionary()
+
+    def render(self, jobs, out_dir="."):
+        """Render *jobs* to PNG files in *out_dir*, return the list of paths."""
+        from webgpu.testing import headless_session
+
+        jobs = list(jobs)
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with ThreadPoolExecutor(max_workers=max(1, self.prefetch)) as pool:
+            pending = {}
+
+            def submit(i):
+                if i < len(jobs) and i not in pending:
+                    pending[i] = pool.submit(self.prepare, *jobs[i])
+
+            for i in range(self.prefetch + 1):
+                submit(i)
+            with headless_session(self.width, self.height) as env:
+                for i, (obj, settings, camera) in enumerate(jobs):
+                    submit(i)
+                    prepared = pending.pop(i).result()
+                    submit(i + self.prefetch)
+                    filename = (settings or {}).get("filename", f"{i:04d}.png")
+                    path = out_dir / filename
+                    self._render_prepared(env, prepared, camera, path)
+                    paths.append(path)
+        return paths
+
+    # -- Preparation (worker threads) ----------------------------------------
+
+    def _mesh_data(self, mesh):
+        with self._cache_lock:
+            return self.app_data.get_mesh_gpu_data(mesh)
+
+    def _function_data(self, cf, mesh, order):
+        with self._cache_lock:
+            return self.app_data.get_function_gpu_data(cf, mesh, order=order)
+
+    def _build_lock(self, data):
+        """Lock for building *data*, the same for all data on one mesh."""
+        mesh_data = getattr(data, "mesh_data", data)
+        with self._cache_lock:
+            return self._build_locks.setdefault(mesh_data, threading.Lock())
+
+    def prepare(self, obj, settings=None, camera=None):
+        """Build the render objects of a job and evaluate its data on the CPU."""
+        import netgen.occ as ngocc
+        import ngsolve as ngs
+        from webgpu.clipping import Clipping
+
+        settings = dict(settings or {})
+        clipping = Clipping()
+        clip = settings.get("clipping", None)
+        if clip:
+            clipping.mode = clipping.Mode.PLANE
+            if isinstance(clip, dict):
+                clipping.normal = [clip.get("nx", 0), clip.get("ny", 0), clip.get("nz", 1)]
+                if "offset" in clip:
+                    clipping.offset = clip["offset"]
+
+        if isinstance(obj, ngocc.TopoDS_Shape):
+            obj = ngocc.OCCGeometry(obj)
+        if isinstance(obj, ngocc.OCCGeometry):
+            from ngsolve_webgpu import GeometryRenderer
+
+            render_objects = [GeometryRenderer(obj, clipping=clipping)]
+        elif isinstance(obj, (ngs.Mesh, ngs.Region)):
+            render_objects = self._prepare_mesh(obj, settings, clipping)
+        else:
+            mesh = settings.get("mesh", None)
+            if isinstance(obj, ngs.GridFunction) and mesh is None:
+                mesh = obj.space.mesh
+            if mesh is None:
+                raise ValueError("Rendering a CoefficientFunction requires settings['mesh']")
+            if not isinstance(obj, ngs.CoefficientFunction):
+                obj = ngs.CF(obj)
+            render_objects = self._prepare_function(obj, mesh, settings, clipping)
+
+        if clip:
+            pmin, pmax = _bounding_box(render_objects)
+            center = [0.5 * (a + b) for a, b in zip(pmin, pmax)]
+            if isinstance(clip, dict):
+                center = [clip.get(k, c) for k, c in zip("xyz", center)]
+            clipping.center = center
+        return render_objects
+
+    def _prepare_mesh(self, mesh, settings, clipping):
+        from ngsolve_webgpu.mesh import MeshElements2d, MeshWireframe2d
+
+        mdata = self._mesh_data(mesh)
+        with self._build_lock(mdata):
+            mdata.update(_options())
+        render_objects = [MeshElements2d(mdata, clipping=clipping)]
+        if settings.get("wireframe", True):
+            render_objects.append(MeshWireframe2d(mdata, clipping=clipping))
+        return render_objects
+
+    def _prepare_function(self, cf, mesh, settings, clipping):
+        from ngsolve_webgpu import CFRenderer, ClippingCF, Colorbar, Colormap
+        from ngsolve_webgpu.mesh import MeshWireframe2d
+
+        ngs_mesh = mesh.mesh if hasattr(mesh, "mesh") else mesh
+        order = settings.get("order", 2)
+        func_data = self._function_data(cf, mesh, order)
+        draw_vol = ngs_mesh.dim == 3 and settings.get("draw_vol", True)
+        deformation = settings.get("deformation", None)
+        deform_data = None if deformation is None else self._function_data(deformation, mesh, 1)
+        with self._build_lock(func_data):
+            if draw_vol and settings.get("clipping", False):
+                func_data.need_3d = True
+            # the expensive part: CF evaluation and mesh packing
+            func_data.update(_options())
+            mdata = func_data.mesh_data
+            if deform_data is not None:
+                deform_data.update(_options())
+                # the cached objects stay on the undeformed mesh data
+                deform_data = copy.copy(deform_data)
+                mdata = copy.copy(deform_data.mesh_data)
+                deform_data.mesh_data = mdata
+                mdata.deformation_data = deform_data
+                mdata.deformation_scale = settings.get("deformation_scale", 1.0)
+                func_data = copy.copy(func_data)
+                func_data.mesh_data = mdata
+                deform_data.update(_options())
+                func_data.update(_options())
+
+        colormap = Colormap(
+            minval=settings.get("min", None),
+            maxval=settings.get("max", None),
+            colormap=settings.get("colormap", "matlab:jet"),
+        )
+        if settings.get("discrete_colormap", False):
+            colormap.set_discrete(True)
+
+        render_objects = []
+        if settings.get("draw_surf", True):
+            render_objects.append(CFRenderer(func_data, clipping=clipping, colormap=colormap))
+        if draw_vol and settings.get("clipping", False):
+            render_objects.append(ClippingCF(func_data, clipping, colormap))
+        if settings.get("wireframe", True):
+            render_objects.append(MeshWireframe2d(mdata, clipping=clipping))
+        colorbar = Colorbar(colormap)
+        colorbar.width = 0.8
+        colorbar.position = (-0.5, 0.9)
+        render_objects.append(colorbar)
+        return render_objects
+
+    # -- Rendering (main thread) -----------------------------------------------
+
+    def _render_prepared(self, env, render_objects, camera, path):
+        from webgpu import Scene
+        from webgpu.camera import Camera
+
+        if camera is None or isinstance(camera, str):
+            view = camera
+            camera = Camera()
+            camera.reset(*_bounding_box(render_objects))
+            if view is not None:
+                if view not in _VIEWS:
+                    raise ValueError(f"Unknown view {view!r}, expected one of {_VIEWS}")
+                getattr(camera, f"reset_{view}")()
+        env.ensure_canvas(self.width, self.height)
+        scene = env.wj.Draw(Scene(render_objects, camera=camera), self.width, self.height)
+        env.readback_texture(scene, path)
+
+
+def _bounding_box(render_objects):
+    from webgpu.utils import max_bounding_box
+
+    return max_bounding_box([r.get_bounding_box() for r in render_objects])
+
+
+def render_batch(jobs, out_dir=".", width=1024, height=768, app_data=None, prefetch=2):
+    """Render ``(obj, settings, camera)`` *jobs* to PNG files, see :class:`BatchRenderer`."""
+    return BatchRenderer(width, height, app_data, prefetch).render(jobs, out_dir)
@@ -0,0 +1,291 @@
+"""Headless benchmarks for the draw/redraw hot paths.
+
+Runs the CPU side of what the GUI does when drawing, without a browser or
+GPU: building the mesh and function data that ``MeshComponent.draw`` and
+``FunctionComponent.draw`` upload (also with the function compiled),
+re-evaluation on ``Redraw``, the hover value of a pick (read from the drawn
+function data), the volume data that enabling clipping requires and
+``DrawBadElements``. Each case is timed on box meshes of decreasing ``maxh``
+and the results (wall time, peak Python memory, build phases) are written
+as JSON::
+
+    python -m ngsolve_gui.benchmark --out bench.json
+    python -m ngsolve_gui.benchmark --out new.json --compare bench.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_MAXH = (0.4, 0.2, 0.1, 0.05)
+_FORMAT_VERSION = 1
+
+
+def make_box_mesh(maxh):
+    """Unit cube mesh with named faces, also the 3d mesh of the tests."""
+    import netgen.occ as occ
+    import ngsolve as ngs
+
+    box = occ.Box(occ.Pnt(0, 0, 0), occ.Pnt(1, 1, 1))
+    box.faces.Min(occ.X).name = "left"
+    box.faces.Max(occ.X).name = "right"
+    box.faces.Min(occ.Y).name = "bottom"
+    box.faces.Max(occ.Y).name = "top"
+    box.faces.Min(occ.Z).name = "back"
+    box.faces.Max(occ.Z).name = "front"
+    return ngs.Mesh(occ.OCCGeometry(box).GenerateMesh(maxh=maxh))
+
+
+def _benchmark_cf():
+    import ngsolve as ngs
+
+    return ngs.sin(3 * ngs.x) * ngs.cos(2 * ngs.y) * ngs.exp(ngs.z)
+
+
+def _options():
+    """Stand-in for the scene's ``RenderOptions``: updates only read the timestamp."""
+    return SimpleNamespace(timestamp=time.time())
+
+
+# -- Cases ------------------------------------------------------------------
+# Each case gets a mesh, returns a callable that runs the measured work once
+# (setup happens outside the timing) and optionally a dict of build phases.
+
+
+def _case_mesh_draw(mesh):
+    from .app_data import AppData
+
+    def run():
+        mdata = AppData().get_mesh_gpu_data(mesh)
+        # the packed buffers are shared between MeshData of the same mesh
+        mdata.set_needs_update()
+        mdata.update(_options())
+        return mdata.build_timings
+
+    return run
+
+
+def _case_function_draw(mesh, compile_mode="off"):
+    from .app_data import AppData
+    from .compiled import compiled
+
+    cf = compiled(_benchmark_cf(), compile_mode)
+    app_data = AppData()
+    app_data.get_mesh_gpu_data(mesh).update(_options())
+
+    def run():
+        func_data = app_data.get_function_gpu_data(cf, mesh, order=2)
+        func_data.update(_options())
+        app_data._gpu_cache = {k: v for k, v in app_data._gpu_cache.items() if v is not func_data}
+        return func_data.build_timings
+
+    return run
+
+
+def _case_redraw(mesh):
+    from .app_data import AppData
+
+    func_data = AppData().get_function_gpu_data(_benchmark_cf(), mesh, order=2)
+    func_data.update(_options())
+
+    def run():
+        func_data.set_needs_update()
+        func_data.update(_options())
+        return func_data.build_timings
+
+    return run
+
+
+def _case_clipping_update(mesh):
+    from .app_data import AppData
+
+    app_data = AppData()
+    cf = _benchmark_cf()
+
+    def run():
+        # surface data exists, the clipping plane needs the volume data
+        func_data = app_data.get_function_gpu_data(cf, mesh, order=2)
+        func_data.update(_options())
+        func_data.build_timings = {}
+        start = time.perf_counter()
+        func_data.need_3d = True
+        func_data.update(_options())
+        timings = dict(func_data.build_timings, total=time.perf_counter() - start)
+        func_data.need_3d = False
+        app_data._gpu_cache.clear()
+        return timings
+
+    return run
+
+
+def _case_picking(mesh, npicks=200):
+    from ngsolve_webgpu.mesh import ElType
+
+    from .app_data import AppData
+    from .pick_values import _trig_vertices, surface_value
+
+    func_data = AppData().get_function_gpu_data(_benchmark_cf(), mesh, order=2)
+    func_data.update(_options())
+    buffers = func_data.mesh_data.mesh_buffers
+    rng = np.random.default_rng(0)
+    instances = rng.integers(0, buffers.elements[ElType.TRIG][0], npicks)
+    lam = rng.dirichlet(np.ones(3), npicks)
+    picks = [(i, _trig_vertices(buffers, i).T @ l) for i, l in zip(instances, lam)]
+
+    def run():
+        # what FunctionComponent does for every hovered surface triangle
+        for instance, pos in picks:
+            surface_value(func_data, instance, pos)
+        return {"picks": npicks}
+
+    return run
+
+
+def _case_bad_elements(mesh):
+    from .bad_elements import find_bad_elements
+    from .timed_data import TimedMeshData
+
+    def run():
+        start = time.perf_counter()
+        el2d, el3d, _ = find_bad_elements(mesh, threshold_3d=5)
+        timings = {"detect": time.perf_counter() - start}
+        if np.any(el3d):
+            mdata = TimedMeshData(mesh, el2d_bitarray=el2d, el3d_bitarray=el3d)
+            mdata.update(_options())
+            timings.update(mdata.build_timings)
+        return timings
+
+    return run
+
+
+CASES = {
+    "mesh_draw": _case_mesh_draw,
+    "function_draw": _case_function_draw,
+    "function_draw_compiled": lambda mesh: _case_function_draw(mesh, "compile"),
+    "redraw": _case_redraw,
+    "clipping_update": _case_clipping_update,
+    "picking": _case_picking,
+    "bad_elements": _case_bad_elements,
+}
+
+
+def _measure(run, repeat):
+    times = []
+    peak = 0
+    phases = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        phases = run()
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return times, peak, phases
+
+
+def _max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(maxh=DEFAULT_MAXH, cases=None, repeat=3, log=None):
+    """Run *cases* (default: all) on box meshes with the given *maxh* values.
+
+    Returns the JSON-serializable result dict.
+    """
+    import ngsolve as ngs
+
+    cases = list(cases or CASES)
+    results = []
+    for h in maxh:
+        mesh = make_box_mesh(h)
+        for name in cases:
+            run = CASES[name](mesh)
+            times, peak, phases = _measure(run, repeat)
+            entry = {
+                "case": name,
+                "maxh": h,
+                "ne": mesh.ne,
+                "nv": mesh.nv,
+                "wall_s": min(times),
+                "wall_mean_s": sum(times) / len(times),
+                "peak_python_mb": peak / 2**20,
+                "max_rss_mb": _max_rss_mb(),
+                "phases": phases or {},
+            }
+            results.append(entry)
+            if log is not None:
+                print(
+                    f"{name:<22} maxh={h:<6} ne={mesh.ne:<8} "
+                    f"{1e3 * entry['wall_s']:>10.2f} ms  {entry['peak_python_mb']:>8.1f} MB",
+                    file=log,
+                )
+    return {
+        "version": _FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "ngsolve": ngs.__version__,
+        "threads": ngs.GetNumThreads(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(base, new):
+    """Relative wall time change per (case, maxh): ``[(case, maxh, base_s, new_s, ratio)]``."""
+    base_times = {(r["case"], r["maxh"]): r["wall_s"] for r in base["results"]}
+    rows = []
+    for r in new["results"]:
+        key = (r["case"], r["maxh"])
+        if key in base_times:
+            old = base_times[key]
+            rows.append((*key, old, r["wall_s"], r["wall_s"] / old if old > 0 else float("inf")))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default="benchmark.json", help="JSON output file")
+    parser.add_argument("--maxh", type=float, nargs="+", default=list(DEFAULT_MAXH))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", help="Earlier JSON output to compare against")
+    args = parser.parse_args(argv)
+
+    data = run_benchmarks(args.maxh, args.cases, args.repeat, log=sys.stdout)
+    with open(args.out, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        print(f"\nCompared to {args.compare} ({base.get('revision')}):")
+        for case, h, old, new, ratio in compare(base, data):
+            print(f"{case:<22} maxh={h:<6} {1e3 * old:>10.2f} -> {1e3 * new:>10.2f} ms  x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Cooperative cancellation of long operations.
+
+A long operation (loading a file, meshing, building function data, field
+lines, ``DrawBadElements``) runs as a *job* with a :class:`CancelToken`
+that is current for its thread. The operation calls
+:func:`check_cancelled` between its chunks; after the token was cancelled
+this raises :class:`Cancelled`, so the operation stops at a point where
+its state is consistent. Work inside a single C++ call can't be
+interrupted, except for netgen's own loops (meshing), which stop on
+netgen's terminate flag, see :func:`netgen_terminate`.
+
+Running jobs report their progress through :mod:`ngsolve_gui.progress`.
+"""
+
+import contextlib
+import threading
+import traceback
+
+from . import progress
+
+
+class Cancelled(KeyboardInterrupt):
+    """Raised by :func:`check_cancelled` after the job was cancelled.
+
+    A ``KeyboardInterrupt``, so ``except Exception`` fallbacks on the way
+    don't swallow it and script runners handle it like Ctrl-C."""
+
+
+class CancelToken:
+    def __init__(self, name=""):
+        self.name = name
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+
+    def on_cancel(self, callback):
+        """Call *callback* (from the cancelling thread) on cancel."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def discard(self, callback):
+        """Remove a callback added with :meth:`on_cancel`."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled(self.name)
+
+
+_local = threading.local()
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def current_token():
+    """Token of the innermost job of this thread, or ``None``."""
+    tokens = getattr(_local, "tokens", None)
+    return tokens[-1] if tokens else None
+
+
+def check_cancelled():
+    """Raise :class:`Cancelled` if the current job was cancelled; no-op
+    outside of jobs."""
+    token = current_token()
+    if token is not None:
+        token.check()
+
+
+@contextlib.contextmanager
+def job(name, token=None):
+    """Run the block as a cancellable job named *name*: *token* is current
+    for :func:`check_cancelled` in this thread and listed in
+    :func:`active_jobs`. Without *token* a new one is made, which is also
+    cancelled with the job the block runs in (e.g. a draw from a script)."""
+    parent = None
+    if token is None:
+        token = CancelToken(name)
+        parent = current_token()
+        if parent is not None:
+            parent.on_cancel(token.cancel)
+    with _jobs_lock:
+        # a token can run in several (nested) jobs, listed under its first name
+        first, count = _jobs.get(token, (name, 0))
+        _jobs[token] = (first, count + 1)
+    if not count:
+        progress.started(token, name)
+    tokens = _local.__dict__.setdefault("tokens", [])
+    tokens.append(token)
+    try:
+        yield token
+    finally:
+        tokens.pop()
+        if parent is not None:
+            parent.discard(token.cancel)
+        with _jobs_lock:
+            first, count = _jobs[token]
+            if count > 1:
+                _jobs[token] = (first, count - 1)
+            else:
+                del _jobs[token]
+        if count == 1:
+            progress.finished(token)
+
+
+def active_jobs():
+    """``(name, token)`` of the running jobs."""
+    with _jobs_lock:
+        return [(name, token) for token, (name, _) in _jobs.items()]
+
+
+@contextlib.contextmanager
+def netgen_terminate(token):
+    """Stop netgen's loops when *token* is cancelled inside the block;
+    meshing then raises "Meshing stopped" or returns an incomplete mesh.
+
+    The terminate flag is global to netgen, so it stops all meshing that
+    runs at that time; it is reset when the block is left."""
+    from netgen.libngpy._meshing import _SetTerminate
+
+    inside = True
+
+    def terminate():
+        if inside:
+            _SetTerminate(1)
+
+    token.on_cancel(terminate)
+    try:
+        yield token
+    finally:
+        inside = False
+        if token.cancelled:
+            _SetTerminate(0)
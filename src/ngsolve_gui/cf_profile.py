@@ -0,0 +1,162 @@
+"""Evaluation cost of the subexpressions of a CoefficientFunction.
+
+:func:`profile` walks the expression tree of a CF and times the
+evaluation of every node on the same sample of points of the mesh. A
+node's time includes its children, its own time is the rest. Shared
+subexpressions are timed once and listed under every parent. The cost of
+an evaluation call as such (mapping the points, the result array),
+measured on a constant, is subtracted from every node.
+
+The sample is a few points in each of some randomly chosen volume
+elements. The points are given by element number and local coordinates
+inside the reference simplex, which lies in every element type, so no
+point search is needed. The samples are cached per mesh, profiling again
+(e.g. after changing the function) reuses them.
+"""
+
+import re
+import time
+import weakref
+
+import ngsolve as ngs
+import numpy as np
+
+from .cancel import check_cancelled
+
+SAMPLE_ELEMENTS = 5000
+POINTS_PER_ELEMENT = 4
+REPEAT = 5
+
+# id(mesh) -> (weakref to the mesh, (ne, elements, points per element),
+# MeshPoint array); meshes are not hashable
+_samples = {}
+# evaluated by the FESpace, their children are not evaluated
+_LEAVES = tuple(
+    cls
+    for cls in (ngs.GridFunction, getattr(ngs.comp, "GridFunctionCoefficientFunction", None))
+    if cls is not None
+)
+
+
+class ProfileNode:
+    """Timings of one node: *total* includes the children, *own* excludes
+    them (seconds for all sample points). *error* is set if the node could
+    not be evaluated on its own."""
+
+    def __init__(self, label, total=0.0, children=(), error=None):
+        self.label = label
+        self.total = total
+        self.children = list(children)
+        self.error = error
+        self.own = max(0.0, total - sum(c.total for c in self.children))
+
+    def rows(self, min_percent=1.0):
+        """``(depth, node, total %, own %)`` of the nodes in tree order,
+        without the subtrees below *min_percent* of the root's time."""
+        root = self.total or 1e-30
+        rows = []
+
+        def visit(node, depth):
+            if depth > 0 and 100 * node.total / root < min_percent:
+                return
+            rows.append((depth, node, 100 * node.total / root, 100 * node.own / root))
+            for child in sorted(node.children, key=lambda c: c.total, reverse=True):
+                visit(child, depth + 1)
+
+        visit(self, 0)
+        return rows
+
+    def costliest(self, n=10):
+        """The *n* nodes with the most own time; shared ones once."""
+        nodes = {}
+
+        def visit(node):
+            nodes[id(node)] = node
+            for child in node.children:
+                visit(child)
+
+        visit(self)
+        return sorted(nodes.values(), key=lambda c: c.own, reverse=True)[:n]
+
+
+def _local_points(dim, n, rng):
+    # uniform in the reference simplex {x_i > 0, sum x_i < 1}
+    return rng.dirichlet(np.ones(dim + 1), size=n)[:, :dim]
+
+
+def sample_points(mesh, elements=SAMPLE_ELEMENTS, points_per_element=POINTS_PER_ELEMENT):
+    """MeshPoint array of *points_per_element* points in each of (up to)
+    *elements* random volume elements of *mesh*, cached per mesh."""
+    key = (mesh.ne, elements, points_per_element)
+    cached = _samples.get(id(mesh))
+    if cached is None or cached[0]() is not mesh or cached[1] != key:
+        rng = np.random.default_rng(0)
+        nrs = np.sort(rng.choice(mesh.ne, min(mesh.ne, elements), replace=False))
+        local = _local_points(mesh.dim, points_per_element, rng)
+        # a located point for the dtype and the mesh pointer
+        vertex = mesh(*np.array(mesh.vertices[0].point)[:, None])
+        points = np.zeros(len(nrs) * points_per_element, dtype=vertex.dtype)
+        points["meshptr"] = vertex["meshptr"]
+        points["VorB"] = 0
+        points["nr"] = np.repeat(nrs, points_per_element)
+        points["facetnr"] = -1
+        for i, name in enumerate("xyz"[: mesh.dim]):
+            points[name] = np.tile(local[:, i], len(nrs))
+        cached = _samples[id(mesh)] = (weakref.ref(mesh), key, points)
+        for k in [k for k, c in _samples.items() if c[0]() is None]:
+            del _samples[k]
+    return cached[2]
+
+
+def _label(cf):
+    label = str(cf).splitlines()[0] if str(cf) else type(cf).__name__
+    # mangled C++ class names, e.g. N6ngcomp31GridFunctionCoefficientFunctionE
+    label = re.sub(r"\bN\d+ng\w+?\d+(\w+)E\b", r"\1", label)
+    return label.removeprefix("coef ")
+
+
+def _children(cf):
+    if isinstance(cf, _LEAVES):
+        return []
+    try:
+        childs = cf.data["childs"]
+    except Exception:
+        return []
+    return [c for c in childs if isinstance(c, ngs.CoefficientFunction)]
+
+
+def _time(cf, points, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cf(points)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def profile(cf, mesh, repeat=REPEAT, points=None):
+    """Time the nodes of *cf* on *points* (default: :func:`sample_points`
+    of *mesh*), the best of *repeat* evaluations each. Returns the root
+    :class:`ProfileNode`."""
+    if points is None:
+        points = sample_points(mesh)
+    overhead = _time(ngs.CoefficientFunction(0.0), points, repeat)
+    nodes = {}
+    # the wrappers of the children stay alive, their ids are not reused
+    seen = []
+
+    def build(c):
+        if id(c) in nodes:
+            return nodes[id(c)]
+        check_cancelled()
+        seen.append(c)
+        total, error = 0.0, None
+        try:
+            total = max(0.0, _time(c, points, repeat) - overhead)
+        except Exception as e:
+            error = str(e)
+        node = ProfileNode(_label(c), total, [build(child) for child in _children(c)], error)
+        nodes[id(c)] = node
+        return node
+
+    return build(cf)
@@ -0,0 +1,180 @@
+"""Compiled CoefficientFunctions for drawing.
+
+Function tabs with compilation enabled evaluate ``cf.Compile()`` (mode
+``"compile"``: the expression tree as a flat list of steps) or
+``cf.Compile(realcompile=True)`` (mode ``"realcompile"``: C++ code built
+by ``ngscxx``) instead of ``cf``. Deep expression trees evaluate faster
+compiled; C++ compilation takes seconds, so it pays off for expensive
+functions on large meshes.
+
+Compiled functions are cached in memory by a fingerprint of the
+expression, as long as they are in use (by a tab): the cache holds them
+weakly. GridFunctions and Parameters in the expression count by
+identity, so a function of the same name from another solve is compiled
+again, while new values of a GridFunction or Parameter are seen by the
+compiled function as well. Compilation runs outside the cache lock; a
+second request for a function being compiled waits for the first.
+
+Where ccache is installed (:func:`has_kernel_cache`), ``ngscxx`` builds
+through it, and the native kernels are cached on disk across sessions:
+:data:`KERNEL_CACHE_DIR` is set as ``CCACHE_DIR`` unless one is
+configured. Without ccache every session compiles the kernels again.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import weakref
+from types import SimpleNamespace
+
+import ngsolve as ngs
+import numpy as np
+
+MODES = ("off", "compile", "realcompile")
+KERNEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ngsolve_gui", "kernels")
+
+# key -> compiled function, while it is used
+_cache = weakref.WeakValueDictionary()
+# key -> event set when the compilation of key is done
+_compiling = {}
+_lock = threading.Lock()
+# leaves with state that changes (values) or is expensive to serialize
+_BY_IDENTITY = tuple(
+    getattr(ngs, name) for name in ("GridFunction", "Parameter", "ParameterC") if hasattr(ngs, name)
+)
+
+
+def _identity(leaf):
+    if isinstance(leaf, ngs.GridFunction):
+        # the wrappers of a GridFunction in an expression are not the same
+        # Python object, its vector is the same
+        try:
+            return np.asarray(leaf.vec.FV()).__array_interface__["data"][0]
+        except Exception:
+            pass
+    return id(leaf)
+
+
+def _fingerprint(cf):
+    # id -> (node, digest); the wrappers of the children are new Python
+    # objects, they are kept alive for the walk so that their ids are not
+    # reused by other nodes
+    digests = {}
+    leaves = []
+
+    def node(c):
+        key = id(c)
+        if key not in digests:
+            h = hashlib.sha1()
+            # FESpaces of GridFunction nodes are not CoefficientFunctions
+            if isinstance(c, _BY_IDENTITY) or not isinstance(c, ngs.CoefficientFunction):
+                h.update(f"{type(c).__name__}@{_identity(c):x}".encode())
+                leaves.append(c)
+            else:
+                data = c.data
+                h.update(data["data"])
+                for child in data["childs"]:
+                    h.update(b"-" if child is None else node(child))
+            digests[key] = (c, h.digest())
+        return digests[key][1]
+
+    return node(cf).hex(), leaves
+
+
+def fingerprint(cf):
+    """Hex digest of the expression tree of *cf*."""
+    return _fingerprint(cf)[0]
+
+
+def has_kernel_cache():
+    """Whether ``ngscxx`` compiles through ccache, i.e. the kernels of mode
+    ``"realcompile"`` are cached on disk."""
+    # ngscxx looks for ccache on the PATH or in /usr/bin
+    return shutil.which("ccache") is not None or os.path.isfile("/usr/bin/ccache")
+
+
+def _use_kernel_cache():
+    if has_kernel_cache() and "CCACHE_DIR" not in os.environ:
+        os.makedirs(KERNEL_CACHE_DIR, exist_ok=True)
+        os.environ["CCACHE_DIR"] = KERNEL_CACHE_DIR
+
+
+def _compile(cf, mode):
+    realcompile = mode == "realcompile"
+    if realcompile:
+        _use_kernel_cache()
+    try:
+        return cf.Compile(realcompile=realcompile, wait=True)
+    except Exception as e:
+        print(f"Compiling {str(cf).splitlines()[0]} failed, evaluated interpreted: {e}")
+        return cf
+
+
+def compiled(cf, mode="compile"):
+    """*cf* compiled with *mode* (see :data:`MODES`), from the cache if it
+    was compiled before. Returns *cf* itself for mode ``"off"`` or if the
+    compilation fails."""
+    if mode == "off" or mode not in MODES:
+        return cf
+    try:
+        digest, leaves = _fingerprint(cf)
+        key = (digest, mode)
+    except Exception:
+        # not serializable, compiled without caching
+        return _compile(cf, mode)
+    while True:
+        with _lock:
+            result = _cache.get(key)
+            if result is not None:
+                return result
+            done = _compiling.get(key)
+            if done is None:
+                done = _compiling[key] = threading.Event()
+                break
+        # compiled by another thread, from the cache then (unless it failed
+        # or is not used anymore)
+        done.wait()
+    try:
+        result = _compile(cf, mode)
+        if result is not cf:
+            with _lock:
+                _cache[key] = result
+            # the leaves live as long as the compiled function, their
+            # identities are not reused while it is cached
+            weakref.finalize(result, leaves.clear)
+        return result
+    finally:
+        with _lock:
+            del _compiling[key]
+        done.set()
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def compare_evaluation(cf, mesh, order=2, mode="compile"):
+    """Evaluate *cf* for drawing on *mesh*, interpreted and compiled with
+    *mode*. Returns the seconds ``{"interpreted": ..., "compiled": ...,
+    "compile_time": ...}``; ``"compile_time"`` is the time to get the
+    compiled function (shorter if it was cached)."""
+    from .timed_data import TimedFunctionData, TimedMeshData
+
+    mesh_data = TimedMeshData(mesh)
+    mesh_data.update(SimpleNamespace(timestamp=time.time()))
+
+    def evaluate(f):
+        data = TimedFunctionData(mesh_data, f, order=order)
+        data.update(SimpleNamespace(timestamp=time.time()))
+        return data.build_timings["evaluate"]
+
+    times = {"interpreted": evaluate(cf)}
+    start = time.perf_counter()
+    fast = compiled(cf, mode)
+    compile_time = time.perf_counter() - start
+    times["compiled"] = evaluate(fast)
+    times["compile_time"] = compile_time
+    return times
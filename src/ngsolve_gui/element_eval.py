@@ -0,0 +1,211 @@
+"""Evaluation of CoefficientFunctions on chosen elements, in chunks.
+
+ngsolve_webgpu evaluates the function data of a ``MeshData`` on all
+elements of its region (``MapToAllElements``) and drops the ones it does
+not draw. Here the integration points are mapped for the drawn elements
+only, a chunk of elements at a time, so a tile evaluates its own elements
+and the temporaries are bounded by the chunk size. The values are packed
+like ``evaluate_cf`` and ``FunctionData.evaluate_3d`` pack them: a header
+(dimension, order, complex flag) and the Bernstein coefficients, one block
+per element, then the extra blocks of quads (surface) or of pyramids,
+prisms and hexes (volume). Cancellation is checked and progress reported
+between the chunks (see :mod:`ngsolve_gui.cancel`).
+"""
+
+import numpy as np
+
+from .cancel import check_cancelled
+from .progress import report
+
+# elements per evaluation call
+CHUNK_ELEMENTS = 20_000
+
+# volume elements by number of nodes (first and second order)
+_VOLUME_TYPES = (("TET", (4, 10)), ("PYRAMID", (5, 13)), ("PRISM", (6, 15)), ("HEX", (8, 20)))
+
+
+def _element_np(els):
+    import netgen.meshing
+
+    return els["np"] if "np" in els.dtype.names else netgen.meshing.ElementNP[els["type"]]
+
+
+def drawn_elements(mesh_data, dim):
+    """Element numbers and netgen element rows of the elements of dimension
+    *dim* (2 or 3) that *mesh_data* draws, in drawing order."""
+    import ngsolve as ngs
+
+    buffers = getattr(mesh_data, "mesh_buffers", mesh_data)
+    mesh = buffers.mesh
+    els = (mesh.Elements2D() if dim == 2 else mesh.Elements3D()).NumPy()
+    # a tile mesh holds the rows of its elements only
+    numbers = getattr(mesh, "element_numbers", None)
+    nrs = numbers(dim) if numbers is not None else np.arange(len(els))
+    bits = buffers.el2d_bitarray if dim == 2 else buffers.el3d_bitarray
+    keep = np.ones(len(els), dtype=bool) if bits is None else np.array(bits, dtype=bool)
+    region = buffers.reg_or_mesh
+    if isinstance(region, ngs.Region):
+        if dim == 2 and region.VB() == ngs.VOL and region.mesh.dim == 3:
+            region = region.Boundaries()
+        keep &= np.isin(els["index"], np.flatnonzero(region.Mask()) + 1)
+    return nrs[keep], els[keep]
+
+
+def element_points(mesh, vb, nrs, points):
+    """Mapped points of the reference *points* on the elements *nrs* (of
+    kind *vb*), element by element, as ``mesh.MapToAllElements`` gives them
+    for all elements."""
+    import ngsolve as ngs
+
+    nrs = np.asarray(nrs)
+    points = np.array(points, dtype=float).reshape(len(points), -1)
+    first = mesh.GetTrafo(ngs.ElementId(vb, int(nrs[0])))(
+        ngs.IntegrationRule([(0.0, 0.0, 0.0)], [0.0])
+    )
+    pts = np.empty(len(nrs) * len(points), dtype=first.dtype)
+    pts[:] = first[0]
+    for i, name in enumerate("xyz"):
+        pts[name] = np.tile(points[:, i], len(nrs)) if i < points.shape[1] else 0.0
+    pts["nr"] = np.repeat(nrs, len(points))
+    return pts
+
+
+class _Packer:
+    """Bernstein coefficients of value blocks, and the value range."""
+
+    def __init__(self, cf, order, nblocks, transform, is_complex=None):
+        self.cf = cf
+        self.comps = cf.dim
+        self.is_complex = cf.is_complex if is_complex is None else is_complex
+        self.transform = np.asarray(transform)
+        width = self.comps * (2 if self.is_complex else 1)
+        self.data = np.empty(3 + nblocks * len(self.transform) * width, dtype=np.float32)
+        self.data[:3] = (self.comps, order, 1.0 if self.is_complex else 0.0)
+        self.blocks = self.data[3:].reshape(nblocks, len(self.transform), width)
+        self.minval = np.full(self.comps + 1, np.inf)
+        self.maxval = np.full(self.comps + 1, -np.inf)
+
+    def evaluate(self, pts):
+        import ngsolve as ngs
+
+        with ngs.TaskManager():
+            return self.cf(pts)
+
+    def step(self, start):
+        """Called before the chunk from block *start* is evaluated."""
+        check_cancelled()
+        report(fraction=start / max(1, len(self.blocks)))
+
+    def put(self, start, values):
+        """Store the blocks of *values* (``(n * ndof, comps)``) from block *start*."""
+        ndof = self.transform.shape[1]
+        values = values.reshape(-1, ndof, self.comps)
+        out = self.blocks[start : start + len(values)]
+        if self.is_complex:
+            out[..., 0::2] = np.matmul(self.transform, values.real)
+            out[..., 1::2] = np.matmul(self.transform, values.imag)
+            values = np.abs(values)
+        else:
+            out[...] = np.matmul(self.transform, values.real)
+            values = values.real
+        if len(values):
+            flat = values.reshape(-1, self.comps)
+            norm = np.linalg.norm(flat, axis=1)
+            self.minval = np.minimum(self.minval, [norm.min(), *flat.min(axis=0)])
+            self.maxval = np.maximum(self.maxval, [norm.max(), *flat.max(axis=0)])
+
+    def result(self):
+        return self.data, [float(v) for v in self.minval], [float(v) for v in self.maxval]
+
+
+def _chunks(n, chunk):
+    return [(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+
+
+def evaluate_surface(cf, mesh_data, order, chunk=CHUNK_ELEMENTS):
+    """Surface function data of *cf* on the drawn elements of *mesh_data*,
+    ``(data, minval, maxval)`` like ``evaluate_cf``; ``None`` if nothing is
+    drawn."""
+    import ngsolve as ngs
+    import ngsolve.webgui
+    from ngsolve_webgpu.cf import _get_bernstein_matrix_trig
+
+    nrs, els = drawn_elements(mesh_data, 2)
+    if len(nrs) == 0:
+        return None
+    mesh = mesh_data.ngs_mesh
+    vb = ngs.VOL if mesh.dim == 2 else ngs.BND
+    trig = ngsolve.webgui._make_trig(order)
+    ndof = len(trig)
+    quad = ngsolve.webgui._make_quad(order)
+    transform = np.array(
+        _get_bernstein_matrix_trig(order, ngs.IntegrationRule(trig, [0] * ndof)).I
+    )
+    is_quad = _element_np(els) == 4
+    quads = np.flatnonzero(is_quad)
+    packer = _Packer(cf, order, len(nrs) + len(quads), transform)
+    for start, end in _chunks(len(nrs), chunk):
+        packer.step(start)
+        q = is_quad[start:end]
+        pts = element_points(mesh, vb, nrs[start:end], trig)
+        if q.any():
+            first = element_points(mesh, vb, nrs[start:end][q], quad[:ndof])
+            pts.reshape(-1, ndof)[q] = first.reshape(-1, ndof)
+        packer.put(start, packer.evaluate(pts))
+    for start, end in _chunks(len(quads), chunk):
+        packer.step(len(nrs) + start)
+        pts = element_points(mesh, vb, nrs[quads[start:end]], quad[ndof:])
+        packer.put(len(nrs) + start, packer.evaluate(pts))
+    return packer.result()
+
+
+def evaluate_volume(cf, mesh_data, order, chunk=CHUNK_ELEMENTS):
+    """Volume function data of *cf* on the drawn elements of *mesh_data*,
+    ``(data, minval, maxval)`` like ``FunctionData.evaluate_3d``; ``None``
+    for meshes (regions) without volume elements."""
+    import ngsolve as ngs
+    from ngsolve_webgpu.cf import get_3d_intrules, vandermonde_3d
+
+    region = mesh_data.reg_or_mesh
+    if isinstance(region, ngs.Region) and region.VB() != ngs.VOL:
+        return None
+    mesh = mesh_data.ngs_mesh
+    if mesh.dim != 3:
+        return None
+    nrs, els = drawn_elements(mesh_data, 3)
+    if len(nrs) == 0:
+        return None
+    rules = get_3d_intrules(order)
+    ndof = len(rules[ngs.ET.TET])
+    points = {}
+    kind = np.zeros(len(nrs), dtype=np.int8)
+    nps = _element_np(els)
+    for i, (name, node_counts) in enumerate(_VOLUME_TYPES):
+        points[i] = [ip.point for ip in rules[getattr(ngs.ET, name)]]
+        kind[np.isin(nps, node_counts)] = i
+    # one block per element, then the further blocks of each type in turn
+    extra = [np.flatnonzero(kind == i) for i in range(1, len(_VOLUME_TYPES))]
+    nblocks = len(nrs) + sum(
+        len(ids) * (len(points[i + 1]) // ndof - 1) for i, ids in enumerate(extra)
+    )
+    packer = _Packer(cf, order, nblocks, vandermonde_3d(order))
+    for start, end in _chunks(len(nrs), chunk):
+        packer.step(start)
+        pts = element_points(mesh, ngs.VOL, nrs[start:end], points[0])
+        blocks = pts.reshape(-1, ndof)
+        for i in range(1, len(_VOLUME_TYPES)):
+            sel = kind[start:end] == i
+            if sel.any():
+                first = element_points(mesh, ngs.VOL, nrs[start:end][sel], points[i][:ndof])
+                blocks[sel] = first.reshape(-1, ndof)
+        packer.put(start, packer.evaluate(pts))
+    block = len(nrs)
+    for i, ids in enumerate(extra):
+        rest = points[i + 1][ndof:]
+        per_element = max(1, len(rest) // ndof)
+        for start, end in _chunks(len(ids), max(1, chunk // per_element)):
+            packer.step(block)
+            pts = element_points(mesh, ngs.VOL, nrs[ids[start:end]], rest)
+            packer.put(block, packer.evaluate(pts))
+            block += (end - start) * (len(rest) // ndof)
+    return packer.result()
@@ -1,4 +1,5 @@
 import asyncio
+import ctypes
 import threading
 from pathlib import Path
 import numpy as np
@@ -7,16 +8,18 @@ from typing import Any, Callable, Iterable
 import netgen.occ as ngocc
 import ngsolve as ngs
 
+from . import cancel, progress, tracing
 from .app_data import AppData
-from .function import FunctionComponent
-from .geometry import GeometryComponent
-from .mesh import MeshComponent
-from .plot import PlotComponent
-from ngapp.components import Component
+from .bad_elements import find_bad_elements
+from .registry import get_component_info
 
 _appdata: AppData
 _redraw_func: Callable | None = None
 
+# Seconds a cancelled script gets to reach a Draw/Redraw (where it stops
+# cooperatively) before it is interrupted
+CANCEL_GRACE = 2.0
+
 
 def _file_extension_matches(path: Path, suffixes: Iterable[str]) -> bool:
     """Helper to check file endings including multi-part like .vol.gz."""
@@ -54,7 +57,11 @@ ngsolve.Draw(obj, name='{name}')"""
 
 
 def _launch_interactive_shell(
-    code: str, script_globals: dict, app, done_event: threading.Event
+    code: str,
+    script_globals: dict,
+    app,
+    done_event: threading.Event,
+    token: cancel.CancelToken,
 ) -> threading.Thread:
     """Start IPython in a background thread; clean up terminal on exit."""
     import sys
@@ -72,7 +79,17 @@ def _launch_interactive_shell(
     def launch_shell():
         ipshell[0] = InteractiveShellEmbed(user_ns=script_globals)
         try:
-            asyncio.run(ipshell[0].run_code(compile(code, "<embedded>", "exec")))
+            # only the initial run is cancellable, the shell stays
+            with (
+                cancel.job(token.name, token),
+                cancel.netgen_terminate(token),
+                progress.netgen_status(token),
+                tracing.span("run script", job=token.name),
+            ):
+                asyncio.run(ipshell[0].run_code(compile(code, "<embedded>", "exec")))
+        except KeyboardInterrupt:
+            # interrupted after a cancel (see _run_script), the shell starts anyway
+            pass
         finally:
             done_event.set()
         ipshell[0].mainloop()
@@ -93,23 +110,50 @@ def _launch_interactive_shell(
     return t
 
 
+def _interrupt(thread: threading.Thread, done_event: threading.Event):
+    # only the initial run, not an interactive shell that follows it
+    if thread.is_alive() and not done_event.is_set():
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(
+            ctypes.c_ulong(thread.ident), ctypes.py_object(cancel.Cancelled)
+        )
+
+
 def _run_script(
-    code: str, script_globals: dict, app
+    code: str, script_globals: dict, app, name: str = "script"
 ) -> tuple[threading.Thread, threading.Event]:
     """Run user code with optional IPython; fall back to plain exec.
 
     Returns ``(worker_thread, done_event)`` where *done_event* is set
     when the initial code execution finishes (or is cancelled).
+    ``worker_thread.cancel()`` cancels the run: it stops at the next
+    ``Draw``/``Redraw``, and netgen stops meshing. A script that does
+    neither (e.g. a long Python loop) is interrupted after
+    ``CANCEL_GRACE`` seconds.
     """
     done_event = threading.Event()
+    token = cancel.CancelToken(f"Running {name}")
+
+    def interrupt_later():
+        timer = threading.Timer(CANCEL_GRACE, _interrupt, (thread, done_event))
+        timer.daemon = True
+        timer.start()
+
+    token.on_cancel(interrupt_later)
     try:
-        thread = _launch_interactive_shell(code, script_globals, app, done_event)
+        thread = _launch_interactive_shell(code, script_globals, app, done_event, token)
+        thread.cancel = token.cancel
     except ImportError:
         print("IPython is not installed, skipping interactive shell.")
 
         def _run_and_signal():
             try:
-                exec(code, script_globals)
+                with (
+                    cancel.job(token.name, token),
+                    cancel.netgen_terminate(token),
+                    progress.netgen_status(token),
+                    tracing.span("run script", job=token.name),
+                ):
+                    exec(code, script_globals)
             except (SystemExit, KeyboardInterrupt):
                 pass
             finally:
@@ -118,19 +162,24 @@ def _run_script(
         thread = threading.Thread(
             target=_run_and_signal, name="PythonRunner", daemon=True
         )
+        thread.cancel = token.cancel
         thread.start()
     return thread, done_event
 
 
-# Dispatch table mapping types to default name + component
-_DRAW_DISPATCH: dict[type, tuple[str, type]] = {
-    ngocc.OCCGeometry: ("Geometry", GeometryComponent),
-    ngs.Mesh: ("Mesh", MeshComponent),
-    ngs.Region: ("Mesh", MeshComponent),
-    ngs.CoefficientFunction: ("Function", FunctionComponent),
+# Dispatch table mapping types to default name + registered component type
+_DRAW_DISPATCH: dict[type, tuple[str, str]] = {
+    ngocc.OCCGeometry: ("Geometry", "geometry"),
+    ngs.Mesh: ("Mesh", "mesh"),
+    ngs.Region: ("Mesh", "mesh"),
+    ngs.CoefficientFunction: ("Function", "function"),
 }
 
 
+def _component_class(type_key: str) -> type:
+    return get_component_info(type_key)["cls"]
+
+
 def _is_plot_candidate(obj: Any) -> bool:
     if isinstance(obj, (list, tuple)):
         return any(_is_plot_candidate(item) for item in obj)
@@ -157,6 +206,7 @@ def DrawImpl(
     Provide `mesh` for general coefficient functions; grid functions use their space
     mesh automatically. The function returns the created component instance.
     """
+    cancel.check_cancelled()
     data = dict(**kwargs)
     if isinstance(obj, ngocc.TopoDS_Shape):
         obj = ngocc.OCCGeometry(obj)
@@ -167,25 +217,26 @@ def DrawImpl(
         data["mesh"] = mesh
 
     if _is_plot_candidate(obj):
-        from .plot import PlotComponent
-
         data["obj"] = obj
-        return _appdata.add_tab(name or "Plot", PlotComponent, data, _appdata)
+        return _appdata.add_tab(name or "Plot", _component_class("plot"), data, _appdata)
 
     if type(obj) not in _DRAW_DISPATCH:
         try:
             # try to convert to CoefficientFunction
             obj = ngs.CF(obj)
-            default_name, comp = _DRAW_DISPATCH[ngs.CF]
+            default_name, type_key = _DRAW_DISPATCH[ngs.CF]
         except:
             raise TypeError(f"Unsupported object type for Draw: {type(obj)}")
     else:
-        default_name, comp = _DRAW_DISPATCH[type(obj)]
+        default_name, type_key = _DRAW_DISPATCH[type(obj)]
     data["obj"] = obj
-    return _appdata.add_tab(name or default_name, comp, data, _appdata)
+    return _appdata.add_tab(
+        name or default_name, _component_class(type_key), data, _appdata
+    )
 
 
 def RedrawImpl(*args, **kwargs):
+    cancel.check_cancelled()
     if _redraw_func is not None:
         _redraw_func(*args, **kwargs)
 
@@ -228,36 +279,26 @@ def load_file(filename, app):
     path = Path(filename)
     name = path.stem
     code = _build_loader_snippet(filename, name)
+    if path.suffix.lower() == ".py" and app.usersettings.get("solver_process", False):
+        from .remote import run_in_process
+
+        return run_in_process(code, path.name)
     script_globals = {"__name__": "__main__"}
-    return _run_script(code, script_globals, app)
+    return _run_script(code, script_globals, app, path.name)
 
 
 def DrawBadElements(mesh: ngs.Mesh, threshold_3d=100, threshold_2d=20, intorder=4):
-    from ngsolve import Norm, Inv, specialcf
+    with cancel.job("Finding bad elements"):
+        el2d_bitarray, el3d_bitarray, max_badness = find_bad_elements(
+            mesh, threshold_3d, threshold_2d, intorder
+        )
+    ShowBadElements(mesh, el2d_bitarray, el3d_bitarray, max_badness)
 
-    cf = Norm(specialcf.JacobianMatrix(3, 3)) * Norm(
-        Inv(specialcf.JacobianMatrix(3, 3))
-    )
 
-    intrule = ngs.IntegrationRule(ngs.ET.TET, intorder)
-    pnts = mesh.MapToAllElements(intrule, ngs.VOL).flatten()
-    vals: np.ndarray = cf(pnts)
-    n = len(intrule)
-    vals = vals.reshape((-1, n))
-    max_val = np.max(vals, axis=1)
-    el3d_bitarray = max_val > threshold_3d
-
-    print("maximum 3d badness:", np.max(max_val))
-
-    cf = ngs.BoundaryFromVolumeCF(cf)
-    intrule = ngs.IntegrationRule(ngs.ET.TRIG, intorder)
-    pnts = mesh.MapToAllElements(intrule, ngs.BND).flatten()
-    vals = cf(pnts)
-    n = len(intrule)
-    vals = vals.reshape((-1, n))
-    max_val = np.max(vals, axis=1)
-    el2d_bitarray = max_val > threshold_2d
-    el2d_bitarray = None
+def ShowBadElements(mesh: ngs.Mesh, el2d_bitarray, el3d_bitarray, max_badness):
+    """Report the result of ``find_bad_elements`` and show the bad elements
+    in a tab (if there are any)."""
+    print("maximum 3d badness:", max_badness)
 
     n3d = np.sum(el3d_bitarray) if el3d_bitarray is not None else 0
     print("Found", n3d, "bad 3D elements")
@@ -267,11 +308,13 @@ def DrawBadElements(mesh: ngs.Mesh, threshold_3d=100, threshold_2d=20, intorder=
 
     _appdata.add_tab(
         "Bad Elements",
-        MeshComponent,
-        mesh,
+        _component_class("mesh"),
+        {
+            "obj": mesh,
+            "el2d_bitarray": el2d_bitarray,
+            "el3d_bitarray": el3d_bitarray,
+        },
         _appdata,
-        el2d_bitarray=el2d_bitarray,
-        el3d_bitarray=el3d_bitarray,
     )
 
 
@@ -1,8 +1,95 @@
 from ngapp.components import *
 from ngsolve_webgpu import *
-from .webgpu_tab import WebgpuTab, _usersettings
+from ngsolve_webgpu.cf import FieldLines
+from .cancel import Cancelled, check_cancelled, job
+from .cf_profile import profile
+from .compiled import compare_evaluation, compiled
+from .ngs_timers import measured
+from .pick_values import Debounce, surface_value
+from .progress import report
+from .tracing import traced
+from .tiles import TiledMesh, TiledRenderer, use_tiles
+from .value_stats import NBINS, merge_histograms
+from .webgpu_tab import WebgpuTab, _VOLUME_ENTITIES, _usersettings
 import ngsolve as ngs
 import copy
+import time
+import weakref
+
+# seconds the cursor rests on a point before its value is evaluated exactly
+PICK_EXACT_DELAY = 0.4
+# start points of field lines traced per call
+FIELDLINES_BATCH = 256
+
+
+def _trace_field_lines(function, start_region, options, batch=FIELDLINES_BATCH):
+    """``ngsolve.webgui.FieldLines`` (``pstart``, ``pend`` and ``value`` of
+    the segments), with the lines traced in batches of start points;
+    cancellation is checked and progress reported between the batches."""
+    import numpy as np
+
+    mesh = start_region.mesh
+    ets = ("TRIG", "QUAD", "TET", "HEX", "PRISM", "PYRAMID", "SEGM")
+    rules = {getattr(ngs.ET, et): ngs.IntegrationRule(getattr(ngs.ET, et), 5) for et in ets}
+    num_lines = options["num_lines"]
+    angles = [0.0]
+    if function.is_complex:
+        num_lines = num_lines // 10
+        angles = [2 * np.pi * a / 100 for a in range(100)]
+    mapped = mesh.MapToAllElements(rules, start_region)
+    starts = []
+    for phi in angles:
+        cf = function
+        if function.is_complex:
+            cf = ngs.cos(phi) * function.real - ngs.sin(phi) * function.imag
+        # as upstream: higher values make a start point more likely
+        values = ngs.Norm(cf)(mapped).flatten()
+        selection = np.where(values > values.sum() / num_lines * np.random.rand(len(values)))
+        starts.append((cf, ngs.CF((ngs.x, ngs.y, ngs.z))(mapped[selection])))
+    total = max(1, sum(len(points) for _, points in starts))
+    data = {"pstart": [], "pend": [], "value": []}
+    done = 0
+    for cf, points in starts:
+        for start in range(0, len(points), batch):
+            check_cancelled()
+            report(fraction=done / total)
+            part = points[start : start + batch]
+            traced = cf._BuildFieldLines(
+                mesh,
+                part,
+                len(part),
+                options["length"],
+                options["max_points_per_line"],
+                options["thickness"],
+                options["tolerance"],
+                options["direction"],
+                False,
+            )
+            for key in data:
+                data[key] += traced[key]
+            done += len(part)
+    return data
+
+
+class _FieldLines(FieldLines):
+    """Field lines traced in batches, see :func:`_trace_field_lines`."""
+
+    def update(self, options):
+        if not self.needs_update:
+            return
+        import numpy as np
+        from webgpu.shapes import ShapeRenderer, generate_cylinder
+
+        if self.seed is not None:
+            np.random.seed(self.seed)
+        data = _trace_field_lines(self.cf, self.start_region, self.fieldline_options)
+        bbox = self.mesh.ngmesh.bounding_box
+        thickness = (bbox[1] - bbox[0]).Norm() * self.fieldline_options["thickness"]
+        self.shape_data = generate_cylinder(8, thickness, 1.0, top_face=False, bottom_face=False)
+        self.positions = data["pstart"]
+        self.directions = np.asarray(data["pend"]) - np.asarray(data["pstart"])
+        self.values = data["value"]
+        ShapeRenderer.update(self, options)
 
 
 class FunctionComponent(WebgpuTab):
@@ -28,6 +115,16 @@ class FunctionComponent(WebgpuTab):
         self.deformation = data.get("deformation", None)
         self.contact = data.get("contact", None)
         self.contact_pairs = None
+        # large meshes are split into tiles that are loaded on demand
+        self.tiled = data.get("tiled", None)
+        self.tiles = None
+        # the clipping renderers need the volume elements, they are created
+        # when clipping is first enabled
+        self._clipping_deferred = False
+        # set when the function was replaced, see set_function
+        self._draw_needed = False
+        # the function that is evaluated, self.cf or its compiled version
+        self._eval_cf = cf
 
         # -- Resolve initial values from data args + saved settings ---------
         tab = app_data.get_tab(name)
@@ -102,6 +199,26 @@ class FunctionComponent(WebgpuTab):
         self.colormap_discrete = Observable(cm[1], "colormap_discrete")
         self.colormap_min = Observable(cm[2], "colormap_min", converter=float)
         self.colormap_max = Observable(cm[3], "colormap_max", converter=float)
+        self.colormap_robust = Observable(
+            s.get("colormap_robust", False), "colormap_robust"
+        )
+        # line probe: segment and number of sample points
+        self.probe_start = Observable(s.get("probe_start", None), "probe_start")
+        self.probe_end = Observable(s.get("probe_end", None), "probe_end")
+        self.probe_samples = Observable(
+            s.get("probe_samples", 1000), "probe_samples", converter=int
+        )
+        self._hover_pos = None
+        # hover values come from the drawn data, the exact value follows
+        # when the cursor stops (or on click)
+        self.pick_exact = Observable(s.get("pick_exact", True), "pick_exact")
+        # counts uploads of new function values (the histogram follows them)
+        self.values_version = Observable(0, "values_version")
+        self._upload_cb = _upload_callback(self)
+        self._last_pick = None
+        self._exact_debounce = Debounce(self._show_exact, PICK_EXACT_DELAY, name="PickExact")
+        self.monitor = None
+        self._monitor_tab = None
         self.colormap_name = Observable(
             s.get("colormap_name", "matlab:jet"), "colormap_name"
         )
@@ -123,6 +240,18 @@ class FunctionComponent(WebgpuTab):
         self.fieldlines_direction = Observable(
             s.get("fieldlines_direction", 0), "fieldlines_direction", converter=int
         )
+        self.adaptive_order = Observable(
+            data.get("adaptive_order", s.get("adaptive_order", False)), "adaptive_order"
+        )
+        # "off", "compile" or "realcompile", see ngsolve_gui.compiled
+        compile_mode = data.get("compile", s.get("compile_mode", "off"))
+        self.compile_mode = Observable(
+            {True: "compile", False: "off"}.get(compile_mode, compile_mode), "compile_mode"
+        )
+        # 0: as many function values as drawing all elements with self.order
+        self.vertex_budget = Observable(
+            data.get("vertex_budget", s.get("vertex_budget", 0)), "vertex_budget", converter=int
+        )
 
         if self.cf.is_complex:
             self.complex_mode = Observable(
@@ -164,8 +293,12 @@ class FunctionComponent(WebgpuTab):
         self.deformation_scale2.on_change(self._apply_deformation_scale)
         self.contact_enabled.on_change(self._apply_contact)
         self.colormap_autoscale.on_change(self._apply_autoscale)
+        self.colormap_robust.on_change(self._apply_robust)
         self.colormap_discrete.on_change(self._apply_discrete)
         self.colormap_name.on_change(self._apply_colormap_name)
+        self.adaptive_order.on_change(self._apply_adaptive_order)
+        self.vertex_budget.on_change(self._apply_adaptive_order)
+        self.compile_mode.on_change(self._apply_compile_mode)
         if self.cf.is_complex:
             self.complex_mode.on_change(self._apply_complex_mode)
             self.complex_animate.on_change(self._apply_complex_animate)
@@ -174,6 +307,10 @@ class FunctionComponent(WebgpuTab):
             obs = getattr(self, f"{entity}_numbers_visible")
             obs.on_change(lambda val, _old, e=entity: self._apply_entity_numbers(e, val))
         self.numbers_one_based.on_change(self._apply_numbers_one_based)
+        self._clipping_cb = _clipping_callback(self)
+        self.clipping.callbacks.append(self._clipping_cb)
+        # clipping given in the tab data is set after the first draw
+        self._on_clipping_changed()
 
     # -- GPU side-effect handlers -------------------------------------------
 
@@ -182,10 +319,21 @@ class FunctionComponent(WebgpuTab):
         self.wgpu.scene.render()
 
     def _apply_elements2d(self, val, _old):
-        if self.elements2d is not None:
-            self.elements2d.active = val
+        for r in self._surface_renderers:
+            r.active = val
         self.wgpu.scene.render()
 
+    def _apply_adaptive_order(self, _val, _old):
+        self.draw()
+
+    def _apply_compile_mode(self, _val, _old):
+        if self._eval_cf is not self.cf:
+            self.app_data.drop_function_data(self._eval_cf)
+        if self.tiles is not None:
+            self.tiles.reset(keep_data=False)
+        self._adaptive_cache = None
+        self.draw()
+
     def _apply_clipping_vectors(self, val, _old):
         if self.clipping_vectors is not None:
             self.clipping_vectors.active = val
@@ -201,6 +349,56 @@ class FunctionComponent(WebgpuTab):
             self.fieldlines.active = val
         self.wgpu.scene.render()
 
+    @traced("clipping")
+    def _on_clipping_changed(self):
+        if not self._clipping_deferred or self.clipping.mode == self.clipping.Mode.DISABLED:
+            return
+        if self.app_data.active_tab == self.name:
+            self.draw()
+        else:
+            self._redraw_needed = True
+
+    @traced("redraw")
+    @measured("redraw")
+    def redraw(self):
+        # the high order elements are selected once per redraw, the draw
+        # reuses the selection
+        adaptive = self._adaptive_state()
+        if self._adaptive_split_changed(adaptive):
+            self._adaptive_cache = None
+            self._draw_needed = True
+        if self._draw_needed or (
+            self._clipping_deferred and self.clipping.mode != self.clipping.Mode.DISABLED
+        ):
+            self._redraw_needed = False
+            self.draw(adaptive)
+        else:
+            super().redraw()
+
+    def set_function(self, cf, mesh=None):
+        """Show *cf* instead of the current function, with the same settings
+        (e.g. a new copy sent by a solver process, see
+        :mod:`ngsolve_gui.remote`). The tab is drawn again on its next
+        redraw; *mesh* replaces the mesh as well."""
+        self.app_data.drop_function_data(self.cf)
+        self.app_data.drop_function_data(self._eval_cf)
+        self.cf = cf
+        self._eval_cf = compiled(cf, self.compile_mode.value)
+        self.data["obj"] = cf
+        if mesh is not None:
+            self.region_or_mesh = mesh
+            self.data["mesh"] = mesh
+            self.mesh = mesh.mesh if isinstance(mesh, ngs.Region) else mesh
+            if self.tiles is not None:
+                self.tiles.detach()
+                self.tiles = None
+        elif self.tiles is not None:
+            self.tiles.reset(keep_data=False)
+        self._adaptive_cache = None
+        self._draw_needed = True
+        if self.monitor is not None:
+            self.monitor.set_function(cf, self.mesh)
+
     def _apply_clipping_function(self, val, _old):
         if self.clippingcf is not None:
             self.clippingcf.active = val
@@ -227,15 +425,24 @@ class FunctionComponent(WebgpuTab):
             r.set_needs_update()
         self.wgpu.scene.render()
 
+    def _set_deformation_scale(self, scale):
+        self.mdata.deformation_scale = scale
+        if self.tiles is not None:
+            self.tiles.deformation_scale = scale
+            return
+        for r in self._surface_renderers:
+            if r.data.mesh_data is not self.mdata:
+                r.data.mesh_data.deformation_scale = scale
+
     def _apply_deformation_toggle(self, val, _old):
         if self.mdata is None:
             return
         if val:
-            self.mdata.deformation_scale = (
+            self._set_deformation_scale(
                 self.deformation_scale.value * self.deformation_scale2.value
             )
         else:
-            self.mdata.deformation_scale = 0.0
+            self._set_deformation_scale(0.0)
         if self.clippingcf is not None:
             self.clippingcf.set_needs_update()
         self.wgpu.scene.render()
@@ -244,34 +451,114 @@ class FunctionComponent(WebgpuTab):
         if self.mdata is None:
             return
         if self.deformation_enabled.value:
-            self.mdata.deformation_scale = (
+            self._set_deformation_scale(
                 self.deformation_scale.value * self.deformation_scale2.value
             )
             if self.clippingcf is not None:
                 self.clippingcf.set_needs_update()
             self.wgpu.scene.render()
 
+    def _timed_data(self):
+        func_data = getattr(self, "func_data", None)
+        if func_data is None:
+            return {}
+        return {"mesh": func_data.mesh_data, "function": func_data}
+
     def _format_pick_result(self, result):
-        """Show element, region, position, and solution value."""
+        """Show element, region, position, and solution value.
+
+        The value is read from the drawn data if possible (``val≈``),
+        evaluated exactly after :data:`PICK_EXACT_DELAY` or on click."""
+        self._hover_pos = [float(p) for p in result.world_pos]
+        self._last_pick = result
+        try:
+            val = self._buffer_value(result)
+        except Exception:
+            val = None
+        if val is None:
+            self._cancel_exact()
+            return self._pick_text(result, result.evaluate(self.cf, self.mesh), exact=True)
+        self._schedule_exact(result)
+        return self._pick_text(result, val, exact=False)
+
+    def _pick_text(self, result, val, exact):
         pos = result.world_pos
-        val = result.evaluate(self.cf, self.mesh)
         label = f"{result.kind_label} El {result.element_nr}"
         region = result.region_name or ""
         coords = f"({pos[0]:>9.4f}, {pos[1]:>9.4f}, {pos[2]:>9.4f})"
         text = f"{label:<14s} {region:<12s} {coords}"
         if val is not None:
+            eq = "=" if exact else "≈"
             if val.size == 1:
-                text += f"  val={float(val):>12.6f}"
+                text += f"  val{eq}{val.flat[0]:>12.6f}"
             else:
-                text += f"  val=[{', '.join(f'{v:>9.4f}' for v in val.flat)}]"
+                text += f"  val{eq}[{', '.join(f'{v:>9.4f}' for v in val.flat)}]"
         return text
 
+    def _buffer_value(self, result):
+        """Value at a surface pick from the drawn data, ``None`` where the
+        drawn data does not give it (tiles, deformation, quads)."""
+        if result.kind != "surface" or self.tiles is not None:
+            return None
+        if self.deformation is not None and self.deformation_enabled.value:
+            return None
+        for r in self._surface_renderers:
+            if any(o._id == result.event.obj_id for o in r.all_renderer()):
+                return surface_value(r.data, result.element_nr, result.world_pos)
+        return None
+
+    def release(self):
+        super().release()
+        self._cancel_exact()
+        if self._clipping_cb in self.clipping.callbacks:
+            self.clipping.callbacks.remove(self._clipping_cb)
+
+    def _cancel_exact(self):
+        self._exact_debounce.cancel()
+
+    def _schedule_exact(self, result):
+        if self.pick_exact.value:
+            self._exact_debounce.schedule(result)
+        else:
+            self._cancel_exact()
+
+    def _show_exact(self, result):
+        if result is not self._last_pick:
+            return
+        try:
+            val = result.evaluate(self.cf, self.mesh)
+            if result is self._last_pick:
+                self.pick_overlay.show_text(self._pick_text(result, val, exact=True))
+        except Exception:
+            pass
+
+    def _on_pick_click(self, ev):
+        if ev.get("button", 0) == 0 and self._last_pick is not None:
+            self._cancel_exact()
+            self._show_exact(self._last_pick)
+
+    def _on_pick_out(self, ev):
+        self._cancel_exact()
+        self._last_pick = None
+        super()._on_pick_out(ev)
+
+    def _on_pick_background(self, ev):
+        self._cancel_exact()
+        self._last_pick = None
+        super()._on_pick_background(ev)
+
     def _apply_contact(self, val, _old):
         if self.contact_pairs is not None:
             self.contact_pairs.active = val
         self.wgpu.scene.render()
 
     def _apply_entity_numbers(self, entity, val):
+        if entity not in self._entity_number_renderers:
+            if not val:
+                return
+            self.draw()
+            if entity not in self._entity_number_renderers:
+                return
         self._entity_number_renderers[entity].active = val
         self.wgpu.scene.render()
 
@@ -295,11 +582,14 @@ class FunctionComponent(WebgpuTab):
             show.append(("s", self.toggle_surface_solution, "Toggle surface"))
         if self.surface_vectors is not None:
             show.append(("v", self.toggle_surface_vectors, "Toggle surface vectors"))
-        if self.clipping_vectors is not None:
+        has_clipping_vectors = (
+            self._has_clipping_function and self.cf.dim == 3 and self.tiles is None
+        )
+        if has_clipping_vectors:
             show.append(("c", self.toggle_clipping_vectors, "Toggle clipping vectors"))
         if self.fieldlines is not None:
             show.append(("f", self.toggle_fieldlines, "Toggle field lines"))
-        if self.surface_vectors is not None or self.clipping_vectors is not None:
+        if self.surface_vectors is not None or has_clipping_vectors:
             show.append(("+", self.increase_vector_density, "Increase vector density"))
             show.append(("-", self.decrease_vector_density, "Decrease vector density"))
         show += self._gizmo_show_bindings()
@@ -308,7 +598,7 @@ class FunctionComponent(WebgpuTab):
         # c → Clipping (3D only)
         if self.mesh.dim == 3:
             clip = list(self._clipping_mode_bindings())
-            if self.clippingcf is not None:
+            if self._has_clipping_function:
                 clip.append(
                     ("f", self.toggle_clipping_function, "Toggle clipping function")
                 )
@@ -358,6 +648,19 @@ class FunctionComponent(WebgpuTab):
                 )
             )
 
+        kb["modes"].append(
+            (
+                "l",
+                "Probe",
+                [
+                    ("1", self.set_probe_start, "Line start at hovered point"),
+                    ("2", self.set_probe_end, "Line end at hovered point"),
+                    ("p", self.plot_line_probe, "Plot values along line"),
+                    ("m", self.monitor_point, "Monitor hovered point"),
+                ],
+            )
+        )
+
         num_bindings = [
             ("v", lambda: self._toggle_numbers("vertices"), "Vertex numbers"),
             ("e", lambda: self._toggle_numbers("edges"), "Edge numbers"),
@@ -370,6 +673,65 @@ class FunctionComponent(WebgpuTab):
 
         return kb
 
+    # -- Line probe ---------------------------------------------------------
+
+    def set_probe_start(self, point=None):
+        """Set the start of the line probe, by default to the hovered point."""
+        point = point if point is not None else self._hover_pos
+        if point is not None:
+            self.probe_start.value = list(point)
+
+    def set_probe_end(self, point=None):
+        """Set the end of the line probe, by default to the hovered point."""
+        point = point if point is not None else self._hover_pos
+        if point is not None:
+            self.probe_end.value = list(point)
+
+    def plot_line_probe(self):
+        """Open a plot tab with the function values along the probe line
+        (default: the diagonal of the bounding box)."""
+        from .plot import PlotComponent
+        from .probe import LineProbe
+
+        pmin, pmax = self.scene.bounding_box
+        start = self.probe_start.value
+        end = self.probe_end.value
+        probe = LineProbe(
+            self.cf,
+            self.mesh,
+            start if start is not None else pmin,
+            end if end is not None else pmax,
+            num_points=self.probe_samples.value,
+            name=self.title,
+        )
+        return self.app_data.add_tab(
+            f"Line {self.title}", PlotComponent, {"obj": probe}, self.app_data
+        )
+
+    def monitor_point(self, point=None):
+        """Pin a point (by default the hovered one) whose value is recorded
+        on every Redraw and plotted over the steps in a monitor tab."""
+        from .plot import PlotComponent
+        from .probe import PointMonitor
+
+        point = point if point is not None else self._hover_pos
+        if point is None:
+            return None
+        if self.monitor is not None and self.app_data.get_tab(self._monitor_tab) is not None:
+            self.monitor.add_point(point)
+            return self.monitor
+        self.monitor = PointMonitor(self.cf, self.mesh, [point], name=self.title)
+        self.monitor.record()
+        tab = self.app_data.add_tab(
+            f"Monitor {self.title}",
+            PlotComponent,
+            {"obj": self.monitor, "monitor": self.name},
+            self.app_data,
+        )
+        self._monitor_tab = tab.name
+        self.app_data.on_redraw(tab.name, self.monitor.record)
+        return self.monitor
+
     # -- Toggle methods (now one-liners) ------------------------------------
 
     def toggle_wireframe(self):
@@ -433,6 +795,95 @@ class FunctionComponent(WebgpuTab):
         else:
             self.wgpu.scene.render()
 
+    def _apply_robust(self, val, _old):
+        self._set_robust_range(val)
+        if not self.colormap.autoscale:
+            return
+        # the range is taken from the statistics of the uploaded values,
+        # the function is not evaluated again
+        timestamp = time.time()
+        for r in self._colormap_renderers():
+            if r.data.data_2d is not None:
+                component = r.gpu_objects.settings.component
+                self.colormap.widen_range(
+                    r.data.minval[component + 1],
+                    r.data.maxval[component + 1],
+                    timestamp=timestamp,
+                )
+        self.colorbar.set_needs_update()
+        self.wgpu.scene.render()
+        self.colormap_min.value = float(self.colormap.minval)
+        self.colormap_max.value = float(self.colormap.maxval)
+
+    def _colormap_renderers(self):
+        """Renderers that autoscale the colormap to their values."""
+        renderers = []
+        for r in [self.elements2d, self.elements2d_low, self.clippingcf]:
+            if isinstance(r, TiledRenderer):
+                renderers += r.renderers
+            elif r is not None:
+                renderers.append(r)
+        return renderers
+
+    def value_histogram(self, nbins=NBINS):
+        """Histogram of the values of the color component over all drawn
+        function data, from the statistics of their last build."""
+        renderers = self._colormap_renderers()
+        if not renderers:
+            return None
+        index = renderers[0].gpu_objects.settings.component + 1
+        stats = [
+            r.data.statistics[index]
+            for r in renderers
+            if getattr(r.data, "statistics", None) is not None
+        ]
+        return merge_histograms(stats, nbins)
+
+    def profile_expression(self):
+        """Evaluation cost of the subexpressions of the function, see
+        :func:`ngsolve_gui.cf_profile.profile`."""
+        with job(f"Profiling {self.title}"):
+            return profile(self.cf, self.mesh)
+
+    def compare_compilation(self):
+        """Seconds to evaluate the function on the mesh of the tab,
+        interpreted and compiled with the selected mode (``"compile"`` if
+        it is off), see :func:`ngsolve_gui.compiled.compare_evaluation`."""
+        mode = self.compile_mode.value if self.compile_mode.value != "off" else "compile"
+        with job(f"Timing evaluation of {self.title}"):
+            times = compare_evaluation(self.cf, self.region_or_mesh, self.order, mode)
+        print(
+            f"Evaluating {self.title} on {self.mesh.ne} elements: "
+            f"{1e3 * times['interpreted']:.1f} ms interpreted, "
+            f"{1e3 * times['compiled']:.1f} ms compiled ({mode}, "
+            f"compilation {1e3 * times['compile_time']:.1f} ms)"
+        )
+        return times
+
+    def set_colormap_range(self, minval, maxval):
+        """Set the colormap range (turns off autoscale), nothing is
+        evaluated again."""
+        with observable_batch():
+            self.colormap_autoscale.value = False
+            self.colormap_min.value = minval
+            self.colormap_max.value = maxval
+        self.colormap.set_min_max(minval, maxval)
+        self.wgpu.scene.render()
+
+    def _set_robust_range(self, val):
+        for r in [self.elements2d, self.elements2d_low, self.clippingcf]:
+            if isinstance(r, TiledRenderer):
+                r.apply(lambda tr: setattr(tr.data, "robust_range", val), key="robust_range")
+            elif r is not None:
+                r.data.robust_range = val
+
+    def _watch_uploads(self):
+        for r in [self.elements2d, self.elements2d_low, self.clippingcf]:
+            if isinstance(r, TiledRenderer):
+                r.apply(lambda tr: tr.data.on_upload(self._upload_cb), key="on_upload")
+            elif r is not None:
+                r.data.on_upload(self._upload_cb)
+
     def _apply_discrete(self, val, _old):
         self.colormap.set_discrete(val)
         self.wgpu.scene.render()
@@ -442,9 +893,17 @@ class FunctionComponent(WebgpuTab):
         self.redraw()
         self.wgpu.scene.render()
 
+    @property
+    def _has_clipping_function(self):
+        return self.mesh.dim == 3 and self.draw_vol
+
+    @property
+    def _surface_renderers(self):
+        return [r for r in [self.elements2d, self.elements2d_low] if r is not None]
+
     @property
     def _complex_renderers(self):
-        return [r for r in [self.elements2d, self.clippingcf, self.clipping_vectors, self.surface_vectors] if r is not None]
+        return self._surface_renderers + [r for r in [self.clippingcf, self.clipping_vectors, self.surface_vectors] if r is not None]
 
     @property
     def _vector_renderers(self):
@@ -493,9 +952,107 @@ class FunctionComponent(WebgpuTab):
     def cycle_colormap_prev(self):
         self._cycle_colormap(-1)
 
-    def draw(self):
+    def _adaptive_mask(self, mdata):
+        """``(key, mask)`` of the surface elements drawn at high order, the
+        mask ``None`` if the split does not apply."""
+        from .adaptive_order import element_variation, num_values, select_high_order
+
+        high_order = self.order
+        if isinstance(self.cf, ngs.GridFunction):
+            high_order = max(self.order, min(4, self.cf.space.globalorder))
+        low_order = 1
+        key = (low_order, high_order, self.vertex_budget.value)
+        variation = element_variation(self._eval_cf, self.mesh)
+        if variation is None or high_order <= low_order:
+            return key, None
+        quads = mdata.num_elements.get("quads", 0) > 0
+        budget = self.vertex_budget.value or len(variation) * num_values(self.order, quads)
+        mask = select_high_order(variation, low_order, high_order, budget, quads=quads)
+        return key, mask if mask.any() else None
+
+    def _adaptive_split(self, mdata, adaptive=None):
+        """FunctionData for the high and low order surface elements, or ``None``
+        if the split does not apply (mixed trig/quad surfaces, nothing to
+        upgrade). Kept across redraws while the selected elements stay the
+        same, see :meth:`_adaptive_split_changed`. *adaptive* is the
+        ``(key, mask)`` of :meth:`_adaptive_mask` if it was just evaluated."""
+        from .timed_data import TimedFunctionData, TimedMeshData
+
+        cached = getattr(self, "_adaptive_cache", None)
+        key, mask = adaptive if adaptive is not None else self._adaptive_mask(mdata)
+        if cached is not None and cached[0] == key and _same_mask(cached[1], mask):
+            return cached[2]
+        split = None
+        if mask is not None:
+            _, high_order, _ = key
+            split = tuple(
+                TimedFunctionData(
+                    TimedMeshData(self.region_or_mesh, el2d_bitarray=m), self._eval_cf, order=o
+                )
+                for m, o in ((mask, high_order), (~mask, key[0]))
+            )
+            for d in split:
+                d.mesh_data.subdivision = mdata.subdivision
+                if self.deformation is not None:
+                    # deformation values are stored per element of the subset
+                    d.mesh_data.deformation_data = TimedFunctionData(
+                        d.mesh_data, self.deformation, order=1
+                    )
+        self._adaptive_cache = (key, mask, split)
+        return split
+
+    def _adaptive_state(self):
+        """``(key, mask)`` of :meth:`_adaptive_mask` for the current values
+        of the function, ``None`` if no adaptive split was drawn."""
+        cached = getattr(self, "_adaptive_cache", None)
+        if cached is None or not self.adaptive_order.value or self.tiles is not None:
+            return None
+        return self._adaptive_mask(self.func_data.mesh_data)
+
+    def _adaptive_split_changed(self, adaptive):
+        """Whether the elements to draw at high order, *adaptive* from
+        :meth:`_adaptive_state`, changed with the values of the function
+        (e.g. a function drawn before the solve)."""
+        cached = getattr(self, "_adaptive_cache", None)
+        if adaptive is None or cached is None:
+            return False
+        key, mask = adaptive
+        return key != cached[0] or not _same_mask(cached[1], mask)
+
+    def _setup_tiles(self):
+        """Split the mesh into tiles (kept across draws) if it is drawn tiled."""
+        if self.tiles is not None:
+            self.tiles.reset()
+        # complex functions animate their renderers, not supported per tile
+        elif use_tiles(self.region_or_mesh, self.tiled) and not self.cf.is_complex:
+            self.tiles = TiledMesh(self.region_or_mesh, deformation=self.deformation)
+        if self.tiles is not None and self.deformation is not None:
+            self.tiles.deformation_scale = (
+                self.deformation_scale.value * self.deformation_scale2.value
+                if self.deformation_enabled.value
+                else 0.0
+            )
+
+    @traced("draw")
+    @measured("draw")
+    def draw(self, adaptive=None):
+        """Draw the function as a cancellable job; a cancelled draw is
+        done again on the next redraw. *adaptive* is passed on to
+        :meth:`_adaptive_split`."""
+        self._draw_needed = False
+        try:
+            with job(f"Drawing {self.title}"):
+                self._draw(adaptive)
+        except Cancelled:
+            self._draw_needed = True
+            print(f"Drawing {self.title} cancelled")
+
+    def _draw(self, adaptive=None):
+        if self.compile_mode.value != "off":
+            report(f"Compiling {self.title}")
+        cf = self._eval_cf = compiled(self.cf, self.compile_mode.value)
         func_data = self.app_data.get_function_gpu_data(
-            self.cf, self.region_or_mesh, order=self.order
+            cf, self.region_or_mesh, order=self.order
         )
         mdata = func_data.mesh_data
 
@@ -513,7 +1070,13 @@ class FunctionComponent(WebgpuTab):
             if not self.deformation_enabled.value:
                 mdata.deformation_scale = 0.0
             func_data.mesh_data = mdata
-        self.wireframe = MeshWireframe2d(mdata, clipping=self.clipping)
+        self._setup_tiles()
+        if self.tiles is not None:
+            self.wireframe = self.tiles.renderer(
+                lambda tile: MeshWireframe2d(tile.mesh_data(), clipping=self.clipping)
+            )
+        else:
+            self.wireframe = MeshWireframe2d(mdata, clipping=self.clipping)
         self.wireframe.active = self.wireframe_visible.value
 
         autoscale = self.colormap_autoscale.value
@@ -524,10 +1087,11 @@ class FunctionComponent(WebgpuTab):
         self.colormap.autoscale = autoscale
         self.colormap.discrete = discrete
         self.clipping_vectors = None
-        if self.cf.dim == self.mesh.dim:
-            vec3 = self.cf
+        # vectors and entity numbers are drawn on the whole mesh, not tiled
+        if self.cf.dim == self.mesh.dim and self.tiles is None:
+            vec3 = cf
             if self.cf.dim == 2:
-                vec3 = ngs.CF((self.cf[0], self.cf[1], 0))
+                vec3 = ngs.CF((cf[0], cf[1], 0))
             vec_data = self.app_data.get_function_gpu_data(
                 vec3, self.region_or_mesh, order=self.order
             )
@@ -544,10 +1108,8 @@ class FunctionComponent(WebgpuTab):
             self.surface_vectors = None
         self.fieldlines = None
         if self.cf.dim == self.mesh.dim:
-            from ngsolve_webgpu.cf import FieldLines
-
-            vec3 = self.cf if self.cf.dim == 3 else ngs.CF((self.cf[0], self.cf[1], 0))
-            self.fieldlines = FieldLines(
+            vec3 = cf if self.cf.dim == 3 else ngs.CF((cf[0], cf[1], 0))
+            self.fieldlines = _FieldLines(
                 vec3,
                 self.region_or_mesh,
                 num_lines=self.fieldlines_num_lines.value,
@@ -558,10 +1120,26 @@ class FunctionComponent(WebgpuTab):
                 clipping=self.clipping,
             )
             self.fieldlines.active = self.field_lines_visible.value
-        if self.mesh.dim == 3 and self.draw_vol:
-            self.clippingcf = ClippingCF(func_data, self.clipping, self.colormap)
+        # Only the surface elements are drawn until clipping is enabled, the
+        # (much larger) volume data is built for the clipping renderers only
+        self._clipping_deferred = (
+            self._has_clipping_function
+            and self.tiles is None
+            and self.clipping.mode == self.clipping.Mode.DISABLED
+        )
+        if self._has_clipping_function and not self._clipping_deferred:
+            if self.tiles is not None:
+                self.clippingcf = self.tiles.renderer(
+                    lambda tile: ClippingCF(
+                        tile.function_data(cf, self.order), self.clipping, self.colormap
+                    ),
+                    volume=True,
+                    on_plane=True,
+                )
+            else:
+                self.clippingcf = ClippingCF(func_data, self.clipping, self.colormap)
             self.clippingcf.active = self.clipping_visible.value
-            if self.cf.dim == 3:
+            if self.cf.dim == 3 and self.tiles is None:
                 self.clipping_vectors = ClippingVectors(
                     func_data,
                     clipping=self.clipping,
@@ -573,13 +1151,37 @@ class FunctionComponent(WebgpuTab):
                 self.clipping_vectors.active = self.clipping_vectors_visible.value
         else:
             self.clippingcf = None
+        self.elements2d_low = None
         if self.draw_surf:
-            self.elements2d = CFRenderer(
-                func_data, clipping=self.clipping, colormap=self.colormap
-            )
-            self.elements2d.active = self.elements2d_visible.value
+            split = None
+            if self.adaptive_order.value and self.tiles is None:
+                split = self._adaptive_split(mdata, adaptive)
+            if self.tiles is not None:
+                self.elements2d = self.tiles.renderer(
+                    lambda tile: CFRenderer(
+                        tile.function_data(cf, self.order),
+                        clipping=self.clipping,
+                        colormap=self.colormap,
+                    )
+                )
+            elif split is not None:
+                # strongly varying elements in elements2d, the rest in elements2d_low
+                high, low = split
+                self.elements2d = CFRenderer(high, clipping=self.clipping, colormap=self.colormap)
+                self.elements2d_low = CFRenderer(low, clipping=self.clipping, colormap=self.colormap)
+                if self.mdata is not None:
+                    for d in split:
+                        d.mesh_data.deformation_scale = self.mdata.deformation_scale
+            else:
+                self.elements2d = CFRenderer(
+                    func_data, clipping=self.clipping, colormap=self.colormap
+                )
+            for r in self._surface_renderers:
+                r.active = self.elements2d_visible.value
         else:
             self.elements2d = None
+        self._set_robust_range(self.colormap_robust.value)
+        self._watch_uploads()
         if self.cf.is_complex:
             for r in self._complex_renderers:
                 r._scene = self.scene
@@ -614,6 +1216,7 @@ class FunctionComponent(WebgpuTab):
             for obj in [
                 self.clippingcf,
                 self.elements2d,
+                self.elements2d_low,
                 self.wireframe,
                 self.colorbar,
                 self.contact_pairs,
@@ -626,18 +1229,27 @@ class FunctionComponent(WebgpuTab):
             if obj is not None
         ]
         self._entity_number_renderers = {}
-        for entity in self.entity_number_entities:
+        for entity in self.entity_number_entities if self.tiles is None else ():
+            visible = getattr(self, f"{entity}_numbers_visible").value
+            if entity in _VOLUME_ENTITIES and not visible:
+                # created when first shown, they need the volume elements
+                continue
             r = EntityNumbers(mdata, entity=entity, clipping=self.clipping, zero_based=not self.numbers_one_based.value)
-            r.active = getattr(self, f"{entity}_numbers_visible").value
+            r.active = visible
             self._entity_number_renderers[entity] = r
         render_objects += list(self._entity_number_renderers.values())
-        self.wgpu.draw(render_objects, camera=self.camera)
+        self._draw_scene(render_objects, camera=self.camera)
+        if self.tiles is not None:
+            self.tiles.attach(self.scene, self.clipping)
 
         pickable = [(r, k) for r, k in [
             (self.elements2d, "surface"),
+            (self.elements2d_low, "surface"),
             (self.clippingcf, "clipping"),
         ] if r is not None]
         self.setup_picking(pickable, self.mesh)
+        self.scene.input_handler.unregister("click", self._on_pick_click)
+        self.scene.input_handler.on_click(self._on_pick_click)
 
         def set_min_max():
             self.colormap_min.value = float(self.colormap.minval)
@@ -648,29 +1260,31 @@ class FunctionComponent(WebgpuTab):
         self.func_data = func_data
 
 
-# Register with the component registry
-from .registry import register_component
-from .sections import (
-    ColorbarSection,
-    ClippingSection,
-    DeformationSection,
-    VectorSection,
-    FieldLinesSection,
-    FunctionOptionsSection,
-    EntityNumbersSection,
-)
-
-register_component(
-    "function",
-    icon="mdi-function-variant",
-    component_class=FunctionComponent,
-    sections=[
-        ColorbarSection,
-        ClippingSection,
-        DeformationSection,
-        VectorSection,
-        FieldLinesSection,
-        FunctionOptionsSection,
-        EntityNumbersSection,
-    ],
-)
+def _same_mask(a, b):
+    if a is None or b is None:
+        return a is b
+    return a.shape == b.shape and bool((a == b).all())
+
+
+def _clipping_callback(comp):
+    """Clipping callback that does not keep a closed tab alive."""
+    ref = weakref.ref(comp)
+
+    def callback():
+        comp = ref()
+        if comp is not None:
+            comp._on_clipping_changed()
+
+    return callback
+
+
+def _upload_callback(comp):
+    """Upload callback that does not keep a closed tab alive."""
+    ref = weakref.ref(comp)
+
+    def callback():
+        comp = ref()
+        if comp is not None:
+            comp.values_version.value += 1
+
+    return callback
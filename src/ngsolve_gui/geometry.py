@@ -6,6 +6,9 @@ from ngsolve_webgpu import *
 from ngsolve_webgpu.pick import GeoPickResult
 import ngsolve as ngs
 import netgen.occ as ngocc
+from .cancel import job, netgen_terminate
+from .progress import netgen_status
+from .tracing import span, traced
 from .webgpu_tab import WebgpuTab
 
 
@@ -101,16 +104,28 @@ class GeometryComponent(WebgpuTab):
         import netgen.meshing as ngm
 
         mesh = ngm.Mesh()
-        try:
-            geo.GenerateMesh(mesh=mesh, **self._meshing_options())
-            mesh.Curve(5)
-        except Exception as e:
-            self.quasar.dialog(
-                {
-                    "title": "Error generating mesh",
-                    "message": str(e),
-                }
-            )
+        options = self._meshing_options()
+        with (
+            span("meshing", tab=self.title, **options) as args,
+            job(f"Meshing {self.title}") as token,
+            netgen_terminate(token),
+            netgen_status(token),
+        ):
+            try:
+                geo.GenerateMesh(mesh=mesh, **options)
+                mesh.Curve(5)
+                args["elements"] = mesh.ne
+            except Exception as e:
+                if not token.cancelled:
+                    self.quasar.dialog(
+                        {
+                            "title": "Error generating mesh",
+                            "message": str(e),
+                        }
+                    )
+        if token.cancelled:
+            print("Meshing cancelled")
+            return
         mesh = ngs.Mesh(mesh)
         from .mesh import MeshComponent
 
@@ -293,10 +308,11 @@ class GeometryComponent(WebgpuTab):
         self._update_selection_panel()
         self.scene.render()
 
+    @traced("draw")
     def draw(self):
         self.geo_renderer = GeometryRenderer(self.geo, clipping=self.clipping)
         self.geo_renderer.edges.active = self.show_edges.value
-        scene = self.wgpu.draw([self.geo_renderer, self.coordinate_axes, self.navigation_cube], camera=self.app_data.camera)
+        scene = self._draw_scene([self.geo_renderer, self.coordinate_axes, self.navigation_cube], camera=self.app_data.camera)
         self.clipping.center = 0.5 * (scene.bounding_box[1] + scene.bounding_box[0])
 
         # Hover picking: overlay + highlight on mousemove
@@ -484,15 +500,3 @@ class GeometryComponent(WebgpuTab):
         if hasattr(self.scene, '_select_buffer_valid'):
             self.scene._select_buffer_valid = False
         self.scene.render()
-
-
-# Register with the component registry
-from .registry import register_component
-from .sections import GeometryOptionsSection, GeometrySelectionSection, ClippingSection
-
-register_component(
-    "geometry",
-    icon="mdi-cube",
-    component_class=GeometryComponent,
-    sections=[GeometryOptionsSection, GeometrySelectionSection, ClippingSection],
-)
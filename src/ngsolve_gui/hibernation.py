@@ -0,0 +1,155 @@
+"""Hibernation of inactive tabs.
+
+Every open tab keeps its renderers and the GPU data they draw (with their
+CPU mirrors in ``AppData._gpu_cache``) while another tab is shown. A tab
+that was not shown for ``idle_minutes`` (user setting
+``hibernate_minutes``, 0 never hibernates) hibernates, and so do the
+inactive tabs, least recently shown first, while the memory use of the
+system is above ``memory_percent``: the component is dropped with the GPU
+data only it used (``AppData.hibernate_tab``), its data and settings stay
+in the tab. ``AppData.tabs_lock`` keeps the GUI from taking a component
+while it is dropped.
+
+The scene of a tab is released when the tab is left, so its thumbnail is
+taken before, while it is shown: once per activation, by the background
+thread, not on the tab switch. When a hibernated tab is shown again,
+``Panel`` shows the thumbnail and builds the component in the background.
+"""
+
+import base64
+import gc
+import os
+import tempfile
+import threading
+import time
+
+IDLE_MINUTES = 10
+MEMORY_PERCENT = 85
+CHECK_INTERVAL = 30.0
+THUMBNAIL_WIDTH = 320
+
+
+def hibernation_order(left, now, idle_time, pressure=False):
+    """Names in *left* (tab name -> time it was left) to hibernate, least
+    recently shown first: the ones left more than *idle_time* seconds
+    before *now* (none for *idle_time* 0), all under memory *pressure*."""
+    order = sorted(left, key=left.get)
+    if pressure:
+        return order
+    if not idle_time:
+        return []
+    return [name for name in order if now - left[name] > idle_time]
+
+
+def thumbnail(comp, width=THUMBNAIL_WIDTH):
+    """Data URL of a small PNG of the scene of *comp*, ``None`` if it is not
+    drawn."""
+    scene = comp.scene
+    canvas = scene.canvas
+    if canvas is None or not canvas.width or not canvas.height:
+        return None
+    height = max(1, round(canvas.height * width / canvas.width))
+    fd, path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        scene.save_screenshot(path, width=width, height=height)
+        with open(path, "rb") as f:
+            return "data:image/png;base64," + base64.b64encode(f.read()).decode()
+    finally:
+        os.remove(path)
+
+
+def _memory_percent():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.virtual_memory().percent
+
+
+class Hibernation:
+    """Hibernates the tabs of *app_data* from a background thread, see the
+    module docstring. ``Panel`` reports the tabs it leaves and shows."""
+
+    def __init__(self, app_data, idle_minutes=IDLE_MINUTES, memory_percent=MEMORY_PERCENT):
+        self.app_data = app_data
+        self.idle_minutes = idle_minutes
+        self.memory_percent = memory_percent
+        # tab name -> time.monotonic() when it was left
+        self._left = {}
+        # the shown tab of which a thumbnail was taken since it was shown
+        self._captured = None
+        self._lock = threading.Lock()
+        self._running = True
+        self._wake = threading.Event()
+        threading.Thread(target=self._poll, daemon=True, name="Hibernation").start()
+
+    def tab_left(self, name):
+        """Tab *name* is not shown any more."""
+        if self.idle_minutes:
+            with self._lock:
+                self._left[name] = time.monotonic()
+
+    def tab_shown(self, name):
+        with self._lock:
+            self._left.pop(name, None)
+            self._captured = None
+
+    def _capture_active(self):
+        """Thumbnail of the shown tab, if not taken since it was shown."""
+        from .webgpu_tab import WebgpuTab
+
+        name = self.app_data.active_tab
+        tab = self.app_data.get_tab(name) if name is not None else None
+        comp = tab.get("component") if tab is not None else None
+        if self._captured == name or not isinstance(comp, WebgpuTab):
+            return
+        try:
+            image = thumbnail(comp)
+        except Exception:
+            return
+        if image is not None and self.app_data.active_tab == name:
+            tab["thumbnail"] = image
+            self._captured = name
+
+    def check(self):
+        """Hibernate the tabs that are due. Returns their names."""
+        from .webgpu_tab import WebgpuTab
+
+        if not self.idle_minutes:
+            return []
+        self._capture_active()
+        pressure = self.memory_percent and (_memory_percent() or 0) > self.memory_percent
+        with self._lock:
+            names = hibernation_order(
+                self._left, time.monotonic(), 60 * self.idle_minutes, pressure
+            )
+        hibernated = []
+        for name in names:
+            if pressure and not (_memory_percent() or 0) > self.memory_percent:
+                break
+            with self._lock:
+                self._left.pop(name, None)
+            tab = self.app_data.get_tab(name)
+            if tab is None or not isinstance(tab.get("component"), WebgpuTab):
+                continue
+            if self.app_data.hibernate_tab(name):
+                hibernated.append(name)
+                # the GPU buffers are released when their renderers are collected
+                gc.collect()
+        return hibernated
+
+    def _poll(self):
+        while self._running:
+            self._wake.wait(CHECK_INTERVAL)
+            self._wake.clear()
+            if not self._running:
+                break
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Hibernating tabs failed: {e}")
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
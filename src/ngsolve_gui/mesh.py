@@ -4,7 +4,10 @@ import ngsolve as ngs
 from ngsolve_webgpu.mesh import *
 from webgpu.labels import Labels
 
-from .webgpu_tab import WebgpuTab
+from .tiles import TiledRenderer, TiledMesh, use_tiles
+from .timed_data import TimedMeshData
+from .tracing import traced
+from .webgpu_tab import WebgpuTab, _VOLUME_ENTITIES
 import netgen.occ as ngocc
 from ngsolve_webgpu import EntityNumbers
 
@@ -22,6 +25,9 @@ class MeshComponent(WebgpuTab):
         self.elements3d = None
         self.el2d_bitarray = data.get("el2d_bitarray", None)
         self.el3d_bitarray = data.get("el3d_bitarray", None)
+        # large meshes are split into tiles that are loaded on demand
+        self.tiled = data.get("tiled", None)
+        self.tiles = None
 
         # -- Observable properties (restored from saved settings) -----------
         tab = app_data.get_tab(name)
@@ -87,7 +93,8 @@ class MeshComponent(WebgpuTab):
         self.wgpu.scene.render()
 
     def _apply_elements1d(self, val, _old):
-        self.elements1d.active = val
+        if self.elements1d is not None:
+            self.elements1d.active = val
         self.wgpu.scene.render()
 
     def _apply_elements2d(self, val, _old):
@@ -102,19 +109,31 @@ class MeshComponent(WebgpuTab):
 
     def _apply_shrink(self, val, _old):
         self.mdata.shrink = val
-        if self.elements3d is not None:
+        if isinstance(self.elements3d, TiledRenderer):
+            self.elements3d.apply(lambda r: setattr(r, "shrink", val), key="shrink")
+        elif self.elements3d is not None:
             self.elements3d.shrink = val
         self.wgpu.scene.render()
 
     def _apply_curvature(self, val, _old):
         self.mdata.set_needs_update()
+        if self.tiles is not None:
+            self.tiles.reset(keep_data=False)
         self.draw()
 
     def _apply_curvature_order(self, val, _old):
         self.mdata.set_needs_update()
+        if self.tiles is not None:
+            self.tiles.reset(keep_data=False)
         self.draw()
 
     def _apply_entity_numbers(self, entity, val):
+        if entity not in self._entity_number_renderers:
+            if not val:
+                return
+            self.draw()
+            if entity not in self._entity_number_renderers:
+                return
         self._entity_number_renderers[entity].active = val
         self.wgpu.scene.render()
 
@@ -166,6 +185,9 @@ class MeshComponent(WebgpuTab):
     def _toggle_numbers(self, entity):
         getattr(self, f"{entity}_numbers_visible").toggle()
 
+    def _timed_data(self):
+        return {"mesh": self.mdata}
+
     def update(self, title, mesh, settings):
         self.title = title
         if self.mesh == mesh:
@@ -173,6 +195,13 @@ class MeshComponent(WebgpuTab):
         self.mesh = mesh
         self.draw()
 
+    def _tiled(self, factory, volume=False):
+        """``factory(mesh_data)`` on the whole mesh, or per tile if tiled."""
+        if self.tiles is None:
+            return factory(self.mdata)
+        return self.tiles.renderer(lambda tile: factory(tile.mesh_data()), volume=volume)
+
+    @traced("draw")
     def draw(self):
         curve_enabled = self.mesh_curvature_enabled.value
         curve_order = int(self.mesh_curvature_order.value)
@@ -180,7 +209,7 @@ class MeshComponent(WebgpuTab):
             self.mesh.Curve(curve_order)
 
         if self.el2d_bitarray is not None or self.el3d_bitarray is not None:
-            self.mdata = MeshData(
+            self.mdata = TimedMeshData(
                 self.region_or_mesh,
                 el2d_bitarray=self.el2d_bitarray,
                 el3d_bitarray=self.el3d_bitarray,
@@ -196,7 +225,17 @@ class MeshComponent(WebgpuTab):
         else:
             subdiv = 1
         self.mdata.subdivision = subdiv
-        self.wireframe = MeshWireframe2d(self.mdata, clipping=self.clipping)
+        if self.tiles is not None and self.tiles.region_or_mesh is self.region_or_mesh:
+            self.tiles.reset()
+        elif self.el2d_bitarray is None and self.el3d_bitarray is None and use_tiles(
+            self.region_or_mesh, self.tiled
+        ):
+            self.tiles = TiledMesh(self.region_or_mesh)
+        else:
+            self.tiles = None
+        if self.tiles is not None:
+            self.tiles.subdivision = subdiv
+        self.wireframe = self._tiled(lambda d: MeshWireframe2d(d, clipping=self.clipping))
         self.wireframe.active = self.wireframe_visible.value
         saved_edge_colors = self.edge_colors.value
         if saved_edge_colors:
@@ -204,13 +243,27 @@ class MeshComponent(WebgpuTab):
             edge_colors = [saved_edge_colors.get(ed.name, [0, 0, 0, 255]) for ed in edge_descriptors]
         else:
             edge_colors = None
-        self.elements1d = MeshSegments(self.mdata, clipping=self.clipping, colors=edge_colors)
-        self.elements1d.active = self.elements1d_visible.value
-        self.elements2d = MeshElements2d(self.mdata, clipping=self.clipping)
+        # segments and entity numbers need the whole mesh, not drawn tiled
+        self.elements1d = None
+        if self.tiles is None:
+            self.elements1d = MeshSegments(self.mdata, clipping=self.clipping, colors=edge_colors)
+            self.elements1d.active = self.elements1d_visible.value
+        self.elements2d = self._tiled(lambda d: MeshElements2d(d, clipping=self.clipping))
+        if self.tiles is not None:
+            # one face colormap for all tiles, edited by the mesh colors section
+            self.elements2d.gpu_objects.colormap = MeshElements2d(self.mdata).colormap
+            colormap = self.elements2d.gpu_objects.colormap
+            self.elements2d.apply(lambda r: setattr(r, "colormap", colormap), key="colormap")
         self.elements2d.active = self.elements2d_visible.value
         if self.elements3d_visible.value:
-            self.elements3d = MeshElements3d(self.mdata, clipping=self.clipping)
-            self.elements3d.shrink = self.shrink_value.value
+            self.elements3d = self._tiled(
+                lambda d: MeshElements3d(d, clipping=self.clipping), volume=True
+            )
+            shrink = self.shrink_value.value
+            if self.tiles is not None:
+                self.elements3d.apply(lambda r: setattr(r, "shrink", shrink), key="shrink")
+            else:
+                self.elements3d.shrink = shrink
         self.mesh_info = Labels(
             [
                 f"VOL: {self.mesh.GetNE(ngs.VOL)} BND: {self.mesh.GetNE(ngs.BND)} CD2: {self.mesh.GetNE(ngs.BBND)} CD3: {self.mesh.GetNE(ngs.BBBND)}"
@@ -220,9 +273,13 @@ class MeshComponent(WebgpuTab):
         )
 
         self._entity_number_renderers = {}
-        for entity in self.entity_number_entities:
+        for entity in self.entity_number_entities if self.tiles is None else ():
+            visible = getattr(self, f"{entity}_numbers_visible").value
+            if entity in _VOLUME_ENTITIES and not visible:
+                # created when first shown, they need the volume elements
+                continue
             r = EntityNumbers(self.mdata, entity=entity, clipping=self.clipping, zero_based=not self.numbers_one_based.value)
-            r.active = getattr(self, f"{entity}_numbers_visible").value
+            r.active = visible
             self._entity_number_renderers[entity] = r
 
         render_objects = [
@@ -239,22 +296,12 @@ class MeshComponent(WebgpuTab):
             if obj is not None
         ]
         render_objects += list(self._entity_number_renderers.values())
-        self.wgpu.draw(render_objects, camera=self.camera)
+        self._draw_scene(render_objects, camera=self.camera)
+        if self.tiles is not None:
+            self.tiles.attach(self.scene, self.clipping)
 
         pickable = [(r, k) for r, k in [
             (self.elements2d, "surface"),
             (self.elements3d, "volume"),
         ] if r is not None]
         self.setup_picking(pickable, self.mesh)
-
-
-# Register with the component registry
-from .registry import register_component
-from .sections import MeshViewSection, MeshColorSection, ClippingSection, EntityNumbersSection
-
-register_component(
-    "mesh",
-    icon="mdi-vector-triangle",
-    component_class=MeshComponent,
-    sections=[MeshViewSection, MeshColorSection, ClippingSection, EntityNumbersSection],
-)
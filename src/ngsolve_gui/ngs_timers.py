@@ -0,0 +1,141 @@
+"""Deltas of NGSolve's internal timers (``ngs.Timers()``) over draws and
+redraws, with a toolbar panel.
+
+While recording is enabled, the functions decorated with :func:`measured`
+(function tab draw/redraw, the app's ``Redraw``) snapshot the timers
+before and after they run. Each measurement keeps the wall time and the
+timers that grew the most, so a slow draw shows whether the time went
+into NGSolve's C++ numerics (CF evaluation, ``MapToAllElements``,
+curving, ...) or into the Python layer of the GUI. Timers nest, so their
+deltas overlap and don't add up to the wall time.
+"""
+
+import collections
+import functools
+import threading
+import time
+
+from ngapp.components import Div, QCard, QCardSection, QCheckbox, QMenu
+
+HISTORY = 20
+TOP = 8
+
+_enabled = False
+_history = collections.deque(maxlen=HISTORY)
+_listeners = []
+_lock = threading.Lock()
+
+
+def snapshot():
+    """``name -> (seconds, counts)`` of all NGSolve timers, summed over
+    timers of the same name."""
+    import ngsolve as ngs
+
+    timers = {}
+    for t in ngs.Timers():
+        seconds, counts = timers.get(t["name"], (0.0, 0))
+        timers[t["name"]] = (seconds + t["time"], counts + t["counts"])
+    return timers
+
+
+def delta(before, after, top=TOP):
+    """``(name, seconds, counts)`` of the *top* timers that grew the most
+    from *before* to *after*."""
+    grown = []
+    for name, (seconds, counts) in after.items():
+        seconds0, counts0 = before.get(name, (0.0, 0))
+        if counts > counts0 or seconds > seconds0:
+            grown.append((name, seconds - seconds0, counts - counts0))
+    grown.sort(key=lambda g: g[1], reverse=True)
+    return grown[:top]
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def enabled():
+    return _enabled
+
+
+def history():
+    """Measurements, newest last: dicts with ``label``, ``wall`` and
+    ``timers`` (see :func:`delta`)."""
+    with _lock:
+        return list(_history)
+
+
+def subscribe(listener):
+    """Call ``listener(measurement)`` after each measurement."""
+    _listeners.append(listener)
+
+
+def measured(label):
+    """Decorator: measure the timer deltas of the calls while recording is
+    enabled. Methods of objects with ``trace_args()`` (tabs) are labeled
+    with the tab."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            name = label
+            trace_args = getattr(args[0], "trace_args", None) if args else None
+            if callable(trace_args):
+                try:
+                    name = f"{label} {trace_args()['tab']}"
+                except Exception:
+                    pass
+            before = snapshot()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall = time.perf_counter() - start
+                measurement = {
+                    "label": name,
+                    "wall": wall,
+                    "timers": delta(before, snapshot()),
+                }
+                with _lock:
+                    _history.append(measurement)
+                for listener in list(_listeners):
+                    listener(measurement)
+
+        return wrapper
+
+    return decorator
+
+
+class TimersPanel(QMenu):
+    """Toolbar menu with the NGSolve timer deltas of the last draws and
+    redraws."""
+
+    _MONO = "font-family: monospace; font-size: 11px; white-space: pre;"
+    SHOWN = 5
+
+    def __init__(self):
+        self._record = QCheckbox(ui_label="Record NGSolve Timers", ui_model_value=enabled())
+        self._record.on_update_model_value(lambda e: set_enabled(e.value))
+        self._list = Div(ui_style="max-height: 420px; overflow: auto;")
+        super().__init__(
+            QCard(
+                QCardSection("NGSolve Timers"),
+                QCardSection(self._record, self._list),
+            )
+        )
+        subscribe(lambda _m: self._update())
+
+    def _update(self):
+        rows = []
+        for m in reversed(history()[-self.SHOWN :]):
+            rows.append(Div(f"{m['label']}: {1e3 * m['wall']:.1f} ms", ui_style="font-weight: 600;"))
+            for name, seconds, counts in m["timers"]:
+                rows.append(
+                    Div(f"{1e3 * seconds:9.2f} ms {counts:6d}x  {name}", ui_style=self._MONO)
+                )
+            if not m["timers"]:
+                rows.append(Div("  no NGSolve timers ran", ui_style=self._MONO))
+        self._list.ui_children = rows
@@ -0,0 +1,132 @@
+"""Function values at a picked point, read from the uploaded value buffers.
+
+Hovering a function tab shows the value at the cursor. Instead of
+evaluating the CoefficientFunction at the point (which, for expensive
+functions, costs more than the hover interval), the value is interpolated
+from the Bernstein coefficients of the picked surface element that were
+uploaded for drawing (``FunctionData.data_2d``), the way the shaders
+evaluate them. Its accuracy is that of the drawn function.
+
+The element of a pick is the instance id of the drawn triangle, the local
+coordinates are computed from the world position and the (straight)
+vertices of the triangle. Quads, volume and clipping picks have no value
+here; they are evaluated exactly, see ``FunctionComponent``. The exact
+value of the point the cursor rests on follows through a :class:`Debounce`.
+"""
+
+import threading
+import time
+
+import numpy as np
+from ngsolve_webgpu.mesh import ElType
+
+from .value_stats import HEADER_SIZE
+
+
+def _trig_vertices(mesh_buffers, instance):
+    """Vertex coordinates (p0, p1, p2) of triangle *instance*, or ``None``
+    for quads and ids out of range."""
+    trigs = mesh_buffers.elements.get(ElType.TRIG)
+    vertices = mesh_buffers.elements.get("vertices")
+    if trigs is None or vertices is None or not 0 <= instance < trigs[0]:
+        return None
+    # [ntrigs, nquads, (p0, p1, p2, index or -offset for quads) per trig, ...]
+    p0, p1, p2, index = trigs[2 + 4 * instance : 6 + 4 * instance]
+    if index < 0:
+        return None
+    return vertices[[p0, p1, p2]].astype(np.float64)
+
+
+def local_coordinates(p, pos):
+    """``lam`` with ``pos ~ p[2] + lam[0] (p[0] - p[2]) + lam[1] (p[1] - p[2])``
+    (the position in the triangle plane closest to *pos*), clamped to the
+    triangle."""
+    a = np.stack([p[0] - p[2], p[1] - p[2]], axis=1)
+    lam = np.linalg.lstsq(a, np.asarray(pos, dtype=np.float64) - p[2], rcond=None)[0]
+    lam = np.clip(lam, 0.0, 1.0)
+    if lam.sum() > 1.0:
+        lam /= lam.sum()
+    return lam
+
+
+def evaluate_bernstein(coefficients, order, lam):
+    """Value of the Bernstein polynomial on the triangle with *coefficients*
+    (``ndof x ncomp``, in the order of ``evaluate_cf``) at *lam*, by de
+    Casteljau as in the shaders."""
+    v = np.array(coefficients, dtype=np.float64)
+    b = (lam[0], lam[1], 1.0 - lam[0] - lam[1])
+    dy = order + 1
+    for n in range(order, 0, -1):
+        i0 = 0
+        for iy in range(n):
+            for ix in range(n - iy):
+                v[i0 + ix] = b[0] * v[i0 + ix] + b[1] * v[i0 + ix + 1] + b[2] * v[i0 + ix + dy - iy]
+            i0 += dy - iy
+    return v[0]
+
+
+def surface_value(function_data, instance, pos):
+    """Value (one entry per component) of *function_data* at world position
+    *pos* in drawn triangle *instance*, or ``None`` if it is not available
+    from the buffers."""
+    data = function_data.data_2d
+    if data is None or len(data) <= HEADER_SIZE:
+        return None
+    p = _trig_vertices(function_data.mesh_data.mesh_buffers, instance)
+    if p is None:
+        return None
+    ncomp, order, is_complex = (int(h) for h in data[:HEADER_SIZE])
+    ndof = (order + 1) * (order + 2) // 2
+    stride = ncomp * (1 + is_complex)
+    start = HEADER_SIZE + ndof * instance * stride
+    if start + ndof * stride > len(data):
+        return None
+    block = np.asarray(data[start : start + ndof * stride], dtype=float).reshape(ndof, stride)
+    value = evaluate_bernstein(block, order, local_coordinates(p, pos))
+    if is_complex:
+        value = value[0::2] + 1j * value[1::2]
+    return value
+
+
+class Debounce:
+    """Calls *func* with the arguments of the last :meth:`schedule`, once
+    no call was scheduled for *delay* seconds.
+
+    One thread waits for the deadline, every :meth:`schedule` moves it; the
+    thread ends when the call is made or cancelled.
+    """
+
+    def __init__(self, func, delay, name="Debounce"):
+        self.func = func
+        self.delay = delay
+        self.name = name
+        self._cond = threading.Condition()
+        self._due = None
+        self._args = ()
+        self._thread = None
+
+    def schedule(self, *args):
+        with self._cond:
+            self._due = time.monotonic() + self.delay
+            self._args = args
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._due = None
+            self._args = ()
+            self._cond.notify()
+
+    def _run(self):
+        with self._cond:
+            while self._due is not None and time.monotonic() < self._due:
+                self._cond.wait(self._due - time.monotonic())
+            args = self._args if self._due is not None else None
+            self._due = None
+            self._args = ()
+            self._thread = None
+        if args is not None:
+            self.func(*args)
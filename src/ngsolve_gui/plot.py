@@ -70,9 +70,24 @@ class PlotComponent(Div):
 
         return None
 
+    @property
+    def _source(self):
+        return self.data.get("obj") if isinstance(self.data, dict) else self.data
+
+    @property
+    def _is_live(self):
+        """Live sources (e.g. probes) provide ``plot_figure()`` and are
+        evaluated again on every redraw."""
+        return callable(getattr(self._source, "plot_figure", None))
+
+    def _source_figures(self):
+        obj = self._source
+        if self._is_live:
+            obj = obj.plot_figure()
+        return self._normalize_figures(obj)
+
     def draw(self):
-        obj = self.data.get("obj") if isinstance(self.data, dict) else self.data
-        figures = self._normalize_figures(obj)
+        figures = self._source_figures()
 
         self._figures = []
         self._plots = []
@@ -97,6 +112,9 @@ class PlotComponent(Div):
             self.container.ui_children = self._plots
 
     def redraw(self):
+        if self._is_live and self._plots:
+            figures = [self._to_plotly(fig) for fig in self._source_figures()]
+            self._figures = [fig for fig in figures if fig is not None]
         if not self._figures or not self._plots:
             self.draw()
             return
@@ -105,14 +123,3 @@ class PlotComponent(Div):
 
     def set_component(self, comp):
         self.ui_children = [comp]
-
-
-# Register with the component registry
-from .registry import register_component
-
-register_component(
-    "plot",
-    icon="mdi-chart-line",
-    component_class=PlotComponent,
-    sections=[],
-)
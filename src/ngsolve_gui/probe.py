@@ -0,0 +1,168 @@
+"""Evaluating functions at many points at once.
+
+Finding the elements that contain the points (``mesh(x, y, z)`` with
+coordinate arrays) is much more expensive than evaluating a function on
+the located points, so probes locate their points once and evaluate all of
+them with one call, e.g. on every ``Redraw``.
+"""
+
+import numpy as np
+
+
+def locate_points(mesh, points):
+    """Mesh points of the ``(n, 3)`` array *points* and the mask of the
+    ones inside the mesh."""
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    mips = mesh(*(points[:, i] for i in range(mesh.dim)))
+    return mips, mips["nr"] >= 0
+
+
+def evaluate_points(cf, mips, inside):
+    """Values of *cf* on located points, ``(n, cf.dim)``; NaN outside the
+    mesh."""
+    dtype = complex if cf.is_complex else float
+    values = np.full((len(mips), cf.dim), np.nan, dtype=dtype)
+    if inside.any():
+        values[inside] = np.asarray(cf(mips[inside])).reshape(-1, cf.dim)
+    return values
+
+
+def component_names(cf, name="f"):
+    if cf.dim == 1:
+        return [name]
+    return [f"{name}[{i}]" for i in range(cf.dim)]
+
+
+def traces(x, values, names):
+    """Plotly line traces of the columns of *values* over *x*; real and
+    imaginary part separately for complex values."""
+    out = []
+    for i, name in enumerate(names):
+        col = values[:, i]
+        parts = [(name, col)]
+        if np.iscomplexobj(col):
+            parts = [(f"Re {name}", col.real), (f"Im {name}", col.imag)]
+        for label, y in parts:
+            out.append(
+                {"type": "scatter", "mode": "lines", "name": label,
+                 "x": x.tolist(), "y": [None if np.isnan(v) else float(v) for v in y]}
+            )
+    return out
+
+
+class _Probe:
+    """Base of probes at fixed ``points``, caches their element location."""
+
+    _located = None
+
+    def _locate(self):
+        # located again if the mesh was refined in place
+        key = (self.mesh.ne, self.mesh.nv)
+        if self._located is None or self._located[0] != key:
+            self._located = (key, *locate_points(self.mesh, self.points))
+        return self._located[1:]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # mesh points hold a pointer to the mesh
+        state["_located"] = None
+        return state
+
+
+class LineProbe(_Probe):
+    """Values of *cf* at *num_points* equidistant points from *start* to
+    *end*. Used as the object of a plot tab, the curve is evaluated again
+    on every redraw of the tab."""
+
+    def __init__(self, cf, mesh, start, end, num_points=1000, name="f"):
+        self.cf = cf
+        self.mesh = mesh
+        self.start = np.array(start, dtype=float)
+        self.end = np.array(end, dtype=float)
+        self.name = name
+        t = np.linspace(0.0, 1.0, max(2, int(num_points)))
+        self.points = self.start + t[:, None] * (self.end - self.start)
+        self.distance = t * float(np.linalg.norm(self.end - self.start))
+
+    @property
+    def inside(self):
+        return self._locate()[1]
+
+    def values(self):
+        """Values at the sample points, ``(num_points, cf.dim)``."""
+        return evaluate_points(self.cf, *self._locate())
+
+    def plot_figure(self):
+        fmt = lambda p: "(" + ", ".join(f"{v:.4g}" for v in p) + ")"
+        return {
+            "data": traces(self.distance, self.values(), component_names(self.cf, self.name)),
+            "layout": {
+                "title": {"text": f"{self.name} from {fmt(self.start)} to {fmt(self.end)}"},
+                "xaxis": {"title": {"text": "distance"}},
+                "yaxis": {"title": {"text": self.name}},
+            },
+        }
+
+
+class PointMonitor(_Probe):
+    """Time history of *cf* at pinned points: every :meth:`record` (called
+    on each ``Redraw``) evaluates all points with one call and appends the
+    values. Points can be added at any time, their history starts then."""
+
+    def __init__(self, cf, mesh, points=(), name="f"):
+        self.cf = cf
+        self.mesh = mesh
+        self.name = name
+        self.points = np.empty((0, 3))
+        self.steps = []
+        self._values = []
+        for p in points:
+            self.add_point(p)
+
+    def set_function(self, cf, mesh=None):
+        """Record *cf* (on *mesh*) from now on, e.g. the new function of the
+        tab the monitor was added in."""
+        self.cf = cf
+        if mesh is not None and mesh is not self.mesh:
+            self.mesh = mesh
+            self._located = None
+
+    def add_point(self, point):
+        p = np.zeros((1, 3))
+        p[0, : len(point)] = point
+        self.points = np.vstack((self.points, p))
+        self._located = None
+
+    def record(self, step=None):
+        """Evaluate at all points and append the values; *step* defaults to
+        the number of recorded samples."""
+        if not len(self.points):
+            return None
+        values = evaluate_points(self.cf, *self._locate())
+        self.steps.append(len(self.steps) if step is None else step)
+        self._values.append(values)
+        return values
+
+    def history(self):
+        """Values of all recordings, ``(nsteps, npoints, cf.dim)``; NaN
+        before a point was added."""
+        dtype = complex if self.cf.is_complex else float
+        out = np.full((len(self._values), len(self.points), self.cf.dim), np.nan, dtype=dtype)
+        for i, values in enumerate(self._values):
+            out[i, : len(values)] = values
+        return out
+
+    def plot_figure(self):
+        history = self.history()
+        data = []
+        for k, point in enumerate(self.points):
+            label = f"{self.name} @ (" + ", ".join(f"{v:.4g}" for v in point) + ")"
+            data += traces(np.asarray(self.steps), history[:, k], component_names(self.cf, label))
+        return {
+            "data": data,
+            "layout": {
+                "title": {"text": f"{self.name} at {len(self.points)} points"},
+                "xaxis": {"title": {"text": "step"}},
+                "yaxis": {"title": {"text": self.name}},
+            },
+        }
@@ -0,0 +1,204 @@
+"""Sampling profiler for the threads of the GUI process, with a toolbar panel.
+
+A background thread takes the Python stacks of all other threads
+(``sys._current_frames``) every ``interval`` seconds. Threads whose CPU
+clock did not advance since the last sample (waiting on a lock, socket or
+timer) are skipped where the platform provides per-thread CPU clocks.
+Only Python frames are seen: time spent in C++ (meshing, CoefficientFunction
+evaluation) is attributed to the Python function that called into it.
+
+The result is shown as the functions with the most samples and exported
+as collapsed stacks (``thread;outer;...;inner count`` per line), the
+input format of flamegraph.pl, speedscope and similar tools.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+from ngapp.components import Div, QBtn, QCard, QCardSection, QInput, QMenu, Row
+
+
+def _cpu_clock(ident):
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+def _frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ",")
+
+
+class SamplingProfiler:
+    """Counts the sampled stacks in ``stacks``: ``(thread name, outermost
+    frame, ..., innermost frame) -> samples``."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu = {}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=None):
+        """Sample (again from scratch) for *duration* seconds or until
+        :meth:`stop`."""
+        self.stop()
+        self.stacks.clear()
+        self.samples = 0
+        self.duration = 0.0
+        self._cpu.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), daemon=True, name="SamplingProfiler"
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.wait()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, duration):
+        own = threading.get_ident()
+        begin = time.perf_counter()
+        end = None if duration is None else begin + duration
+        while not self._stop.wait(self.interval):
+            self.sample(own)
+            if end is not None and time.perf_counter() >= end:
+                break
+        self.duration = time.perf_counter() - begin
+
+    def sample(self, skip=None):
+        """Take one sample of all threads except *skip*."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            cpu = _cpu_clock(ident)
+            if cpu is not None:
+                last = self._cpu.get(ident)
+                self._cpu[ident] = cpu
+                # the first sample of a thread is its baseline
+                if last is None or cpu == last:
+                    continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread {ident}"))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def top_functions(self, n=20):
+        """``(function, self samples, total samples)`` of the *n* functions
+        with the most samples in them, innermost first; total counts a
+        sample once if the function is on its stack."""
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        ranked = sorted(total, key=lambda f: (own[f], total[f]), reverse=True)
+        return [(f, own[f], total[f]) for f in ranked[:n]]
+
+    def collapsed(self):
+        """The stacks in collapsed format, one ``a;b;c count`` per line."""
+        return "".join(
+            ";".join(stack) + f" {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+
+
+class ProfilerPanel(QMenu):
+    """Toolbar menu that profiles the GUI process for some seconds and shows
+    the top functions."""
+
+    _MONO = "font-family: monospace; font-size: 11px; white-space: pre;"
+
+    def __init__(self, get_directory=lambda: os.path.expanduser("~"), top=15):
+        self.profiler = SamplingProfiler()
+        self._get_directory = get_directory
+        self._top = top
+        self._seconds = QInput(
+            ui_label="Seconds", ui_type="number", ui_model_value=5, ui_dense=True
+        )
+        self._start_btn = QBtn(ui_label="Start", ui_color="primary", ui_flat=True)
+        self._start_btn.on_click(self._start)
+        self._export_btn = QBtn(
+            ui_label="Export Collapsed Stacks", ui_flat=True, ui_disable=True
+        )
+        self._export_btn.on_click(self._export)
+        self._status = Div("")
+        self._table = Div(ui_style="max-height: 360px; overflow: auto;")
+        super().__init__(
+            QCard(
+                QCardSection("Sampling Profiler"),
+                QCardSection(
+                    self._seconds,
+                    Row(self._start_btn, self._export_btn),
+                    self._status,
+                    self._table,
+                ),
+            )
+        )
+
+    def _start(self):
+        if self.profiler.running:
+            return
+        try:
+            seconds = max(0.1, float(self._seconds.ui_model_value))
+        except (TypeError, ValueError):
+            seconds = 5.0
+        self._status.ui_children = [f"Sampling for {seconds:g} s …"]
+        self._start_btn.ui_disable = True
+        self.profiler.start(seconds)
+        threading.Thread(target=self._show_results, daemon=True, name="ProfilerResults").start()
+
+    def _show_results(self):
+        self.profiler.wait()
+        p = self.profiler
+        active = sum(p.stacks.values())
+        self._status.ui_children = [
+            f"{p.samples} samples in {p.duration:.1f} s, {active} stacks of busy threads"
+        ]
+        rows = [Div(f"{'self':>6} {'total':>6}  function", ui_style=self._MONO)]
+        for label, own, total in p.top_functions(self._top):
+            rows.append(
+                Div(
+                    f"{100 * own / max(active, 1):5.1f}% {100 * total / max(active, 1):5.1f}%  {label}",
+                    ui_style=self._MONO,
+                )
+            )
+        self._table.ui_children = rows
+        self._start_btn.ui_disable = False
+        self._export_btn.ui_disable = not p.stacks
+
+    def _export(self):
+        path = os.path.join(
+            self._get_directory(), time.strftime("ngsolve_gui_profile_%Y%m%d_%H%M%S.collapsed")
+        )
+        self.profiler.write_collapsed(path)
+        self._status.ui_children = [f"Written to {path}"]
+        print(f"Collapsed stacks written to {path}")
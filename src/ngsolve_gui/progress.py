@@ -0,0 +1,123 @@
+"""Progress of the running jobs (see :mod:`ngsolve_gui.cancel`), pushed to
+listeners.
+
+A job reports its progress with :func:`report`. Listeners (the status
+bar) are called only when a job starts or ends, or when its text or
+fraction changes. A job's fraction-only updates are passed on at most
+every ``MIN_INTERVAL`` seconds.
+"""
+
+import contextlib
+import threading
+import time
+import traceback
+
+MIN_INTERVAL = 0.1
+# netgen keeps its status in C++, it is polled while a netgen job runs
+NETGEN_POLL_INTERVAL = 0.3
+
+
+class JobProgress:
+    """State of a running job; *fraction* is ``None`` while unknown."""
+
+    def __init__(self, name, token):
+        self.name = name
+        self.token = token
+        self.text = name
+        self.fraction = None
+        self._reported = 0.0
+
+
+_running = {}
+_listeners = []
+_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """Call ``listener(event, job)`` with *event* ``"start"``,
+    ``"update"`` or ``"end"`` from the thread of the job."""
+    _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def running():
+    with _lock:
+        return list(_running.values())
+
+
+def _notify(event, job):
+    for listener in list(_listeners):
+        try:
+            listener(event, job)
+        except Exception:
+            traceback.print_exc()
+
+
+def started(token, name):
+    job = JobProgress(name, token)
+    with _lock:
+        _running[token] = job
+    _notify("start", job)
+
+
+def finished(token):
+    with _lock:
+        job = _running.pop(token, None)
+    if job is not None:
+        _notify("end", job)
+
+
+def report(text=None, fraction=None, token=None):
+    """Set the *text* and/or the *fraction* (0..1) of the job of *token*,
+    the current job of the thread by default."""
+    if token is None:
+        from .cancel import current_token
+
+        token = current_token()
+    now = time.monotonic()
+    with _lock:
+        job = _running.get(token)
+        if job is None:
+            return
+        text = job.text if text is None else text
+        if fraction is not None:
+            fraction = round(min(max(fraction, 0.0), 1.0), 3)
+        if text == job.text:
+            if fraction == job.fraction:
+                return
+            if fraction != 1.0 and now - job._reported < MIN_INTERVAL:
+                return
+        job.text = text
+        job.fraction = fraction
+        job._reported = now
+    _notify("update", job)
+
+
+@contextlib.contextmanager
+def netgen_status(token):
+    """Report netgen's status (e.g. meshing steps) as the progress of the
+    job of *token* while the block runs."""
+    from netgen.libngpy._meshing import _GetStatus
+
+    stop = threading.Event()
+
+    def poll():
+        while not stop.wait(NETGEN_POLL_INTERVAL):
+            try:
+                text, percent = _GetStatus()
+            except Exception:
+                continue
+            if not text or text == "idle":
+                text, percent = token.name, 0.0
+            report(text, percent / 100 if percent > 0 else None, token=token)
+
+    thread = threading.Thread(target=poll, daemon=True, name="NetgenStatus")
+    thread.start()
+    try:
+        yield token
+    finally:
+        stop.set()
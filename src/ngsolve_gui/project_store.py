@@ -0,0 +1,155 @@
+"""Incremental project storage.
+
+Tab settings and other plain values are written as a small JSON manifest,
+meshes, functions and everything else that needs pickling go into
+content-addressed, compressed blobs, one per tab. A blob is only written
+when its content is not stored yet, so saving an unchanged project is
+cheap.
+"""
+
+import hashlib
+import json
+import pickle
+import zlib
+
+MANIFEST_KEY = "project"
+_BLOB_PREFIX = "blob:"
+_FORMAT_VERSION = 2
+_PARTS = ("data", "settings")
+
+
+def _is_plain(value):
+    """True if *value* can be stored in the JSON manifest."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+def _split(values):
+    """Split a dict into (plain, heavy) parts."""
+    plain, heavy = {}, {}
+    for key, value in values.items():
+        if _is_plain(value):
+            plain[key] = value
+        else:
+            heavy[key] = value
+    return plain, heavy
+
+
+class ProjectStore:
+    """Saves and loads ``AppData`` save data through an ngapp ``Storage``.
+
+    The heavy values of a tab are pickled together into one blob, keyed by
+    the SHA-256 of the pickle, so objects referencing each other (a
+    ``GridFunction`` and the mesh it lives on) are still the same objects
+    after loading. Tabs with equal content share their blob. Pickling is
+    skipped for tabs whose heavy values are the objects stored or loaded
+    before; the app calls :meth:`invalidate` on ``Redraw``, an object
+    changed in place without a ``Redraw`` is saved as it was at the last
+    one. Tabs that were loaded but never materialized keep their blob key
+    and are saved without being unpickled.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        # tab name -> (heavy values, blob key) of the tabs stored or loaded
+        self._stored = {}
+        # blob keys referenced by the stored manifest, None until known
+        self._referenced = None
+
+    def invalidate(self):
+        """Forget which objects are already stored; the next save re-hashes them."""
+        self._stored.clear()
+
+    def save(self, save_data):
+        """Write *save_data* (as returned by ``AppData.get_save_data``)."""
+        if self._referenced is None:
+            # blobs of a project saved by an earlier session
+            self._referenced = self._manifest_blobs(self._storage.get(MANIFEST_KEY))
+        tabs = {}
+        stored = {}
+        for name, tab in save_data["tabs"].items():
+            entry = {k: tab[k] for k in ("type", "icon", "name", "title", "blob") if k in tab}
+            heavy = {}
+            for part in _PARTS:
+                plain, heavy_part = _split(tab.get(part, {}))
+                entry[part] = plain
+                if heavy_part:
+                    heavy[part] = heavy_part
+            if heavy:
+                entry["blob"] = self._put(name, heavy, stored)
+            tabs[name] = entry
+
+        manifest = {
+            "version": _FORMAT_VERSION,
+            "active_tab": save_data.get("active_tab"),
+            "tabs": tabs,
+        }
+        raw = json.dumps(manifest)
+        self._storage.set(MANIFEST_KEY, raw)
+        referenced = self._manifest_blobs(raw)
+        for key in self._referenced - referenced:
+            self._storage.delete(_BLOB_PREFIX + key)
+        self._referenced = referenced
+        self._stored = stored
+
+    def load(self):
+        """Return the stored save data, or ``None`` if there is no manifest.
+
+        Blobs are not read here: tabs keep a ``"blob"`` entry until
+        :meth:`materialize` is called for them.
+        """
+        raw = self._storage.get(MANIFEST_KEY)
+        if raw is None:
+            return None
+        manifest = json.loads(raw)
+        tabs = {name: dict(entry) for name, entry in manifest["tabs"].items()}
+        self._referenced = self._manifest_blobs(raw)
+        return {"tabs": tabs, "active_tab": manifest.get("active_tab")}
+
+    def materialize(self, name, tab):
+        """Unpickle the blob of a loaded tab and merge it into the tab."""
+        key = tab.pop("blob", None)
+        if key is None:
+            return
+        heavy = self.load_blob(key)
+        for part, values in heavy.items():
+            tab.setdefault(part, {}).update(values)
+        self._stored[name] = (heavy, key)
+
+    def load_blob(self, key):
+        """Unpickle the blob stored under *key*."""
+        return pickle.loads(zlib.decompress(self._storage.get(_BLOB_PREFIX + key)))
+
+    @staticmethod
+    def _manifest_blobs(raw):
+        if raw is None:
+            return set()
+        tabs = json.loads(raw).get("tabs", {})
+        return {entry["blob"] for entry in tabs.values() if "blob" in entry}
+
+    def _put(self, name, heavy, stored):
+        cached = self._stored.get(name)
+        if cached is not None and _same_objects(cached[0], heavy):
+            key = cached[1]
+        else:
+            payload = pickle.dumps(heavy, protocol=pickle.HIGHEST_PROTOCOL)
+            key = hashlib.sha256(payload).hexdigest()
+            if _BLOB_PREFIX + key not in self._storage:
+                self._storage.set(_BLOB_PREFIX + key, zlib.compress(payload, 1))
+        stored[name] = (heavy, key)
+        return key
+
+
+def _same_objects(a, b):
+    """True if the heavy values *a* and *b* are the same objects."""
+    if a.keys() != b.keys():
+        return False
+    return all(
+        a[part].keys() == b[part].keys() and all(a[part][k] is b[part][k] for k in a[part])
+        for part in a
+    )
@@ -1,3 +1,5 @@
+import importlib
+
 _registry = {}
 
 
@@ -7,23 +9,103 @@ def register_component(type_key, *, icon, component_class, sections):
     Args:
         type_key: e.g. "mesh", "geometry", "function", "plot"
         icon: MDI icon name, e.g. "mdi-vector-triangle"
-        component_class: the component class (WebgpuTab subclass or similar)
-        sections: list of QExpansionItem subclasses to show in the property panel
+        component_class: the component class (WebgpuTab subclass or similar),
+            or a ``"module:Class"`` path that is imported on first use
+        sections: list of QExpansionItem subclasses (or ``"module:Class"``
+            paths) to show in the property panel
     """
     _registry[type_key] = {
         "icon": icon,
         "cls": component_class,
-        "sections": sections,
+        "sections": list(sections),
     }
 
 
+def _resolve(obj):
+    if not isinstance(obj, str):
+        return obj
+    module, _, attr = obj.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _class_path(cls):
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
 def get_registry():
     return _registry
 
 
 def get_component_info(type_key):
-    return _registry.get(type_key, None)
+    info = _registry.get(type_key, None)
+    if info is not None and isinstance(info["cls"], str):
+        info["cls"] = _resolve(info["cls"])
+    return info
 
 
 def get_sections_for(type_key):
-    return _registry.get(type_key, {}).get("sections", [])
+    info = _registry.get(type_key, None)
+    if info is None:
+        return []
+    info["sections"] = [_resolve(s) for s in info["sections"]]
+    return info["sections"]
+
+
+def find_type_key(cls):
+    """Return ``(type_key, icon)`` of a registered class, without importing
+    deferred ones. ``("unknown", None)`` if the class is not registered."""
+    path = _class_path(cls)
+    for key, info in _registry.items():
+        registered = info["cls"]
+        if registered is cls or registered == path:
+            return key, info["icon"]
+    return "unknown", None
+
+
+# Built-in components. Their modules (and ngsolve, netgen.occ,
+# ngsolve_webgpu with them) are imported the first time a tab of the
+# type is created or restored.
+register_component(
+    "geometry",
+    icon="mdi-cube",
+    component_class="ngsolve_gui.geometry:GeometryComponent",
+    sections=[
+        "ngsolve_gui.sections.geometry_options:GeometryOptionsSection",
+        "ngsolve_gui.sections.geometry_selection:GeometrySelectionSection",
+        "ngsolve_gui.sections.clipping:ClippingSection",
+    ],
+)
+register_component(
+    "mesh",
+    icon="mdi-vector-triangle",
+    component_class="ngsolve_gui.mesh:MeshComponent",
+    sections=[
+        "ngsolve_gui.sections.mesh_view:MeshViewSection",
+        "ngsolve_gui.sections.mesh_colors:MeshColorSection",
+        "ngsolve_gui.sections.clipping:ClippingSection",
+        "ngsolve_gui.sections.entity_numbers:EntityNumbersSection",
+    ],
+)
+register_component(
+    "function",
+    icon="mdi-function-variant",
+    component_class="ngsolve_gui.function:FunctionComponent",
+    sections=[
+        "ngsolve_gui.sections.colorbar:ColorbarSection",
+        "ngsolve_gui.sections.histogram:HistogramSection",
+        "ngsolve_gui.sections.clipping:ClippingSection",
+        "ngsolve_gui.sections.deformation:DeformationSection",
+        "ngsolve_gui.sections.vectors:VectorSection",
+        "ngsolve_gui.sections.fieldlines:FieldLinesSection",
+        "ngsolve_gui.sections.probe:ProbeSection",
+        "ngsolve_gui.sections.function_options:FunctionOptionsSection",
+        "ngsolve_gui.sections.expression_profile:ExpressionProfileSection",
+        "ngsolve_gui.sections.entity_numbers:EntityNumbersSection",
+    ],
+)
+register_component(
+    "plot",
+    icon="mdi-chart-line",
+    component_class="ngsolve_gui.plot:PlotComponent",
+    sections=[],
+)
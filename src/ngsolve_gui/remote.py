@@ -0,0 +1,326 @@
+"""Running scripts in a separate solver process.
+
+The script runs in a child process, so a busy Python-side solver does not
+hold the GIL of the GUI. ``Draw``/``Redraw`` in the child talk to the GUI
+process through a pipe:
+
+* ``Draw(obj, ...)`` pickles *obj* once. Its mesh is not part of the
+  pickle but referenced by a key; each mesh is sent once (and again when
+  it changed, e.g. was refined), so the objects drawn on a mesh share one
+  copy of it in the GUI. Every GridFunction in *obj* (*obj* itself or the
+  ones a CoefficientFunction uses) gets a shared-memory block the size of
+  its vector.
+* ``Redraw()`` copies the vectors into their blocks and sends only the
+  block names, and the values of the Parameters in *obj*. The GUI copies
+  them into the GridFunctions and Parameters of its copy of *obj* (found
+  in the same order in the expression tree), answers, and redraws;
+  nothing is pickled.
+
+When a vector changes its size (e.g. after mesh refinement), *obj* is sent
+again with its spaces (and the mesh, if it changed).
+
+``DrawBadElements(mesh)`` searches the bad elements in the child and sends
+the result; the GUI shows them like the in-process ``DrawBadElements``.
+"""
+
+import io
+import multiprocessing as mp
+import pickle
+import threading
+import traceback
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import cancel
+
+
+def _vector(gf):
+    return gf.vec.FV().NumPy()
+
+
+def _leaves(obj):
+    """The GridFunctions and Parameters of *obj*, each once, in the order of
+    the expression tree (the same for a pickled copy)."""
+    import ngsolve as ngs
+
+    parameters = tuple(
+        getattr(ngs, name) for name in ("Parameter", "ParameterC") if hasattr(ngs, name)
+    )
+    gfs, params, seen = [], [], set()
+
+    def visit(c):
+        if isinstance(c, ngs.GridFunction):
+            # the wrappers in an expression are new Python objects, the
+            # vector is the same
+            key = _vector(c).__array_interface__["data"][0]
+            if key not in seen:
+                seen.add(key)
+                gfs.append(c)
+        elif isinstance(c, parameters):
+            if id(c) not in seen:
+                seen.add(id(c))
+                params.append(c)
+        elif isinstance(c, ngs.CoefficientFunction):
+            for child in c.data["childs"]:
+                if child is not None:
+                    visit(child)
+
+    visit(obj)
+    return gfs, params
+
+
+def _mesh_of(obj, mesh):
+    if mesh is None:
+        gfs = _leaves(obj)[0]
+        mesh = gfs[0].space.mesh if gfs else None
+    return mesh
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, persistent_id):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._persistent_id = persistent_id
+
+    def persistent_id(self, obj):
+        return self._persistent_id(obj)
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, persistent_load):
+        super().__init__(file)
+        self._persistent_load = persistent_load
+
+    def persistent_load(self, pid):
+        return self._persistent_load(pid)
+
+
+class _SharedVector:
+    """Shared-memory copy of the vector of a GridFunction (child side)."""
+
+    def __init__(self, gf):
+        self.gf = gf
+        vec = _vector(gf)
+        self.dtype = vec.dtype.str
+        self.shape = vec.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=max(vec.nbytes, 1))
+
+    def fits(self):
+        vec = _vector(self.gf)
+        return vec.shape == self.shape and vec.dtype.str == self.dtype
+
+    def write(self):
+        np.ndarray(self.shape, self.dtype, buffer=self.shm.buf)[:] = _vector(self.gf)
+        return self.shm.name, self.dtype, self.shape
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class _SolverSide:
+    """``Draw``/``Redraw`` of the solver process."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # key -> (obj, mesh, shared vectors of its GridFunctions, Parameters)
+        self._drawn = {}
+        # id(mesh) -> (mesh, timestamp, key) of the meshes sent to the GUI
+        self._meshes = {}
+
+    def _mesh_id(self, obj):
+        """Key of a mesh in a pickle; sends the mesh first if the GUI does
+        not have it (or has an older state of it)."""
+        import ngsolve as ngs
+
+        if not isinstance(obj, ngs.Mesh):
+            return None
+        timestamp = obj.ngmesh._timestamp
+        sent = self._meshes.get(id(obj))
+        if sent is None or sent[1] != timestamp:
+            key = sent[2] if sent is not None else uuid.uuid4().hex
+            payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            self.conn.send(("mesh", key, payload))
+            sent = self._meshes[id(obj)] = (obj, timestamp, key)
+        return ("mesh", sent[2])
+
+    def _dumps(self, obj):
+        buffer = io.BytesIO()
+        _Pickler(buffer, self._mesh_id).dump(obj)
+        return buffer.getvalue()
+
+    def draw(self, obj, mesh=None, name=None, **kwargs):
+        import ngsolve as ngs
+
+        key = uuid.uuid4().hex
+        if isinstance(obj, ngs.CoefficientFunction):
+            gfs, params = _leaves(obj)
+            self._drawn[key] = (obj, mesh, [_SharedVector(gf) for gf in gfs], params)
+        self.conn.send(("draw", key, self._dumps((obj, mesh, name, kwargs))))
+
+    def redraw(self, *args, **kwargs):
+        updates, values = [], []
+        for key, (obj, mesh, vectors, params) in list(self._drawn.items()):
+            if not all(shared.fits() for shared in vectors):
+                for shared in vectors:
+                    shared.close()
+                vectors = [_SharedVector(shared.gf) for shared in vectors]
+                self._drawn[key] = (obj, mesh, vectors, params)
+                self.conn.send(("replace", key, self._dumps((obj, _mesh_of(obj, mesh)))))
+            updates += [(key, i, *shared.write()) for i, shared in enumerate(vectors)]
+            values += [(key, i, p.Get()) for i, p in enumerate(params)]
+        self.conn.send(("redraw", updates, values))
+        # the blocks are written again only after the GUI has read them
+        self.conn.recv()
+
+    def draw_bad_elements(self, mesh, threshold_3d=100, threshold_2d=20, intorder=4):
+        from .bad_elements import find_bad_elements
+
+        result = find_bad_elements(mesh, threshold_3d, threshold_2d, intorder)
+        self.conn.send(("bad_elements", self._dumps((mesh, *result))))
+
+    def close(self):
+        for _, _, vectors, _ in self._drawn.values():
+            for shared in vectors:
+                shared.close()
+        self._drawn.clear()
+
+
+def _solver_main(code, conn):
+    import ngsolve as ngs
+
+    side = _SolverSide(conn)
+    ngs.Draw = side.draw
+    ngs.Redraw = side.redraw
+    ngs.DrawBadElements = side.draw_bad_elements
+    try:
+        exec(code, {"__name__": "__main__"})
+    except (SystemExit, KeyboardInterrupt):
+        pass
+    except Exception:
+        traceback.print_exc()
+    finally:
+        # the GUI has copied all blocks, they are unlinked before the GUI
+        # (which may exit then) gets "done"
+        side.close()
+        conn.send(("done",))
+
+
+class _GuiSide:
+    """Applies the messages of a solver process in the GUI process."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # key -> GridFunctions and Parameters of the GUI copy of obj
+        self._leaves = {}
+        self._components = {}
+        self._blocks = {}
+        # key -> mesh, see _SolverSide._mesh_id
+        self._meshes = {}
+
+    def _loads(self, payload):
+        return _Unpickler(io.BytesIO(payload), lambda pid: self._meshes[pid[1]]).load()
+
+    def handle(self, message):
+        from . import file_loader
+
+        kind = message[0]
+        if kind == "mesh":
+            _, key, payload = message
+            self._meshes[key] = pickle.loads(payload)
+        elif kind == "draw":
+            _, key, payload = message
+            obj, mesh, name, kwargs = self._loads(payload)
+            self._leaves[key] = _leaves(obj)
+            self._components[key] = file_loader.DrawImpl(obj, mesh, name, **kwargs)
+        elif kind == "replace":
+            _, key, payload = message
+            obj, mesh = self._loads(payload)
+            self._leaves[key] = _leaves(obj)
+            comp = self._components.get(key)
+            if comp is not None and hasattr(comp, "set_function"):
+                comp.set_function(obj, mesh)
+        elif kind == "bad_elements":
+            _, payload = message
+            file_loader.ShowBadElements(*self._loads(payload))
+        elif kind == "redraw":
+            _, updates, values = message
+            try:
+                for key, i, block, dtype, shape in updates:
+                    _vector(self._leaves[key][0][i])[:] = np.ndarray(
+                        shape, dtype, buffer=self._block(block).buf
+                    )
+                for key, i, value in values:
+                    self._leaves[key][1][i].Set(value)
+            finally:
+                self.conn.send("ack")
+            file_loader.RedrawImpl()
+
+    def forward(self):
+        """Handle the messages until the script is done or the process ends."""
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                return
+            if message[0] == "done":
+                return
+            try:
+                self.handle(message)
+            except Exception:
+                traceback.print_exc()
+
+    def _block(self, name):
+        if name not in self._blocks:
+            self._blocks[name] = _attach(name)
+        return self._blocks[name]
+
+    def close(self):
+        for block in self._blocks.values():
+            block.close()
+        self._blocks.clear()
+
+
+def _attach(name):
+    try:
+        # the solver process owns (and unlinks) the block
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        # registers the name again with the resource tracker the spawned
+        # process shares with the GUI, which changes nothing
+        return shared_memory.SharedMemory(name=name)
+
+
+def run_in_process(code, name="script"):
+    """Run *code* in a solver process.
+
+    Returns ``(thread, done_event)`` like the in-process runner; *thread*
+    forwards the messages of the process as a job (see
+    :mod:`ngsolve_gui.cancel`) and its ``cancel()`` terminates the process.
+    """
+    ctx = mp.get_context("spawn")
+    gui_conn, solver_conn = ctx.Pipe()
+    process = ctx.Process(
+        target=_solver_main, args=(code, solver_conn), name="SolverProcess", daemon=True
+    )
+    process.start()
+    solver_conn.close()
+    done_event = threading.Event()
+    gui = _GuiSide(gui_conn)
+    token = cancel.CancelToken(f"Running {name}")
+    token.on_cancel(process.terminate)
+
+    def listen():
+        try:
+            with cancel.job(token.name, token):
+                gui.forward()
+        finally:
+            gui.close()
+            done_event.set()
+
+    thread = threading.Thread(target=listen, name="SolverProcess", daemon=True)
+    thread.cancel = token.cancel
+    thread.process = process
+    thread.start()
+    return thread, done_event
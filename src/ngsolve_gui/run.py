@@ -29,8 +29,17 @@ def main():
     parser.add_argument(
         "--dev-frontend", action="store_true", help="Run frontend in development mode"
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print an import-time report of the startup chain before launching",
+    )
     # get absolute path of file from command line
     args = parser.parse_args()
+    if args.profile_startup:
+        from .startup_profile import print_startup_report
+
+        print_startup_report()
     app_args = {}
     if args.filename:
         app_args["filename"] = [Path(f).resolve() for f in args.filename]
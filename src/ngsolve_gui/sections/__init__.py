@@ -1,11 +1,28 @@
-from .clipping import ClippingSection
-from .colorbar import ColorbarSection
-from .deformation import DeformationSection
-from .vectors import VectorSection
-from .fieldlines import FieldLinesSection
-from .mesh_view import MeshViewSection
-from .mesh_colors import MeshColorSection
-from .function_options import FunctionOptionsSection
-from .geometry_options import GeometryOptionsSection
-from .geometry_selection import GeometrySelectionSection
-from .entity_numbers import EntityNumbersSection
+import importlib
+
+# Section classes are imported on first access, see ngsolve_gui.registry
+_SECTIONS = {
+    "ClippingSection": "clipping",
+    "ColorbarSection": "colorbar",
+    "HistogramSection": "histogram",
+    "ExpressionProfileSection": "expression_profile",
+    "DeformationSection": "deformation",
+    "VectorSection": "vectors",
+    "FieldLinesSection": "fieldlines",
+    "ProbeSection": "probe",
+    "MeshViewSection": "mesh_view",
+    "MeshColorSection": "mesh_colors",
+    "FunctionOptionsSection": "function_options",
+    "GeometryOptionsSection": "geometry_options",
+    "GeometrySelectionSection": "geometry_selection",
+    "EntityNumbersSection": "entity_numbers",
+}
+
+__all__ = list(_SECTIONS)
+
+
+def __getattr__(name):
+    if name not in _SECTIONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_SECTIONS[name]}", __name__)
+    return getattr(module, name)
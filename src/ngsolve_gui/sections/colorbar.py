@@ -42,6 +42,14 @@ class ColorbarSection(QExpansionItem):
             ui_label="Autoscale",
             ui_model_value=comp.colormap_autoscale,
         )
+        self.robust = QCheckbox(
+            QTooltip(
+                "Autoscale to the 1st and 99th percentile of the values, "
+                "so that a few outliers do not wash out the plot"
+            ),
+            ui_label="Robust (p1–p99)",
+            ui_model_value=comp.colormap_robust,
+        )
 
         # Min/max manual edits disable autoscale
         self.minval.on_change(self._update_min)
@@ -51,7 +59,7 @@ class ColorbarSection(QExpansionItem):
         self.ncolors.on_change(self._update_ncolors)
 
         super().__init__(
-            self.autoscale,
+            Row(self.autoscale, self.robust),
             self.discrete,
             Row(self.minval, self.maxval),
             Row(self.colormap_select, self.ncolors),
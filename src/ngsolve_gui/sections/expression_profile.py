@@ -0,0 +1,59 @@
+import threading
+
+from ngapp.components import *
+
+from ngsolve_gui.cancel import Cancelled
+from ngsolve_gui.cf_profile import sample_points
+
+_MONO = "font-family: monospace; font-size: 11px; white-space: pre;"
+_MIN_PERCENT = 1.0
+
+
+class ExpressionProfileSection(QExpansionItem):
+    """Tree of the subexpressions of the function with their share of the
+    evaluation time, measured on sample points of the mesh on a worker
+    thread."""
+
+    def __init__(self, comp):
+        self.comp = comp
+        self.info = Div(ui_style="font-size: 11px; color: grey;")
+        self.tree = Div(ui_style="max-height: 360px; overflow: auto;")
+        profile_btn = QBtn(
+            QTooltip("Time every subexpression on sample points of the mesh"),
+            ui_icon="mdi-timer-sand",
+            ui_label="Profile",
+            ui_flat=True,
+            ui_color="primary",
+        )
+        profile_btn.on_click(self.refresh)
+        super().__init__(
+            profile_btn,
+            self.info,
+            self.tree,
+            ui_icon="mdi-file-tree-outline",
+            ui_label="Expression Profile",
+        )
+
+    def refresh(self, *args):
+        self.info.ui_children = ["Profiling …"]
+        threading.Thread(target=self._compute, daemon=True, name="ExpressionProfile").start()
+
+    def _compute(self):
+        try:
+            root = self.comp.profile_expression()
+        except Cancelled:
+            self.info.ui_children = ["Cancelled"]
+            return
+        npoints = len(sample_points(self.comp.mesh))
+        self.info.ui_children = [
+            f"{1e3 * root.total:.2f} ms on {npoints} points, "
+            f"subexpressions below {_MIN_PERCENT:g}% hidden"
+        ]
+        rows = [Div(f"{'total':>6} {'own':>6}  expression", ui_style=_MONO)]
+        for depth, node, total, own in root.rows(_MIN_PERCENT):
+            # subexpressions that can't be evaluated on their own
+            label = node.label if node.error is None else f"{node.label} (not timed)"
+            rows.append(
+                Div(f"{total:5.1f}% {own:5.1f}%  {'  ' * depth}{label}", ui_style=_MONO)
+            )
+        self.tree.ui_children = rows
@@ -1,5 +1,9 @@
+import threading
+
 from ngapp.components import *
 
+from ngsolve_gui.cancel import Cancelled
+
 
 class FunctionOptionsSection(QExpansionItem):
     def __init__(self, comp):
@@ -24,6 +28,15 @@ class FunctionOptionsSection(QExpansionItem):
                 ui_model_value=comp.elements2d_visible,
             )
             items.append(self.surface_solution_visible)
+            self.adaptive_order = QCheckbox(
+                QTooltip(
+                    "Draw strongly varying elements with a higher order and smooth "
+                    "ones with order 1, within the same number of function values"
+                ),
+                ui_label="Adaptive Order",
+                ui_model_value=comp.adaptive_order,
+            )
+            items.append(self.adaptive_order)
 
         if comp.mesh.dim == 3:
             self.clipping_plane_visible = QCheckbox(
@@ -65,6 +78,31 @@ class FunctionOptionsSection(QExpansionItem):
             )
             items.extend([self.complex_mode, self.complex_animate, self.complex_speed])
 
+        self.compile_mode = QSelect(
+            QTooltip(
+                "Evaluate the function compiled, faster for deep expressions. "
+                "Compiling to C++ takes seconds."
+            ),
+            ui_label="Compile",
+            ui_options=[
+                {"label": "Off", "value": "off"},
+                {"label": "Compile", "value": "compile"},
+                {"label": "Compile to C++", "value": "realcompile"},
+            ],
+            ui_model_value=comp.compile_mode,
+            ui_emit_value=True,
+            ui_map_options=True,
+        )
+        compare = QBtn(
+            ui_icon="mdi-timer-outline",
+            ui_label="Compare Evaluation Time",
+            ui_flat=True,
+            ui_color="primary",
+        )
+        compare.on_click(self._compare_compilation)
+        self.compile_info = Div()
+        items.extend([self.compile_mode, compare, self.compile_info])
+
         draw_mesh = QBtn(
             ui_icon="mdi-vector-triangle",
             ui_label="Draw Mesh",
@@ -76,6 +114,8 @@ class FunctionOptionsSection(QExpansionItem):
 
         picking = QCheckbox("Highlight on Hover", ui_model_value=comp.picking_enabled)
         items.append(picking)
+        pick_exact = QCheckbox("Exact Value When the Cursor Stops", ui_model_value=comp.pick_exact)
+        items.append(pick_exact)
 
         super().__init__(
             *items,
@@ -89,6 +129,24 @@ class FunctionOptionsSection(QExpansionItem):
         camera.reset(pmin, pmax)
         self.comp.wgpu.scene.render()
 
+    def _compare_compilation(self, *args):
+        self.compile_info.ui_children = ["Evaluating …"]
+        threading.Thread(
+            target=self._show_compilation_times, daemon=True, name="CompareCompilation"
+        ).start()
+
+    def _show_compilation_times(self):
+        try:
+            times = self.comp.compare_compilation()
+        except Cancelled:
+            self.compile_info.ui_children = []
+            return
+        self.compile_info.ui_children = [
+            f"Interpreted {1e3 * times['interpreted']:.1f} ms, "
+            f"compiled {1e3 * times['compiled']:.1f} ms "
+            f"(compilation {1e3 * times['compile_time']:.0f} ms)"
+        ]
+
     def _draw_mesh(self, *args):
         from ngsolve_gui.mesh import MeshComponent
 
@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+from ngapp.components import *
+
+_NBINS = 64
+_BAR_HEIGHT = 80
+
+
+class HistogramSection(QExpansionItem):
+    """Histogram of the drawn values; the range handles set the colormap
+    range. The histogram is binned from the uploaded values on a worker
+    thread, the function is not evaluated again. While the section is open
+    it follows every upload of new values (e.g. after a ``Redraw``)."""
+
+    def __init__(self, comp):
+        self.comp = comp
+        self._lock = threading.Lock()
+        self._worker = None
+        # log scale of the refresh the worker has still to do, None if none
+        self._pending = None
+        self._shown = False
+        self.bars = Div(
+            ui_style=(
+                f"display: flex; align-items: flex-end; gap: 1px; height: {_BAR_HEIGHT}px;"
+            )
+        )
+        self.info = Div(ui_style="font-size: 11px; color: grey;")
+        self.range = QRange(
+            ui_min=0.0,
+            ui_max=1.0,
+            ui_step=0,
+            ui_model_value={"min": 0.0, "max": 1.0},
+            ui_label=True,
+            ui_drag_range=True,
+            ui_dense=True,
+        )
+        self.range.on_update_model_value(self._update_range)
+        self.log_scale = QCheckbox(ui_label="Log Scale", ui_model_value=False)
+        self.log_scale.on_update_model_value(lambda _: self.refresh())
+        refresh_btn = QBtn(
+            QTooltip("Update from the current values"),
+            ui_icon="mdi-refresh",
+            ui_flat=True,
+            ui_dense=True,
+            ui_round=True,
+        )
+        refresh_btn.on_click(lambda _: self.refresh())
+        super().__init__(
+            self.bars,
+            self.range,
+            Row(self.log_scale, refresh_btn, ui_class="items-center justify-between"),
+            self.info,
+            ui_icon="mdi-chart-histogram",
+            ui_label="Histogram",
+        )
+        self.on_mounted(self.refresh)
+        self.on_show(self._set_shown, True)
+        self.on_hide(self._set_shown, False)
+        comp.values_version.on_change(self._values_changed)
+
+    def _set_shown(self, event):
+        self._shown = event.arg
+        if self._shown:
+            self.refresh()
+
+    def _values_changed(self, _val, _old):
+        if self._shown:
+            self.refresh()
+
+    def refresh(self):
+        """Bin the current values on the worker thread; refreshes requested
+        while it is busy are done once, with the latest values."""
+        with self._lock:
+            self._pending = bool(self.log_scale.ui_model_value)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True, name="Histogram")
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                log_scale, self._pending = self._pending, None
+                if log_scale is None:
+                    self._worker = None
+                    return
+            self._show(self.comp.value_histogram(_NBINS), log_scale)
+
+    def _show(self, hist, log_scale):
+        if hist is None:
+            self.bars.ui_children = []
+            self.info.ui_children = ["No values"]
+            return
+        counts = np.log1p(hist.counts) if log_scale else hist.counts
+        heights = 100 * counts / max(float(counts.max()), 1e-30)
+        self.bars.ui_children = [
+            Div(
+                ui_style=(
+                    f"flex: 1; height: {h:.1f}%; min-height: 1px;"
+                    " background: var(--q-primary);"
+                )
+            )
+            for h in heights
+        ]
+        span = hist.maxval - hist.minval
+        self.range.ui_min = hist.minval
+        self.range.ui_max = hist.maxval
+        self.range.ui_step = span / 1000 if span > 0 else 0
+        cmin = min(max(float(self.comp.colormap.minval), hist.minval), hist.maxval)
+        cmax = min(max(float(self.comp.colormap.maxval), hist.minval), hist.maxval)
+        self.range.ui_model_value = {"min": cmin, "max": cmax}
+        self.info.ui_children = [
+            f"min {hist.minval:.4g}  mean {hist.mean:.4g}  max {hist.maxval:.4g}  "
+            f"p1 {hist.percentile(1):.4g}  p99 {hist.percentile(99):.4g}"
+        ]
+
+    def _update_range(self, event):
+        try:
+            minval = float(event.value["min"])
+            maxval = float(event.value["max"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if minval < maxval:
+            self.comp.set_colormap_range(minval, maxval)
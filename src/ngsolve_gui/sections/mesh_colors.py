@@ -81,8 +81,9 @@ class MeshColorSection(QExpansionItem):
         self.comp.edge_colors._value = self.ecolors
         edge_descriptors = list(self.comp.mesh.ngmesh.EdgeDescriptors())
         colors = [self.ecolors[ed.name] for ed in edge_descriptors]
-        self.comp.elements1d._user_colors = colors
-        self.comp.elements1d.set_needs_update()
+        if self.comp.elements1d is not None:
+            self.comp.elements1d._user_colors = colors
+            self.comp.elements1d.set_needs_update()
         self.comp.wgpu.scene.render()
 
     def change_d_color(self, name, color):
@@ -0,0 +1,87 @@
+from ngapp.components import *
+
+
+def _format_point(point):
+    return "" if point is None else ", ".join(f"{v:.6g}" for v in point)
+
+
+def _parse_point(text):
+    values = [float(v) for v in str(text).replace(";", ",").split(",") if v.strip()]
+    if len(values) == 2:
+        values.append(0.0)
+    if len(values) != 3:
+        raise ValueError(f"Expected 'x, y, z', got {text!r}")
+    return values
+
+
+class ProbeSection(QExpansionItem):
+    def __init__(self, comp):
+        self.comp = comp
+        self.start = QInput(
+            ui_label="Start (x, y, z)",
+            ui_dense=True,
+            ui_placeholder="bounding box min",
+        )
+        self.end = QInput(
+            ui_label="End (x, y, z)",
+            ui_dense=True,
+            ui_placeholder="bounding box max",
+        )
+        self.start.on_change(lambda e: self._set_point(self.comp.probe_start, e.value))
+        self.end.on_change(lambda e: self._set_point(self.comp.probe_end, e.value))
+        self.samples = QInput(
+            ui_label="Sample Points",
+            ui_type="number",
+            ui_model_value=comp.probe_samples,
+            ui_dense=True,
+        )
+        self.plot_btn = QBtn(
+            QTooltip("Hover a point and press l 1 / l 2 to set start / end"),
+            ui_label="Plot Line",
+            ui_color="primary",
+            ui_flat=True,
+        )
+        self.plot_btn.on_click(lambda _: self.comp.plot_line_probe())
+        self.monitor = QInput(
+            ui_label="Monitor Point (x, y, z)",
+            ui_dense=True,
+        )
+        self.monitor_btn = QBtn(
+            QTooltip("Record the value at this point on every Redraw (l m: hovered point)"),
+            ui_label="Add Monitor",
+            ui_color="primary",
+            ui_flat=True,
+        )
+        self.monitor_btn.on_click(self._add_monitor)
+
+        super().__init__(
+            self.start,
+            self.end,
+            self.samples,
+            self.plot_btn,
+            self.monitor,
+            self.monitor_btn,
+            ui_icon="mdi-chart-bell-curve-cumulative",
+            ui_label="Probes",
+        )
+        self.on_mounted(self._update)
+
+    def _set_point(self, observable, text):
+        if not str(text or "").strip():
+            observable.value = None
+            return
+        try:
+            observable.value = _parse_point(text)
+        except ValueError:
+            pass
+
+    def _add_monitor(self, _event):
+        try:
+            point = _parse_point(self.monitor.ui_model_value)
+        except ValueError:
+            return
+        self.comp.monitor_point(point)
+
+    def _update(self):
+        self.start.ui_model_value = _format_point(self.comp.probe_start.value)
+        self.end.ui_model_value = _format_point(self.comp.probe_end.value)
@@ -104,8 +104,8 @@ class VectorSection(QExpansionItem):
             self.color_component.ui_model_value
         )
         comp = self.comp
-        if comp.elements2d is not None:
-            comp.elements2d.set_component(index - 1)
+        for r in comp._surface_renderers:
+            r.set_component(index - 1)
         if comp.clippingcf is not None:
             comp.clippingcf.set_component(index - 1)
         comp.colorbar.set_needs_update()
@@ -0,0 +1,48 @@
+"""Import-time report for the GUI startup chain (``ngsolve --profile-startup``)."""
+
+import subprocess
+import sys
+
+# What ``ngsolve_gui.run:main`` imports before the window shows up
+STARTUP_MODULES = ("ngsolve_gui.appconfig", "ngsolve")
+
+
+def measure_imports(modules=STARTUP_MODULES):
+    """Import *modules* in a fresh interpreter under ``python -X importtime``.
+
+    Returns a list of ``(self_us, cumulative_us, module)`` tuples in import
+    order; nested imports keep the indentation of the ``-X importtime`` output.
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+        except ValueError:
+            # header line
+            continue
+    return rows
+
+
+def print_startup_report(modules=STARTUP_MODULES, top=30, file=None):
+    """Print the *top* imports by cumulative time and the total startup import time."""
+    file = file or sys.stderr
+    rows = measure_imports(modules)
+    if not rows:
+        print("startup profile: no import timings recorded", file=file)
+        return
+    total = sum(cum for _, cum, name in rows if not name.startswith("  "))
+    print(f"Startup imports: {total / 1e6:.3f} s for {', '.join(modules)}", file=file)
+    print(f"{'self [ms]':>10} {'cumul [ms]':>11}  module", file=file)
+    for self_us, cum_us, name in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(f"{self_us / 1e3:>10.1f} {cum_us / 1e3:>11.1f}  {name.strip()}", file=file)
@@ -1,64 +1,124 @@
-"""Small toolbar widget that displays live CPU, RAM, and GPU usage with mini bars."""
+"""Small toolbar widget that displays live CPU, RAM, GPU and GUI process usage with mini bars."""
 
+import shutil
 import subprocess
+import sys
 import threading
 import time
 
-from ngapp.components import Div, QLinearProgress
-
-
-# Cache nvidia-smi availability to avoid repeated failed spawns
-_nvidia_smi_available = None
-
-
-def _get_stats():
-    """Gather system stats. Returns dict with available metrics."""
-    global _nvidia_smi_available
-    stats = {}
-
-    try:
-        import psutil
-        stats["cpu"] = psutil.cpu_percent(interval=None)
-        mem = psutil.virtual_memory()
-        stats["ram_used_gb"] = mem.used / (1024**3)
-        stats["ram_total_gb"] = mem.total / (1024**3)
-        stats["ram_percent"] = mem.percent
-    except ImportError:
-        pass
-
-    # Try nvidia-ml-py / pynvml first, fall back to nvidia-smi
-    try:
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", FutureWarning)
-            from pynvml import (nvmlInit, nvmlDeviceGetHandleByIndex,
-                                nvmlDeviceGetMemoryInfo, nvmlDeviceGetUtilizationRates)
-        nvmlInit()
-        handle = nvmlDeviceGetHandleByIndex(0)
-        mem_info = nvmlDeviceGetMemoryInfo(handle)
-        util = nvmlDeviceGetUtilizationRates(handle)
-        stats["gpu_used_gb"] = mem_info.used / (1024**3)
-        stats["gpu_total_gb"] = mem_info.total / (1024**3)
-        stats["gpu_util"] = util.gpu
-    except Exception:
-        if _nvidia_smi_available is not False:
+from ngapp.components import Div, QLinearProgress, QTooltip
+
+
+class _MetricsBackend:
+    """Metric providers (psutil, NVML or nvidia-smi) initialized once.
+
+    :meth:`sample` only queries the already open handles. nvidia-smi needs a
+    process spawn per query, so its values are refreshed at most every
+    ``smi_interval`` seconds and reused in between.
+    """
+
+    def __init__(self, app_data=None, smi_interval=5.0):
+        self._app_data = app_data
+        self._smi_interval = smi_interval
+        self._smi_stats = {}
+        self._smi_time = 0.0
+
+        try:
+            import psutil
+
+            self._psutil = psutil
+            self._process = psutil.Process()
+            # Seed psutil cpu measurement
+            psutil.cpu_percent(interval=None)
+        except ImportError:
+            self._psutil = None
+            self._process = None
+
+        # Try nvidia-ml-py / pynvml first, fall back to nvidia-smi
+        self._nvml = None
+        self._nvml_handle = None
+        try:
+            import warnings
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", FutureWarning)
+                import pynvml
+            pynvml.nvmlInit()
+            self._nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            self._nvml = pynvml
+        except Exception:
+            pass
+        self._use_smi = self._nvml is None and shutil.which("nvidia-smi") is not None
+
+    def sample(self):
+        """Gather system stats. Returns dict with available metrics."""
+        stats = {}
+        if self._psutil is not None:
+            stats["cpu"] = self._psutil.cpu_percent(interval=None)
+            mem = self._psutil.virtual_memory()
+            stats["ram_used_gb"] = mem.used / (1024**3)
+            stats["ram_total_gb"] = mem.total / (1024**3)
+            stats["ram_percent"] = mem.percent
+            try:
+                stats["proc_rss_gb"] = self._process.memory_info().rss / (1024**3)
+            except Exception:
+                pass
+
+        if self._nvml is not None:
             try:
-                out = subprocess.check_output(
-                    ["nvidia-smi",
-                     "--query-gpu=utilization.gpu,memory.used,memory.total",
-                     "--format=csv,noheader,nounits"],
-                    timeout=2, stderr=subprocess.DEVNULL,
-                ).decode().strip()
-                parts = [p.strip() for p in out.split(",")]
-                if len(parts) == 3:
-                    stats["gpu_util"] = int(parts[0])
-                    stats["gpu_used_gb"] = float(parts[1]) / 1024
-                    stats["gpu_total_gb"] = float(parts[2]) / 1024
-                    _nvidia_smi_available = True
+                mem_info = self._nvml.nvmlDeviceGetMemoryInfo(self._nvml_handle)
+                util = self._nvml.nvmlDeviceGetUtilizationRates(self._nvml_handle)
+                stats["gpu_used_gb"] = mem_info.used / (1024**3)
+                stats["gpu_total_gb"] = mem_info.total / (1024**3)
+                stats["gpu_util"] = util.gpu
             except Exception:
-                _nvidia_smi_available = False
+                pass
+        elif self._use_smi:
+            now = time.monotonic()
+            if now - self._smi_time >= self._smi_interval:
+                self._smi_time = now
+                self._smi_stats = self._query_nvidia_smi()
+            stats.update(self._smi_stats)
+
+        # Only report TaskManager threads once ngsolve is loaded anyway
+        ngs = sys.modules.get("ngsolve")
+        if ngs is not None:
+            try:
+                stats["ngs_threads"] = ngs.GetNumThreads()
+            except Exception:
+                pass
+
+        if self._app_data is not None:
+            stats["gpu_cache_mb"] = self._app_data.gpu_cache_nbytes() / (1024**2)
+        return stats
 
-    return stats
+    def _query_nvidia_smi(self):
+        try:
+            out = subprocess.check_output(
+                ["nvidia-smi",
+                 "--query-gpu=utilization.gpu,memory.used,memory.total",
+                 "--format=csv,noheader,nounits"],
+                timeout=2, stderr=subprocess.DEVNULL,
+            ).decode().strip()
+        except Exception:
+            self._use_smi = False
+            return {}
+        parts = [p.strip() for p in out.split(",")]
+        if len(parts) != 3:
+            return {}
+        return {
+            "gpu_util": int(parts[0]),
+            "gpu_used_gb": float(parts[1]) / 1024,
+            "gpu_total_gb": float(parts[2]) / 1024,
+        }
+
+    def close(self):
+        if self._nvml is not None:
+            try:
+                self._nvml.nvmlShutdown()
+            except Exception:
+                pass
+            self._nvml = None
 
 
 def _color_for_percent(pct):
@@ -72,7 +132,7 @@ def _color_for_percent(pct):
 class _StatBar(Div):
     """A single labeled mini-bar showing one metric."""
 
-    def __init__(self, label, icon_name):
+    def __init__(self, label, icon_name, tooltip=False):
         self._label = Div(
             label,
             ui_style="font-size:11px; font-weight:600; color:#fff; display:inline;",
@@ -94,17 +154,19 @@ class _StatBar(Div):
             self._value,
             ui_style="display:flex; align-items:baseline; gap:5px;",
         )
+        self._tooltip = QTooltip("") if tooltip else None
 
         super().__init__(
-            header,
-            self._bar,
+            *[c for c in (header, self._bar, self._tooltip) if c is not None],
             ui_style="display:flex; flex-direction:column; gap:2px; min-width:80px;",
         )
 
-    def update(self, value_text, fraction, color):
+    def update(self, value_text, fraction, color, tooltip=None):
         self._value.ui_children = [value_text]
         self._bar.ui_value = max(0.0, min(1.0, fraction))
         self._bar.ui_color = color
+        if tooltip is not None and self._tooltip is not None:
+            self._tooltip.ui_children = [tooltip]
 
 
 class SystemMonitor(Div):
@@ -116,35 +178,46 @@ class SystemMonitor(Div):
         "background: rgba(0,0,0,0.25); border-radius: 8px;"
     )
 
-    def __init__(self, update_interval=0.5):
+    def __init__(self, update_interval=0.5, hidden_interval=5.0, app_data=None):
         self._interval = update_interval
+        self._hidden_interval = hidden_interval
+        self._visible = True
+        self._wake = threading.Event()
         self._cpu_bar = _StatBar("CPU", "mdi-chip")
         self._ram_bar = _StatBar("RAM", "mdi-memory")
         self._gpu_bar = _StatBar("GPU", "mdi-expansion-card")
         self._vram_bar = _StatBar("VRAM", "mdi-expansion-card-variant")
+        self._proc_bar = _StatBar("PROC", "mdi-application-cog", tooltip=True)
 
         super().__init__(
             self._cpu_bar,
             self._ram_bar,
             self._gpu_bar,
             self._vram_bar,
+            self._proc_bar,
             ui_style=self._STYLE,
         )
 
         self._running = True
-        # Seed psutil cpu measurement
-        try:
-            import psutil
-            psutil.cpu_percent(interval=None)
-        except ImportError:
-            pass
-        threading.Thread(target=self._poll, daemon=True).start()
+        self._backend = _MetricsBackend(app_data)
+        threading.Thread(target=self._poll, daemon=True, name="SystemMonitor").start()
+
+    def set_visible(self, visible):
+        """Poll at the full rate only while the window is visible."""
+        self._visible = bool(visible)
+        if self._visible:
+            self._wake.set()
 
     def _poll(self):
         while self._running:
-            time.sleep(self._interval)
-            stats = _get_stats()
+            interval = self._interval if self._visible else self._hidden_interval
+            self._wake.wait(interval)
+            self._wake.clear()
+            if not self._running:
+                break
+            stats = self._backend.sample()
             self._refresh(stats)
+        self._backend.close()
 
     def _refresh(self, stats):
         if "cpu" in stats:
@@ -175,5 +248,19 @@ class SystemMonitor(Div):
         else:
             self._vram_bar.update("N/A", 0, "#475569")
 
+        if "proc_rss_gb" in stats:
+            rss = stats["proc_rss_gb"]
+            total = stats.get("ram_total_gb", 0)
+            pct = (rss / total * 100) if total > 0 else 0
+            details = [f"GUI process RSS: {rss:.2f} GB"]
+            if "ngs_threads" in stats:
+                details.append(f"TaskManager threads: {stats['ngs_threads']}")
+            if "gpu_cache_mb" in stats:
+                details.append(f"GPU data cache: {stats['gpu_cache_mb']:.1f} MB")
+            self._proc_bar.update(
+                f"{rss:.1f}G", pct / 100, _color_for_percent(pct), " \u00b7 ".join(details)
+            )
+
     def stop(self):
         self._running = False
+        self._wake.set()
@@ -0,0 +1,618 @@
+"""Out-of-core rendering of large meshes in spatial tiles.
+
+The surface and volume elements are split into tiles by an octree over the
+element centroids. Only the tiles intersecting the view frustum are built
+and uploaded; tiles entirely on the cut-away side of the clipping plane are
+skipped, renderers of the cut (``ClippingCF``) only get the tiles the plane
+passes through. Tiles that went out of view stay cached until the cached
+data exceeds a memory budget, then the least recently visible ones are
+dropped::
+
+    tiles = TiledMesh(mesh)
+    wireframe = tiles.renderer(lambda tile: MeshWireframe2d(tile.mesh_data(), clipping=clipping))
+    scene = Draw([wireframe, ...])
+    tiles.attach(scene, clipping)  # follow camera and clipping plane
+
+Every tile is a ``MeshData`` of the tile's elements only: its element and
+vertex arrays hold the tile's rows, functions are evaluated on the tile's
+elements (see :mod:`ngsolve_gui.element_eval`). Renderers that need the whole
+mesh (segments, entity numbers, vectors) are not drawn for tiled meshes.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from ngsolve_webgpu.mesh import MeshBuffers
+from webgpu.renderer import BaseRenderer, MultipleRenderer, SelectEvent
+
+from .timed_data import TimedMeshData
+
+# elements per tile
+DEFAULT_TILE_ELEMENTS = 250_000
+# cached tile data kept beyond the visible tiles, in bytes
+DEFAULT_MEMORY_BUDGET = 512 * 2**20
+# surface elements from which components draw meshes tiled by default
+TILED_THRESHOLD = 2_000_000
+
+_CHUNK = 2**20
+
+
+def use_tiles(mesh, tiled=None):
+    """Whether to draw *mesh* tiled: *tiled* if given, else by its size."""
+    if tiled is not None:
+        return bool(tiled)
+    ngmesh = mesh.mesh.ngmesh if hasattr(mesh, "mesh") else mesh.ngmesh
+    return len(ngmesh.Elements2D()) > TILED_THRESHOLD
+
+
+def _element_boxes(els, coords):
+    """Centroids and bounding boxes of the elements of a netgen element array."""
+    from ngsolve_webgpu.mesh import POINTINDEX_BASE
+
+    n = len(els)
+    centers = np.empty((n, 3))
+    pmin = np.empty((n, 3))
+    pmax = np.empty((n, 3))
+    for start in range(0, n, _CHUNK):
+        nodes = els["nodes"][start : start + _CHUNK].astype(np.int64)
+        # unused node slots (quads in trig arrays, ...) are 0
+        used = nodes > 0
+        nodes = np.where(used, nodes, nodes[:, :1]) - POINTINDEX_BASE
+        pts = coords[nodes]
+        s = slice(start, start + len(nodes))
+        pmin[s] = pts.min(axis=1)
+        pmax[s] = pts.max(axis=1)
+        centers[s] = (pts * used[..., None]).sum(axis=1) / used.sum(axis=1)[:, None]
+    return centers, pmin, pmax
+
+
+def octree_leaves(points, max_points=DEFAULT_TILE_ELEMENTS, max_depth=16):
+    """Index arrays (sorted) of the points in the non-empty leaves of an octree.
+
+    Cells are split at their midpoint until they hold at most *max_points*.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return []
+    leaves = []
+    stack = [(np.arange(len(points)), points.min(axis=0), points.max(axis=0), 0)]
+    while stack:
+        idx, lo, hi, depth = stack.pop()
+        if len(idx) <= max_points or depth >= max_depth:
+            leaves.append(np.sort(idx))
+            continue
+        mid = 0.5 * (lo + hi)
+        above = points[idx] > mid
+        code = above[:, 0] | (above[:, 1] << 1) | (above[:, 2] << 2)
+        for child in range(8):
+            sub = idx[code == child]
+            if len(sub) == 0:
+                continue
+            bits = np.array([child & 1, child & 2, child & 4], dtype=bool)
+            stack.append((sub, np.where(bits, mid, lo), np.where(bits, hi, mid), depth + 1))
+    return leaves
+
+
+def _corners(pmin, pmax):
+    """The 8 corners of each of the boxes, shape (n, 8, 3)."""
+    pmin = np.asarray(pmin, dtype=float)
+    pmax = np.asarray(pmax, dtype=float)
+    bits = np.array([[(c >> k) & 1 for k in range(3)] for c in range(8)], dtype=bool)
+    return np.where(bits[None], pmax[:, None], pmin[:, None])
+
+
+def frustum_mask(pmin, pmax, camera, aspect=1.0):
+    """Boxes that may intersect the view frustum of *camera*."""
+    from webgpu.camera import FOCAL, _projection_matrix
+
+    view = np.identity(4)
+    view[2, 3] = -FOCAL
+    mvp = _projection_matrix(aspect, camera.orthographic) @ view @ camera.transform.mat
+    corners = _corners(pmin, pmax)
+    clip = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2) @ mvp.T
+    x, y, z, w = np.moveaxis(clip, 2, 0)
+    outside = np.zeros(len(corners), dtype=bool)
+    # clip space: -w <= x, y <= w and 0 <= z <= w
+    for side in (w + x, w - x, w + y, w - y, z, w - z):
+        outside |= np.all(side < 0, axis=1)
+    return ~outside
+
+
+def plane_side(pmin, pmax, clipping):
+    """Min and max of the clipping plane function over the corners of the boxes.
+
+    Points with a positive value are clipped away.
+    """
+    n = np.asarray(clipping.normal, dtype=float)
+    norm = np.linalg.norm(n)
+    n = np.array([0.0, 0.0, -1.0]) if norm == 0 else n / norm
+    c = np.asarray(clipping.center, dtype=float) + clipping.offset * n
+    values = _corners(pmin, pmax) @ n - np.dot(c, n)
+    return values.min(axis=1), values.max(axis=1)
+
+
+class _TileMesh:
+    """The netgen mesh as seen by the ``MeshBuffers`` of one tile.
+
+    Element arrays hold the rows of the tile's elements only, their vertex
+    numbers refer to the tile's vertices, so the packed vertex array holds
+    just those; ``element_numbers`` maps the rows back to the elements of
+    the mesh. Only what the tile renderers need is provided; whole-mesh
+    data (segments, identifications) is not available per tile.
+    """
+
+    def __init__(self, ngmesh, tile):
+        self._mesh = ngmesh
+        self._tile = tile
+        self._key = None
+        self._elements = {}
+        self._coords = None
+
+    @property
+    def _timestamp(self):
+        return self._mesh._timestamp
+
+    def GetCurveOrder(self):
+        return self._mesh.GetCurveOrder()
+
+    def FaceDescriptors(self):
+        return self._mesh.FaceDescriptors()
+
+    @property
+    def bounding_box(self):
+        return self._tile.pmin, self._tile.pmax
+
+    def element_numbers(self, dim):
+        """Numbers in the mesh of the rows of ``Elements2D``/``Elements3D``."""
+        return self._tile.el2d if dim == 2 else self._tile.el3d
+
+    def _compact(self):
+        from ngsolve_webgpu.mesh import POINTINDEX_BASE
+
+        if self._key == self._mesh._timestamp:
+            return
+        els = {
+            2: self._mesh.Elements2D().NumPy()[self._tile.el2d],
+            3: self._mesh.Elements3D().NumPy()[self._tile.el3d],
+        }
+        nodes = np.concatenate([e["nodes"].ravel() for e in els.values()])
+        used = np.unique(nodes[nodes > 0]) - POINTINDEX_BASE
+        self._coords = np.asarray(self._mesh.Coordinates())[used]
+        for e in els.values():
+            # unused node slots (quads in trig arrays, ...) stay 0
+            nodes = e["nodes"]
+            slots = nodes > 0
+            nodes[slots] = np.searchsorted(used, nodes[slots] - POINTINDEX_BASE) + POINTINDEX_BASE
+            e["nodes"] = nodes
+        self._elements = els
+        self._key = self._mesh._timestamp
+
+    def Elements2D(self):
+        self._compact()
+        return _Elements(self._elements[2])
+
+    def Elements3D(self):
+        self._compact()
+        return _Elements(self._elements[3])
+
+    def Coordinates(self):
+        self._compact()
+        return self._coords
+
+    def Points(self):
+        self._compact()
+        return self._coords
+
+    def nbytes(self):
+        arrays = [self._coords, *self._elements.values()]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+
+class _TileBuffers(MeshBuffers):
+    """Private ``MeshBuffers`` of a tile, built from its :class:`_TileMesh`.
+
+    The curvature is evaluated on the tile's elements only, see
+    :mod:`ngsolve_gui.element_eval`.
+    """
+
+    def __init__(self, tile):
+        super().__init__(tile.owner.region_or_mesh)
+        self.mesh = _TileMesh(self.mesh, tile)
+
+    def _create_data(self):
+        super()._create_data()
+        if self.curvature_data is not None:
+            from .timed_data import TimedFunctionData
+
+            self.curvature_data = TimedFunctionData(
+                self, self.curvature_data.cf, self.curvature_data.order
+            )
+
+    def _compute_curvature_3d(self, mesh, order):
+        import ngsolve as ngs
+
+        if order == 1:
+            return super()._compute_curvature_3d(mesh, order)
+        # as upstream, with the points mapped on the tile's elements only
+        # instead of on all elements of the mesh
+        from ngsolve_webgpu.cf import (
+            get_3d_intrules,
+            get_hex_intrule,
+            get_prism_intrule,
+            get_pyramid_intrule,
+            vandermonde_3d,
+            vandermonde_hex,
+            vandermonde_prism,
+        )
+        from ngsolve_webgpu.mesh import _true_map_mask
+
+        from .element_eval import _element_np, element_points
+
+        els = mesh.Elements3D().NumPy()
+        if len(els) == 0:
+            self.curvature_3d_data = None
+            return
+        nps = _element_np(els)
+        true_map = _true_map_mask(els, mesh.Coordinates(), order)
+        nrs = mesh.element_numbers(3)
+        lookup = np.full(len(els), -1, dtype=np.int32)
+        coeffs = []
+        offset = 0
+        cf = ngs.CF((ngs.x, ngs.y, ngs.z))
+        for nv, rule, vinv in (
+            (4, get_3d_intrules(order)[ngs.ET.TET], vandermonde_3d(order)),
+            (8, get_hex_intrule(order), vandermonde_hex(order)),
+            (6, get_prism_intrule(order), vandermonde_prism(order)),
+            (5, get_pyramid_intrule(order), vandermonde_hex(order)),
+        ):
+            ids = np.flatnonzero(true_map & (nps == nv))
+            if len(ids) == 0:
+                continue
+            ndof = len(rule)
+            pts = element_points(self.ngs_mesh, ngs.VOL, nrs[ids], [ip.point for ip in rule])
+            with ngs.TaskManager():
+                pmat = cf(pts).reshape(-1, ndof, 3)
+            coeffs.append(np.einsum("ij,njk->nik", vinv, pmat).astype(np.float32).ravel())
+            lookup[ids] = offset + ndof * 3 * np.arange(len(ids))
+            offset += ndof * 3 * len(ids)
+        header = np.array([order, int(np.sum(lookup >= 0))], dtype=np.int32)
+        parts = [header, lookup]
+        if coeffs:
+            parts.append(np.concatenate(coeffs).view(np.int32))
+        self.curvature_3d_data = np.concatenate(parts)
+
+
+class _TileMeshData(TimedMeshData):
+    """The ``MeshData`` of one tile, see :class:`_TileBuffers`."""
+
+    def __init__(self, tile):
+        # an empty bit array gets private buffers, which are replaced; the
+        # shared buffers of the whole mesh are not touched
+        super().__init__(tile.owner.region_or_mesh, el2d_bitarray=())
+        self.mesh_buffers = _TileBuffers(tile)
+
+
+class _Elements:
+    def __init__(self, els):
+        self._els = els
+
+    def NumPy(self):
+        return self._els
+
+    def __len__(self):
+        return len(self._els)
+
+
+class Tile:
+    """A spatial tile: its elements, bounding box and (once visible) its data."""
+
+    def __init__(self, owner, index, el2d, el3d, pmin, pmax):
+        self.owner = owner
+        self.index = index
+        self.el2d = el2d
+        self.el3d = el3d
+        self.pmin = pmin
+        self.pmax = pmax
+        self.data = {}
+
+    def mesh_data(self):
+        """The ``MeshData`` of the tile's elements."""
+        if "mesh" not in self.data:
+            owner = self.owner
+            mdata = _TileMeshData(self)
+            if owner.subdivision is not None:
+                mdata.subdivision = owner.subdivision
+            if owner.deformation is not None:
+                from .timed_data import TimedFunctionData
+
+                mdata.deformation_data = TimedFunctionData(mdata, owner.deformation, order=1)
+                mdata.deformation_scale = owner.deformation_scale
+            self.data["mesh"] = mdata
+        return self.data["mesh"]
+
+    def function_data(self, cf, order, **kwargs):
+        """The ``FunctionData`` of *cf* on the tile's elements."""
+        # as in AppData; the data holds *cf*, so its repr is not reused
+        key = ("function", hash((repr(cf), order, tuple(sorted(kwargs.items())))))
+        if key not in self.data or self.data[key].cf is not cf:
+            from .timed_data import TimedFunctionData
+
+            self.data[key] = TimedFunctionData(self.mesh_data(), cf, order=order, **kwargs)
+        return self.data[key]
+
+    def nbytes(self):
+        from .app_data import _uploaded_arrays
+
+        seen = set()
+        total = 0
+        for data in self.data.values():
+            for arr in _uploaded_arrays(data):
+                if arr is not None and id(arr) not in seen:
+                    seen.add(id(arr))
+                    total += getattr(arr, "nbytes", None) or len(arr)
+        if "mesh" in self.data:
+            # the tile's rows of the element and vertex arrays
+            total += self.data["mesh"].mesh.nbytes()
+        return total
+
+    def release(self):
+        self.data = {}
+
+
+class TiledMesh:
+    """A mesh split into :class:`Tile` s, shown through :class:`TiledRenderer` s.
+
+    Args:
+        mesh: ngsolve ``Mesh`` or ``Region``
+        max_elements: elements (surface plus volume) per tile
+        memory_budget: bytes of cached data of tiles that are out of view
+        deformation: CoefficientFunction deforming the surface (order 1)
+    """
+
+    def __init__(
+        self,
+        mesh,
+        max_elements=DEFAULT_TILE_ELEMENTS,
+        memory_budget=DEFAULT_MEMORY_BUDGET,
+        deformation=None,
+    ):
+        self.region_or_mesh = mesh
+        self.memory_budget = memory_budget
+        self.deformation = deformation
+        self._deformation_scale = 1.0
+        self.subdivision = None
+        self.renderers = []
+        self.visible = []
+        self._loaded = OrderedDict()
+        self._scene = None
+        self._clipping = None
+        self._refresh_callback = self.refresh
+
+        ngmesh = mesh.mesh.ngmesh if hasattr(mesh, "mesh") else mesh.ngmesh
+        coords = np.asarray(ngmesh.Coordinates())
+        if coords.shape[1] == 2:
+            coords = np.hstack([coords, np.zeros((len(coords), 1))])
+        c2, min2, max2 = _element_boxes(ngmesh.Elements2D().NumPy(), coords)
+        c3, min3, max3 = _element_boxes(ngmesh.Elements3D().NumPy(), coords)
+        self.ne2d, self.ne3d = len(c2), len(c3)
+        centers = np.concatenate([c2, c3])
+        pmin = np.concatenate([min2, min3])
+        pmax = np.concatenate([max2, max3])
+        self.tiles = []
+        for i, idx in enumerate(octree_leaves(centers, max_elements)):
+            self.tiles.append(
+                Tile(
+                    self,
+                    i,
+                    idx[idx < self.ne2d],
+                    idx[idx >= self.ne2d] - self.ne2d,
+                    pmin[idx].min(axis=0),
+                    pmax[idx].max(axis=0),
+                )
+            )
+        self.pmin = np.array([t.pmin for t in self.tiles]).reshape(-1, 3)
+        self.pmax = np.array([t.pmax for t in self.tiles]).reshape(-1, 3)
+
+    @property
+    def deformation_scale(self):
+        return self._deformation_scale
+
+    @deformation_scale.setter
+    def deformation_scale(self, value):
+        self._deformation_scale = value
+        for tile in self._loaded.values():
+            if "mesh" in tile.data:
+                tile.data["mesh"].deformation_scale = value
+
+    def get_bounding_box(self):
+        if not self.tiles:
+            return None
+        return self.pmin.min(axis=0).tolist(), self.pmax.max(axis=0).tolist()
+
+    def renderer(self, factory, volume=False, on_plane=False):
+        """A :class:`TiledRenderer` drawing ``factory(tile)`` for the visible tiles."""
+        r = TiledRenderer(self, factory, volume=volume, on_plane=on_plane)
+        self.renderers.append(r)
+        r.show(self.visible, self._clipping)
+        return r
+
+    # -- Visibility ------------------------------------------------------------
+
+    def visible_tiles(self, camera, aspect=1.0, clipping=None):
+        """Indices of the tiles in the view frustum, not entirely clipped away."""
+        if not self.tiles:
+            return []
+        mask = frustum_mask(self.pmin, self.pmax, camera, aspect)
+        if _plane_active(clipping):
+            vmin, _ = plane_side(self.pmin, self.pmax, clipping)
+            mask &= vmin <= 0
+        return np.flatnonzero(mask).tolist()
+
+    def update_view(self, camera, aspect=1.0, clipping=None):
+        """Show the tiles visible for *camera* and *clipping*, return whether
+        the set of shown tiles changed."""
+        visible = self.visible_tiles(camera, aspect, clipping)
+        plane = self._plane_key(clipping)
+        if visible == self.visible and plane == getattr(self, "_plane", None):
+            return False
+        self.visible = visible
+        self._plane = plane
+        for i in visible:
+            self._loaded[i] = self.tiles[i]
+            self._loaded.move_to_end(i)
+        self._evict()
+        for r in self.renderers:
+            r.show(visible, clipping)
+        return True
+
+    @staticmethod
+    def _plane_key(clipping):
+        if not _plane_active(clipping):
+            return None
+        return (tuple(clipping.normal), tuple(clipping.center), clipping.offset)
+
+    def _evict(self):
+        visible = set(self.visible)
+        cached = [(i, t.nbytes()) for i, t in self._loaded.items() if i not in visible]
+        total = sum(size for _, size in cached)
+        # least recently visible first
+        for i, size in cached:
+            if total <= self.memory_budget:
+                break
+            self._loaded.pop(i).release()
+            total -= size
+            for r in self.renderers:
+                r.forget(i)
+
+    def reset(self, keep_data=True):
+        """Stop following the scene and drop the renderers, for a new draw.
+        Without *keep_data* the cached tile data is released as well."""
+        self.detach()
+        self.renderers = []
+        self.visible = []
+        if not keep_data:
+            for tile in self._loaded.values():
+                tile.release()
+            self._loaded.clear()
+
+    def loaded(self):
+        """Indices of the tiles with cached data, least recently visible first."""
+        return list(self._loaded)
+
+    def nbytes(self):
+        return sum(t.nbytes() for t in self._loaded.values())
+
+    def set_needs_update(self):
+        """Re-evaluate the functions of all cached tiles when they are drawn next."""
+        for tile in self._loaded.values():
+            for key, data in tile.data.items():
+                if key != "mesh":
+                    data.set_needs_update()
+
+    # -- Following a scene -----------------------------------------------------
+
+    def attach(self, scene, clipping=None):
+        """Update the shown tiles whenever the camera or *clipping* changes."""
+        self.detach()
+        self._scene = scene
+        self._clipping = clipping
+        scene.options.camera.register_observer(self._refresh_callback)
+        if clipping is not None:
+            clipping.callbacks.append(self._refresh_callback)
+        self.refresh()
+
+    def detach(self):
+        if self._scene is not None:
+            self._scene.options.camera.unregister_observer(self._refresh_callback)
+        if self._clipping is not None and self._refresh_callback in self._clipping.callbacks:
+            self._clipping.callbacks.remove(self._refresh_callback)
+        self._scene = None
+        self._clipping = None
+
+    def refresh(self):
+        scene = self._scene
+        if scene is None:
+            return
+        canvas = scene.canvas
+        aspect = canvas.width / canvas.height if canvas is not None and canvas.height else 1.0
+        if self.update_view(scene.options.camera, aspect, self._clipping):
+            scene.render()
+
+
+def _plane_active(clipping):
+    return clipping is not None and bool(clipping.mode & clipping.Mode.PLANE)
+
+
+class TiledRenderer(MultipleRenderer):
+    """Draws one renderer per visible tile of a :class:`TiledMesh`.
+
+    Renderers of tiles that go out of view are kept while the tile data is
+    cached. Pick events report element numbers of the whole mesh.
+    """
+
+    def __init__(self, tiles, factory, volume=False, on_plane=False):
+        super().__init__([])
+        self.tiles = tiles
+        self.factory = factory
+        self.volume = volume
+        self.on_plane = on_plane
+        self._renderers = {}
+        self._setup = {}
+
+    @property
+    def renderers(self):
+        """All renderers created so far, including the ones out of view."""
+        return list(self._renderers.values())
+
+    def apply(self, func, key=None):
+        """Call ``func(renderer)`` for the tile renderers, also for the ones
+        created later. A later call with the same *key* replaces it."""
+        self._setup[key if key is not None else object()] = func
+        for r in self._renderers.values():
+            func(r)
+
+    def set_component(self, component):
+        self.apply(lambda r: r.set_component(component), key="component")
+
+    def show(self, visible, clipping=None):
+        if self.on_plane:
+            if _plane_active(clipping):
+                vmin, vmax = plane_side(self.tiles.pmin[visible], self.tiles.pmax[visible], clipping)
+                visible = [i for i, lo, hi in zip(visible, vmin, vmax) if lo <= 0 <= hi]
+            else:
+                visible = []
+        objects = []
+        for i in visible:
+            tile = self.tiles.tiles[i]
+            if len(tile.el3d if self.volume else tile.el2d) == 0:
+                continue
+            if i not in self._renderers:
+                self._renderers[i] = self._create(tile)
+            objects.append(self._renderers[i])
+        self.render_objects = objects
+        BaseRenderer.set_needs_update(self)
+
+    def forget(self, index):
+        self._renderers.pop(index, None)
+
+    def _create(self, tile):
+        r = self.factory(tile)
+        for func in self._setup.values():
+            func(r)
+        r.on_select(lambda ev, t=tile: self._forward_select(ev, t))
+        return r
+
+    def _forward_select(self, ev, tile):
+        elements = tile.el3d if self.volume else tile.el2d
+        data = bytearray(ev.data)
+        local = int(np.frombuffer(ev.user_data[:4], dtype=np.uint32)[0])
+        if local < len(elements):
+            data[8:12] = np.uint32(elements[local]).tobytes()
+        self._handle_on_select(SelectEvent(ev.x, ev.y, bytes(data)))
+
+    def get_bounding_box(self):
+        return self.tiles.get_bounding_box()
+
+    def set_needs_update(self):
+        super().set_needs_update()
+        self.tiles.set_needs_update()
@@ -0,0 +1,212 @@
+"""``MeshData``/``FunctionData`` that record how long their builds take.
+
+Each instance keeps the timings of its last build in ``build_timings``
+(phase -> seconds) and reports it to :func:`ngsolve_gui.timing.record_build`.
+``TimedFunctionData`` also provides the value statistics of its last
+build, see :mod:`ngsolve_gui.value_stats`.
+
+Builds check for cancellation (see :mod:`ngsolve_gui.cancel`) between
+their phases and between the chunks of the evaluation; a cancelled build
+keeps the previous data and still needs an update.
+"""
+
+import threading
+import time
+
+from ngsolve_webgpu import FunctionData, MeshData
+
+from .cancel import Cancelled, check_cancelled
+from .element_eval import evaluate_surface, evaluate_volume
+from .timing import record_build
+from .tracing import span
+from .value_stats import compute_statistics, robust_range
+
+
+class TimedMeshData(MeshData):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.build_timings = {}
+        self._upload_pending = False
+
+    def update(self, options):
+        if not self.needs_update:
+            return super().update(options)
+        check_cancelled()
+        start = time.perf_counter()
+        with span("build mesh data", elements=self.ngs_mesh.ne):
+            super().update(options)
+        self.build_timings = {"pack": time.perf_counter() - start}
+        self._upload_pending = True
+
+    def get_buffers(self):
+        start = time.perf_counter()
+        buffers = super().get_buffers()
+        if self._upload_pending:
+            self._upload_pending = False
+            self.build_timings["upload"] = time.perf_counter() - start
+            record_build("mesh", repr(self.ngs_mesh), self.build_timings)
+        return buffers
+
+
+class TimedFunctionData(FunctionData):
+    """With ``robust_range`` set, ``minval``/``maxval`` (which the renderers
+    use for colormap autoscaling) are the 1st and 99th percentiles of the
+    values instead of their extremes.
+
+    The value ``statistics`` are computed from the uploaded arrays when they
+    are first needed: during the build if ``robust_range`` is set, else on
+    the first access (the histogram section reads them on a worker thread).
+    """
+
+    _minval = [0, 0]
+    _maxval = [1, 1]
+    # (statistics, robust range) of the current data, None until computed
+    _statistics = None
+    # restored when a build is cancelled
+    _BUILD_STATE = ("data_2d", "data_3d", "_minval", "_maxval", "_statistics", "order")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.robust_range = False
+        self.build_timings = {}
+        self._upload_pending = False
+        self._upload_callbacks = []
+        self._statistics_lock = threading.Lock()
+
+    def on_upload(self, callback):
+        """Call ``callback()`` after each upload of newly built data (on the
+        thread that renders). Adding a callback again has no effect."""
+        if callback not in self._upload_callbacks:
+            self._upload_callbacks.append(callback)
+
+    def update(self, options):
+        if not self.needs_update:
+            return super().update(options)
+        self.build_timings = {}
+        check_cancelled()
+        state = {name: getattr(self, name, None) for name in self._BUILD_STATE}
+        start = time.perf_counter()
+        try:
+            with span(
+                "build function data",
+                function=str(self.cf)[:80],
+                elements=self.mesh_data.ngs_mesh.ne,
+            ) as args:
+                super().update(options)
+                args.update(self.build_timings)
+        except Cancelled:
+            with self._statistics_lock:
+                self.__dict__.update(state)
+            self._timestamp = -1
+            raise
+        total = time.perf_counter() - start
+        # Mesh packing runs inside the update, before the evaluation
+        self.build_timings["pack"] = (
+            total
+            - self.build_timings.get("evaluate", 0.0)
+            - self.build_timings.get("statistics", 0.0)
+        )
+        self._upload_pending = True
+
+    @property
+    def statistics(self):
+        """Value statistics of the current data (see
+        :func:`~ngsolve_gui.value_stats.compute_statistics`), or ``None``."""
+        return self._value_statistics()[0]
+
+    def _value_statistics(self):
+        with self._statistics_lock:
+            if self._statistics is None:
+                stats = compute_statistics(self.data_2d, self.data_3d)
+                robust = None
+                if stats is not None:
+                    robust = robust_range(stats, self._minval, self._maxval)
+                self._statistics = (stats, robust)
+            return self._statistics
+
+    @property
+    def minval(self):
+        if self.robust_range:
+            robust = self._value_statistics()[1]
+            if robust is not None:
+                return robust[0]
+        return self._minval
+
+    @minval.setter
+    def minval(self, value):
+        self._minval = value
+
+    @property
+    def maxval(self):
+        if self.robust_range:
+            robust = self._value_statistics()[1]
+            if robust is not None:
+                return robust[1]
+        return self._maxval
+
+    @maxval.setter
+    def maxval(self, value):
+        self._maxval = value
+
+    def _create_data(self):
+        check_cancelled()
+        start = time.perf_counter()
+        self._evaluate()
+        self.build_timings["evaluate"] = time.perf_counter() - start
+        check_cancelled()
+        with self._statistics_lock:
+            self._statistics = None
+        if self.robust_range:
+            # the renderers autoscale to the robust range right after the build
+            start = time.perf_counter()
+            self._value_statistics()
+            self.build_timings["statistics"] = time.perf_counter() - start
+
+    def _evaluate(self):
+        # as FunctionData._create_data, but evaluated on the drawn elements
+        # only instead of on all elements of the region
+        import ngsolve as ngs
+
+        self.order = self._base_order
+        if self.mesh_data.num_elements.get("quads", 0):
+            self.order = 2 * self._base_order
+        surface = None
+        try:
+            surface = evaluate_surface(self.cf, self.mesh_data, self.order)
+        except Exception:
+            # volume-only functions (e.g. MaterialCF)
+            try:
+                surface = evaluate_surface(
+                    ngs.BoundaryFromVolumeCF(self.cf), self.mesh_data, self.order
+                )
+            except Exception:
+                pass
+        if surface is None:
+            self.data_2d = None
+            self.minval = [1e99] * (self.cf.dim + 1)
+            self.maxval = [-1e99] * (self.cf.dim + 1)
+        else:
+            self.data_2d, self.minval, self.maxval = surface
+        if self.need_3d:
+            check_cancelled()
+            try:
+                volume = evaluate_volume(self.cf, self.mesh_data, self.order_3d)
+            except Exception:
+                volume = None
+            if volume is None:
+                self.data_3d = None
+            else:
+                self.data_3d, minval, maxval = volume
+                self.minval = [min(v1, v2) for v1, v2 in zip(self._minval, minval)]
+                self.maxval = [max(v1, v2) for v1, v2 in zip(self._maxval, maxval)]
+
+    def get_buffers(self, include_mesh_data=True):
+        start = time.perf_counter()
+        buffers = super().get_buffers(include_mesh_data)
+        if self._upload_pending:
+            self._upload_pending = False
+            self.build_timings["upload"] = time.perf_counter() - start
+            record_build("function", str(self.cf), self.build_timings)
+            for callback in list(self._upload_callbacks):
+                callback()
+        return buffers
@@ -0,0 +1,124 @@
+"""Frame and GPU data build timings.
+
+Frame times are measured on the Python side of a scene render: pipeline
+updates plus command encoding, or the sync with the JS render engine. The
+time the browser spends executing the frame on the GPU is not included.
+
+Build timings are recorded by the ``MeshData``/``FunctionData`` subclasses
+in :mod:`ngsolve_gui.timed_data`, split into the phases
+
+* ``evaluate``: evaluating the CoefficientFunction (``FunctionData`` only),
+* ``statistics``: the value statistics (``FunctionData`` with a robust
+  colormap range only),
+* ``pack``: building the element tables and packed mesh arrays,
+* ``upload``: creating/writing the GPU buffers.
+"""
+
+import time
+from collections import deque
+
+PHASES = ("evaluate", "statistics", "pack", "upload")
+
+# kind ("mesh" or "function") -> timings of the last build of that kind
+_last_builds = {}
+
+
+def record_build(kind, label, timings):
+    """Remember *timings* (phase -> seconds) as the last build of *kind*."""
+    entry = {"label": label, "time": time.time()}
+    entry.update({phase: timings[phase] for phase in PHASES if phase in timings})
+    entry["total"] = sum(timings.get(phase, 0.0) for phase in PHASES)
+    _last_builds[kind] = entry
+
+
+def last_builds():
+    """Timings of the last mesh and function build, over all tabs."""
+    return {kind: dict(entry) for kind, entry in _last_builds.items()}
+
+
+def count_draw_calls(scene):
+    """Number of active leaf renderers, i.e. draw calls of the next frame."""
+    count = 0
+    for obj in scene.render_objects:
+        if not obj.active:
+            continue
+        for r in obj.all_renderer():
+            if r.active and not hasattr(r, "render_objects"):
+                count += 1
+    return count
+
+
+class FrameStats:
+    """Keeps the duration and draw-call count of the last frames of a scene."""
+
+    def __init__(self, history=60):
+        self.frames = deque(maxlen=history)
+        self.on_frame = []
+
+    def attach(self, scene):
+        """Instrument the render entry points of *scene* (idempotent)."""
+        direct = getattr(scene, "_render_objects", None)
+        if direct is not None and getattr(direct, "_frame_stats", None) is not self:
+            scene._render_objects = self._wrap(scene, direct)
+        # The JS engine path renders inside the debounced ``Scene.render``;
+        # its undecorated function is reachable as ``_fn`` (not in pyodide).
+        render = getattr(scene, "render", None)
+        fn = getattr(render, "_fn", None)
+        if fn is not None and getattr(fn, "_frame_stats", None) is not self:
+            render._fn = self._wrap(scene, fn, engine_only=True)
+
+    def _wrap(self, scene, func, engine_only=False):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if not engine_only or getattr(scene, "_js_engine", None) is not None:
+                    self._record(time.perf_counter() - start, scene)
+
+        timed._frame_stats = self
+        return timed
+
+    def _record(self, seconds, scene):
+        try:
+            draw_calls = count_draw_calls(scene)
+        except Exception:
+            draw_calls = None
+        self.frames.append((seconds, draw_calls))
+        for callback in self.on_frame:
+            callback()
+
+    def summary(self):
+        """``{"frames", "last_ms", "avg_ms", "max_ms", "draw_calls"}``."""
+        if not self.frames:
+            return {"frames": 0, "last_ms": None, "avg_ms": None, "max_ms": None, "draw_calls": None}
+        times = [t for t, _ in self.frames]
+        return {
+            "frames": len(times),
+            "last_ms": 1e3 * times[-1],
+            "avg_ms": 1e3 * sum(times) / len(times),
+            "max_ms": 1e3 * max(times),
+            "draw_calls": self.frames[-1][1],
+        }
+
+
+def _fmt_ms(seconds):
+    return "-" if seconds is None else f"{1e3 * seconds:.1f}"
+
+
+def format_timings(timings):
+    """Text lines for the timing HUD from ``WebgpuTab.get_timings()``."""
+    frame = timings["frame"]
+    if frame["frames"]:
+        lines = [
+            f"frame {frame['last_ms']:.1f} ms (avg {frame['avg_ms']:.1f}, max {frame['max_ms']:.1f})"
+            f"  draw calls {frame['draw_calls']}"
+        ]
+    else:
+        lines = ["frame -"]
+    for kind, build in timings["builds"].items():
+        if not build:
+            continue
+        parts = [f"{phase} {_fmt_ms(build.get(phase))}" for phase in PHASES if phase in build]
+        lines.append(f"{kind}: " + "  ".join(parts) + " ms")
+    return lines
@@ -0,0 +1,109 @@
+"""Recording of Chrome trace events for the GUI hot paths.
+
+While a recording runs (:func:`start` / :func:`stop`), :func:`span` and
+:func:`traced` record complete ("X") events with the thread, start, and
+duration, and their arguments (tab, element counts, ...). :func:`stop`
+writes them as trace-event JSON, which opens in ``chrome://tracing`` or
+https://ui.perfetto.dev. Without a recording, spans cost one check.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+_events = None
+_thread_names = {}
+_start = 0.0
+
+
+def recording():
+    return _events is not None
+
+
+def start():
+    """Start a new recording (dropping a running one)."""
+    global _events, _start
+    _thread_names.clear()
+    _start = time.perf_counter()
+    _events = []
+
+
+def stop(path=None):
+    """Stop the recording; write it to *path* if given. Returns the trace
+    (``{"traceEvents": [...]}``), or ``None`` without a recording."""
+    global _events
+    events, _events = _events, None
+    if events is None:
+        return None
+    pid = os.getpid()
+    meta = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in _thread_names.items()
+    ]
+    trace = {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(trace, f, default=str)
+    return trace
+
+
+def _record(name, cat, begin, end, args):
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    events = _events
+    if events is not None:
+        events.append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": 1e6 * (begin - _start),
+            "dur": 1e6 * (end - begin),
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args,
+        })
+
+
+@contextlib.contextmanager
+def span(name, cat="gui", **args):
+    """Record the block as event *name*; the yielded *args* dict can be
+    extended inside the block (e.g. with result sizes)."""
+    if _events is None:
+        yield args
+        return
+    begin = time.perf_counter()
+    try:
+        yield args
+    finally:
+        _record(name, cat, begin, time.perf_counter(), args)
+
+
+def traced(name=None, cat="gui"):
+    """Decorator recording the calls of a function as spans. Calls of
+    methods of objects with a ``trace_args()`` method are tagged with its
+    result."""
+
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return func(*args, **kwargs)
+            trace_args = getattr(args[0], "trace_args", None) if args else None
+            tags = {}
+            if callable(trace_args):
+                try:
+                    tags = trace_args()
+                except Exception:
+                    pass
+            with span(label, cat, **tags):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
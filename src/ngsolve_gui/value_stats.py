@@ -0,0 +1,134 @@
+"""Statistics of the values of a ``FunctionData``.
+
+They are computed at most once per build, when first needed, from the
+value arrays that are uploaded (``data_2d``/``data_3d``: three header
+floats ``[ncomps, order, complex]`` followed by the Bernstein coefficients
+of all elements, components interleaved). Like ``FunctionData.minval``/``maxval`` they are kept per
+component, index 0 is the norm.
+
+The coefficients of a Bernstein polynomial enclose its values, so the
+statistics describe the drawn function closely but not exactly. The
+:data:`ROBUST_PERCENTILES` are those of the coefficients (by partial
+sorting, a histogram bin can hold almost all values if there are
+outliers), other percentiles are estimated from the histogram, to about
+one bin width.
+"""
+
+import numpy as np
+
+# [ncomps, order, complex] in front of the coefficients
+HEADER_SIZE = 3
+NBINS = 256
+ROBUST_PERCENTILES = (1.0, 99.0)
+
+
+class ValueStatistics:
+    """Min, max, mean and a histogram of one component, *percentiles*
+    ``{q: value}`` computed exactly."""
+
+    def __init__(self, minval, maxval, mean, counts, edges, percentiles=None):
+        self.minval = minval
+        self.maxval = maxval
+        self.mean = mean
+        self.counts = counts
+        self.edges = edges
+        self.percentiles = percentiles or {}
+
+    @property
+    def count(self):
+        return int(round(float(self.counts.sum())))
+
+    def percentile(self, q):
+        """The *q*-th percentile (0 <= q <= 100), estimated from the
+        histogram unless it was computed exactly."""
+        if q in self.percentiles:
+            return self.percentiles[q]
+        total = self.count
+        if total == 0:
+            return self.minval
+        cdf = np.cumsum(self.counts)
+        target = q / 100 * total
+        i = min(int(np.searchsorted(cdf, target)), len(self.counts) - 1)
+        before = cdf[i - 1] if i > 0 else 0
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        value = self.edges[i] + frac * (self.edges[i + 1] - self.edges[i])
+        return float(min(max(value, self.minval), self.maxval))
+
+
+def _columns(data):
+    """Values of *data* as an ``(n, ncomps + 1)`` array, the norm first."""
+    data = np.asarray(data, dtype=np.float32)
+    ncomps = int(data[0])
+    complex_values = bool(data[2])
+    values = data[HEADER_SIZE:]
+    if complex_values:
+        values = values.reshape(-1, ncomps, 2)
+        values = np.hypot(values[..., 0], values[..., 1])
+    else:
+        values = values.reshape(-1, ncomps)
+    norm = np.linalg.norm(values, axis=1)
+    return np.column_stack((norm, values))
+
+
+def compute_statistics(*arrays, nbins=NBINS):
+    """Statistics per component of the value *arrays* (``None`` entries are
+    skipped), or ``None`` if there are no values."""
+    columns = [_columns(a) for a in arrays if a is not None and len(a) > HEADER_SIZE]
+    if not columns:
+        return None
+    stats = []
+    for comp in range(columns[0].shape[1]):
+        parts = [c[:, comp] for c in columns]
+        parts = [p if np.isfinite(p).all() else p[np.isfinite(p)] for p in parts]
+        n = sum(len(p) for p in parts)
+        if n == 0:
+            stats.append(ValueStatistics(0.0, 0.0, 0.0, np.zeros(nbins, dtype=np.int64),
+                                         np.linspace(0.0, 1.0, nbins + 1)))
+            continue
+        lo = float(min(p.min() for p in parts if len(p)))
+        hi = float(max(p.max() for p in parts if len(p)))
+        mean = sum(float(p.sum(dtype=np.float64)) for p in parts) / n
+        edges = np.linspace(lo, hi if hi > lo else lo + 1.0, nbins + 1)
+        counts = sum(np.histogram(p, bins=edges)[0] for p in parts)
+        stats.append(ValueStatistics(lo, hi, mean, counts, edges, _percentiles(parts, n)))
+    return stats
+
+
+def _percentiles(parts, n):
+    """The :data:`ROBUST_PERCENTILES` of the values in *parts* (lower
+    order statistic)."""
+    values = np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+    ranks = {q: min(n - 1, int(q / 100 * (n - 1))) for q in ROBUST_PERCENTILES}
+    values.partition(sorted(set(ranks.values())))
+    return {q: float(values[k]) for q, k in ranks.items()}
+
+
+def robust_range(stats, minval, maxval):
+    """The ``(p1, p99)`` ranges of all components, clipped to the exact
+    ``minval``/``maxval`` of the evaluation."""
+    plo, phi = ROBUST_PERCENTILES
+    lows, highs = [], []
+    for s, vmin, vmax in zip(stats, minval, maxval):
+        lows.append(min(max(s.percentile(plo), vmin), vmax))
+        highs.append(max(min(s.percentile(phi), vmax), vmin))
+    return lows, highs
+
+
+def merge_histograms(stats, nbins=NBINS):
+    """One histogram over the union of *stats* (``None`` entries are
+    skipped), with *nbins* bins over the combined range.
+
+    The counts are re-binned by interpolating the cumulative counts, so
+    they are fractional where bins of the inputs are split."""
+    stats = [s for s in stats if s is not None and s.count]
+    if not stats:
+        return None
+    lo = min(s.minval for s in stats)
+    hi = max(s.maxval for s in stats)
+    edges = np.linspace(lo, hi if hi > lo else lo + 1.0, nbins + 1)
+    cumulative = np.zeros(nbins + 1)
+    for s in stats:
+        cumulative += np.interp(edges, s.edges, np.concatenate(([0], np.cumsum(s.counts))))
+    total = sum(s.count for s in stats)
+    mean = sum(s.mean * s.count for s in stats) / total
+    return ValueStatistics(lo, hi, mean, np.diff(cumulative), edges)
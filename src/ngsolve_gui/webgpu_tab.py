@@ -1,11 +1,17 @@
 from ngapp.components import *
 from ngapp.utils import UserSettings
 from webgpu import Scene, CoordinateAxes, NavigationCube
+from webgpu.labels import Labels
 
 _usersettings = UserSettings(app_id="NGSolve GUI")
 from webgpu import Scene
 from ngsolve_webgpu.pick import MeshPickResult
 from .pick_overlay import PickOverlay
+from .timing import FrameStats, format_timings
+from .tracing import traced
+
+# entity numbers that need the volume elements of a 3D mesh
+_VOLUME_ENTITIES = ("volume_elements", "volume_indices")
 
 
 class WebgpuTab(Div):
@@ -25,6 +31,9 @@ class WebgpuTab(Div):
         self.navcube_visible = Observable(
             _usersettings.get("navcube_visible", False), "navcube_visible"
         )
+        self.timing_hud_visible = Observable(
+            _usersettings.get("timing_hud_visible", False), "timing_hud_visible"
+        )
 
         # -- Picking (persisted; geometry overrides via _picking_always_active) --
         if getattr(self, '_picking_always_active', False):
@@ -39,6 +48,16 @@ class WebgpuTab(Div):
         self.navigation_cube = NavigationCube()
         self.navigation_cube.active = self.navcube_visible.value
 
+        # Frame/build timings, shown in the top left corner on demand
+        self.frame_stats = FrameStats()
+        self.frame_stats.on_frame.append(self._update_timing_hud)
+        self.timing_hud = Labels(
+            ["", "", ""],
+            [(-0.99, 0.94), (-0.99, 0.88), (-0.99, 0.82)],
+            font_size=13,
+        )
+        self.timing_hud.active = self.timing_hud_visible.value
+
         # Observable for clipping state
         if not hasattr(self, 'clipping_enabled'):
             tab = app_data.get_tab(name)
@@ -100,6 +119,7 @@ class WebgpuTab(Div):
         # Wire gizmo visibility
         self.axes_visible.on_change(self._apply_axes_visible)
         self.navcube_visible.on_change(self._apply_navcube_visible)
+        self.timing_hud_visible.on_change(self._apply_timing_hud_visible)
         self.picking_enabled.on_change(self._apply_picking_enabled)
 
         # Wire nav cube face selection
@@ -124,12 +144,20 @@ class WebgpuTab(Div):
         self.navigation_cube.active = val
         self.scene.render()
 
+    def _apply_timing_hud_visible(self, val, _old):
+        self.timing_hud.active = val
+        self._update_timing_hud()
+        self.scene.render()
+
     def toggle_axes(self):
         self.axes_visible.toggle()
 
     def toggle_navcube(self):
         self.navcube_visible.toggle()
 
+    def toggle_timing_hud(self):
+        self.timing_hud_visible.toggle()
+
     def toggle_picking(self):
         self.picking_enabled.toggle()
 
@@ -156,6 +184,7 @@ class WebgpuTab(Div):
             getattr(camera, f"reset_{view}")()
         self.scene.render()
 
+    @traced("redraw")
     def redraw(self):
         self._redraw_needed = False
         self.wgpu.scene.redraw()
@@ -210,6 +239,41 @@ class WebgpuTab(Div):
     def scene(self) -> Scene:
         return self.wgpu.scene
 
+    def _draw_scene(self, render_objects, **kwargs):
+        """Draw *render_objects* (plus the timing HUD) into a new scene."""
+        scene = self.wgpu.draw(render_objects + [self.timing_hud], **kwargs)
+        self.frame_stats.attach(self.wgpu.scene)
+        return scene
+
+    # -- Timings -------------------------------------------------------------
+
+    def _timed_data(self):
+        """GPU data objects (``kind -> data``) whose build timings are reported.
+        Override in subclasses."""
+        return {}
+
+    def get_timings(self):
+        """Frame statistics of this tab and the last builds of its GPU data.
+
+        Returns ``{"frame": {...}, "builds": {kind: {phase: seconds}}}``, see
+        :mod:`ngsolve_gui.timing`.
+        """
+        builds = {
+            kind: dict(getattr(data, "build_timings", {}))
+            for kind, data in self._timed_data().items()
+            if data is not None
+        }
+        return {"frame": self.frame_stats.summary(), "builds": builds}
+
+    def _update_timing_hud(self):
+        # Only refreshes the labels; they show up with the next frame, so
+        # the HUD does not cause renders itself.
+        if not self.timing_hud.active:
+            return
+        lines = format_timings(self.get_timings())[:3]
+        self.timing_hud.labels = lines + [""] * (3 - len(lines))
+        self.timing_hud.set_needs_update()
+
     def reset_camera(self):
         if self.scene is not None:
             pmin, pmax = self.scene.bounding_box
@@ -257,6 +321,7 @@ class WebgpuTab(Div):
         self.pick_overlay.hide()
         self.scene._render_highlight()
 
+    @traced("pick")
     def _on_pick_select(self, event, kind="surface"):
         try:
             result = MeshPickResult(event, self._pick_mesh, self.scene.options.camera, kind=kind)
@@ -310,6 +375,15 @@ class WebgpuTab(Div):
     def title(self):
         return self.app_data.get_tab(self.name)["title"]
 
+    def trace_args(self):
+        """Tags of the trace events of this tab, see :mod:`ngsolve_gui.tracing`."""
+        args = {"tab": self.title}
+        mesh = getattr(self, "mesh", None)
+        if mesh is not None:
+            args["elements"] = mesh.ne
+            args["vertices"] = mesh.nv
+        return args
+
     # -- Keybinding support ---------------------------------------------
 
     def get_keybindings(self):
@@ -347,6 +421,7 @@ class WebgpuTab(Div):
         return [
             ("a", self.toggle_axes, "Toggle axes"),
             ("n", self.toggle_navcube, "Toggle nav cube"),
+            ("t", self.toggle_timing_hud, "Toggle timing HUD"),
         ]
 
     def set_view(self, plane):
@@ -355,6 +430,7 @@ class WebgpuTab(Div):
         getattr(camera, f"reset_{plane}")()
         self.scene.render()
 
+    @traced("clipping")
     def _apply_clipping_enabled(self, val, _old):
         self.clipping.enable_clipping(val)
         self.wgpu.scene.render()
@@ -362,6 +438,7 @@ class WebgpuTab(Div):
     def toggle_clipping(self):
         self.clipping_enabled.toggle()
 
+    @traced("clipping")
     def clip_along_axis(self, axis):
         clip = self.clipping
         normal = [0.0, 0.0, 0.0]
@@ -378,6 +455,7 @@ class WebgpuTab(Div):
             self.clipping_enabled.value = True
         self.wgpu.scene.render()
 
+    @traced("clipping")
     def reset_clipping(self):
         clip = self.clipping
         clip.set_nx_value(0.0)
@@ -404,5 +482,12 @@ class WebgpuTab(Div):
     def draw(self):
         raise NotImplementedError("draw method must be implemented in subclass")
 
+    def release(self):
+        """Called when the tab is deleted or hibernated: undo registrations
+        on objects shared with other tabs (clipping, camera)."""
+        tiles = getattr(self, "tiles", None)
+        if tiles is not None:
+            tiles.detach()
+
     def set_component(self, comp):
         self.ui_children = [comp]
@@ -35,19 +35,10 @@ def make_mesh_2d():
     return ngs.Mesh(geo.GenerateMesh(maxh=0.3))
 
 
-def make_mesh_3d():
-    import ngsolve as ngs
-    import netgen.occ as occ
+def make_mesh_3d(maxh=0.5):
+    from ngsolve_gui.benchmark import make_box_mesh
 
-    box = occ.Box(occ.Pnt(0, 0, 0), occ.Pnt(1, 1, 1))
-    box.faces.Min(occ.X).name = "left"
-    box.faces.Max(occ.X).name = "right"
-    box.faces.Min(occ.Y).name = "bottom"
-    box.faces.Max(occ.Y).name = "top"
-    box.faces.Min(occ.Z).name = "back"
-    box.faces.Max(occ.Z).name = "front"
-    geo = occ.OCCGeometry(box)
-    return ngs.Mesh(geo.GenerateMesh(maxh=0.5))
+    return make_box_mesh(maxh)
 
 
 def make_mesh_2d_circle():
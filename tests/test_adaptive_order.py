@@ -0,0 +1,79 @@
+"""Tests for the per-element visualization order selection."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from ngsolve_gui.adaptive_order import num_values, select_high_order
+
+
+def test_num_values() -> None:
+    assert num_values(1) == 3
+    assert num_values(2) == 6
+    assert num_values(1, quads=True) == 6
+
+
+def test_budget_limits_upgraded_elements() -> None:
+    variation = np.array([0.5, 0.0, 2.0, 1.0, 0.1])
+    # 5 elements at order 1 (15 values) plus room for two upgrades to order 3 (+7 each)
+    mask = select_high_order(variation, 1, 3, budget=15 + 14)
+    assert mask.tolist() == [False, False, True, True, False]
+
+
+def test_smooth_elements_stay_low_order() -> None:
+    variation = np.array([1.0, 1e-6, 0.0])
+    mask = select_high_order(variation, 1, 3, budget=10**6)
+    assert mask.tolist() == [True, False, False]
+
+
+def test_linear_function_has_no_variation() -> None:
+    import netgen.occ as occ
+    import ngsolve as ngs
+    from ngsolve_gui.adaptive_order import element_variation
+
+    mesh = ngs.Mesh(occ.OCCGeometry(occ.Rectangle(1, 1).Face(), dim=2).GenerateMesh(maxh=0.3))
+    assert np.max(element_variation(2 * ngs.x + ngs.y, mesh)) < 1e-12
+    variation = element_variation(ngs.x * ngs.x, mesh)
+    assert variation.shape == (mesh.ne,)
+    assert np.min(variation) > 0
+
+
+def test_split_follows_the_solution_on_redraw() -> None:
+    import time
+    from types import MethodType, SimpleNamespace
+
+    import ngsolve as ngs
+    from ngapp.observable import Observable
+
+    from ngsolve_gui.benchmark import make_box_mesh
+    from ngsolve_gui.function import FunctionComponent
+    from ngsolve_gui.timed_data import TimedMeshData
+
+    mesh = make_box_mesh(0.3)
+    gf = ngs.GridFunction(ngs.H1(mesh, order=3))
+    mdata = TimedMeshData(mesh)
+    mdata.update(SimpleNamespace(timestamp=time.time()))
+    comp = SimpleNamespace(
+        cf=gf, _eval_cf=gf, mesh=mesh, region_or_mesh=mesh, order=2, deformation=None, tiles=None,
+        vertex_budget=Observable(0, "vertex_budget"), adaptive_order=Observable(True, "adaptive_order"),
+        func_data=SimpleNamespace(mesh_data=mdata),
+    )
+    names = ("_adaptive_mask", "_adaptive_state", "_adaptive_split", "_adaptive_split_changed")
+    for name in names:
+        setattr(comp, name, MethodType(getattr(FunctionComponent, name), comp))
+    calls = []
+    mask = comp._adaptive_mask
+    comp._adaptive_mask = lambda mdata: calls.append(1) or mask(mdata)
+
+    # drawn before the solve: nothing varies, nothing is upgraded
+    assert comp._adaptive_split(mdata) is None
+    assert not comp._adaptive_split_changed(comp._adaptive_state())
+    gf.Set(ngs.sin(4 * ngs.x) * ngs.y)
+    calls.clear()
+    # as in a redraw: the mask is evaluated once for the check and the split
+    state = comp._adaptive_state()
+    assert comp._adaptive_split_changed(state)
+    split = comp._adaptive_split(mdata, state)
+    assert split is not None and len(calls) == 1
+    assert not comp._adaptive_split_changed(comp._adaptive_state())
+    assert comp._adaptive_split(mdata) is split
@@ -0,0 +1,52 @@
+"""Tests for the job preparation of the offscreen batch renderer."""
+
+from __future__ import annotations
+
+
+def _mesh():
+    import netgen.occ as occ
+    import ngsolve as ngs
+
+    return ngs.Mesh(occ.OCCGeometry(occ.Box(occ.Pnt(0, 0, 0), occ.Pnt(1, 1, 1))).GenerateMesh(maxh=0.5))
+
+
+def test_prepare_reuses_cached_data() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.batch_render import BatchRenderer
+
+    mesh = _mesh()
+    cf = ngs.x * ngs.y
+    renderer = BatchRenderer()
+    first = renderer.prepare(cf, {"mesh": mesh}, None)
+    second = renderer.prepare(cf, {"mesh": mesh, "min": 0, "max": 1}, "xy")
+    assert [type(r).__name__ for r in first] == ["CFRenderer", "MeshWireframe2d", "Colorbar"]
+    assert first[0].data is second[0].data
+    assert first[0].data.data_2d is not None
+
+
+def test_prepare_clipping_builds_volume_data() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.batch_render import BatchRenderer
+
+    mesh = _mesh()
+    render_objects = BatchRenderer().prepare(ngs.x, {"mesh": mesh, "clipping": True}, None)
+    assert "ClippingCF" in [type(r).__name__ for r in render_objects]
+    assert render_objects[0].data.data_3d is not None
+
+
+def test_prepare_deformation_keeps_cached_data() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.batch_render import BatchRenderer
+
+    mesh = _mesh()
+    renderer = BatchRenderer()
+    plain = renderer.prepare(ngs.x, {"mesh": mesh}, None)[0].data
+    mesh_data = plain.mesh_data
+    deformation = ngs.CF((0, 0, 0.1 * ngs.x))
+    deformed = renderer.prepare(ngs.x, {"mesh": mesh, "deformation": deformation}, None)[0].data
+    assert deformed is not plain and deformed.mesh_data is not mesh_data
+    assert plain.mesh_data is mesh_data
+    assert getattr(mesh_data, "deformation_data", None) is None
+    cached = renderer.app_data.get_function_gpu_data(deformation, mesh, order=1)
+    assert cached.mesh_data is mesh_data
+    assert renderer.prepare(ngs.x, {"mesh": mesh}, None)[0].data is plain
@@ -0,0 +1,20 @@
+"""Smoke test for the headless benchmark suite."""
+
+from __future__ import annotations
+
+import json
+
+from ngsolve_gui.benchmark import CASES, compare, main
+
+
+def test_benchmark_json(tmp_path) -> None:
+    out = tmp_path / "bench.json"
+    main(["--out", str(out), "--maxh", "0.5", "--repeat", "1"])
+    data = json.loads(out.read_text())
+    assert [r["case"] for r in data["results"]] == list(CASES)
+    for r in data["results"]:
+        assert r["wall_s"] > 0
+        assert r["ne"] > 0
+    rows = compare(data, data)
+    assert len(rows) == len(CASES)
+    assert all(ratio == 1.0 for *_, ratio in rows)
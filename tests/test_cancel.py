@@ -0,0 +1,149 @@
+"""Tests for the cooperative cancellation of long operations."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ngsolve_gui.cancel import (
+    CancelToken,
+    Cancelled,
+    active_jobs,
+    check_cancelled,
+    job,
+    netgen_terminate,
+)
+
+
+def test_jobs_and_tokens() -> None:
+    check_cancelled()
+    called = []
+    with job("outer") as outer:
+        outer.on_cancel(lambda: called.append(1))
+        with job("inner", outer):
+            assert [name for name, _ in active_jobs()] == ["outer"]
+            check_cancelled()
+            outer.cancel()
+            outer.cancel()
+            with pytest.raises(Cancelled):
+                check_cancelled()
+        with pytest.raises(KeyboardInterrupt):
+            outer.check()
+    assert called == [1] and active_jobs() == []
+    check_cancelled()
+
+
+def test_cancelled_bad_elements() -> None:
+    from ngsolve_gui import file_loader
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    mesh = make_box_mesh(0.2)
+    token = CancelToken()
+    token.cancel()
+    with job("bad elements", token), pytest.raises(Cancelled):
+        file_loader.find_bad_elements(mesh)
+
+
+def test_cancelled_function_build_keeps_data(monkeypatch) -> None:
+    import ngsolve as ngs
+    from ngsolve_gui import timed_data
+    from ngsolve_gui.app_data import AppData
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    mesh = make_box_mesh(0.2)
+    data = AppData().get_function_gpu_data(ngs.x, mesh, order=1)
+    data.mesh_data.need_3d = True
+    data.update(SimpleNamespace(timestamp=time.time()))
+    before = data.data_2d.copy(), data.data_3d, list(data.maxval)
+
+    token = CancelToken()
+    evaluate = timed_data.evaluate_surface
+
+    def evaluate_and_cancel(*args, **kwargs):
+        result = evaluate(*args, **kwargs)
+        token.cancel()
+        return result
+
+    monkeypatch.setattr(timed_data, "evaluate_surface", evaluate_and_cancel)
+    data.cf = 2 * ngs.x
+    data.set_needs_update()
+    with job("build", token), pytest.raises(Cancelled):
+        data.update(SimpleNamespace(timestamp=time.time()))
+    assert data.needs_update
+    np.testing.assert_array_equal(data.data_2d, before[0])
+    assert data.data_3d is before[1] and list(data.maxval) == before[2]
+
+    data.update(SimpleNamespace(timestamp=time.time()))
+    assert not data.needs_update and data.maxval[1] == 2 * before[2][1]
+
+
+def test_evaluation_stops_between_chunks(monkeypatch) -> None:
+    import ngsolve as ngs
+    from ngsolve_gui import element_eval
+    from ngsolve_gui.benchmark import make_box_mesh
+    from ngsolve_gui.timed_data import TimedMeshData
+
+    mdata = TimedMeshData(make_box_mesh(0.2))
+    token = CancelToken()
+    calls = []
+    evaluate = element_eval._Packer.evaluate
+
+    def evaluate_and_cancel(self, pts):
+        calls.append(len(pts))
+        token.cancel()
+        return evaluate(self, pts)
+
+    monkeypatch.setattr(element_eval._Packer, "evaluate", evaluate_and_cancel)
+    with job("evaluate", token), pytest.raises(Cancelled):
+        element_eval.evaluate_volume(ngs.x, mdata, 1, chunk=100)
+    assert len(calls) == 1
+
+
+def test_field_lines_stop_between_batches() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui import progress
+    from ngsolve_gui.benchmark import make_box_mesh
+    from ngsolve_gui.function import _trace_field_lines
+
+    mesh = make_box_mesh(0.3)
+    cf = ngs.CF((ngs.y - 0.5, 0.5 - ngs.x, 0))
+    options = dict(
+        num_lines=50, length=0.5, max_points_per_line=100, thickness=0.0015,
+        tolerance=0.0005, direction=0,
+    )
+    data = _trace_field_lines(cf, mesh.Materials(".*"), options, batch=5)
+    assert len(data["pstart"]) == 3 * len(data["value"]) > 0
+
+    # cancelled once the first batch reports its progress
+    token = CancelToken()
+
+    def listener(event, job):
+        if event == "update":
+            job.token.cancel()
+
+    progress.subscribe(listener)
+    try:
+        with job("field lines", token), pytest.raises(Cancelled):
+            _trace_field_lines(cf, mesh.Materials(".*"), options, batch=5)
+    finally:
+        progress.unsubscribe(listener)
+
+
+def test_meshing_stops_on_cancel() -> None:
+    import netgen.occ as occ
+    from netgen.libngpy._meshing import _GetTerminate
+
+    geo = occ.OCCGeometry(occ.Box((0, 0, 0), (1, 1, 1)))
+    with job("meshing") as token, netgen_terminate(token):
+        threading.Timer(0.2, token.cancel).start()
+        start = time.perf_counter()
+        try:
+            geo.GenerateMesh(maxh=0.01)
+        except Exception as e:
+            assert "stopped" in str(e)
+        assert time.perf_counter() - start < 5 and token.cancelled
+    assert not _GetTerminate()
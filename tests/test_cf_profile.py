@@ -0,0 +1,37 @@
+"""Tests for the per-node CoefficientFunction profiler."""
+
+from __future__ import annotations
+
+import ngsolve as ngs
+import numpy as np
+
+from ngsolve_gui import cf_profile
+from ngsolve_gui.benchmark import make_box_mesh
+
+
+def test_sample_points_lie_in_their_elements() -> None:
+    mesh = make_box_mesh(0.3)
+    points = cf_profile.sample_points(mesh, elements=50, points_per_element=3)
+    assert cf_profile.sample_points(mesh, elements=50, points_per_element=3) is points
+    assert len(points) == 3 * min(50, mesh.ne)
+    xyz = np.hstack([ngs.x(points), ngs.y(points), ngs.z(points)])
+    located = mesh(xyz[:, 0], xyz[:, 1], xyz[:, 2])
+    assert np.all(located["nr"] == points["nr"])
+
+
+def test_profile_tree() -> None:
+    mesh = make_box_mesh(0.3)
+    u = ngs.GridFunction(ngs.H1(mesh, order=3))
+    u.Set(ngs.x * ngs.y)
+    cf = ngs.sin(u) * ngs.exp(ngs.y) + ngs.grad(u)[0]
+    root = cf_profile.profile(cf, mesh, repeat=2)
+    assert root.total > 0 and root.error is None
+    assert len(root.children) == 2
+    rows = root.rows(min_percent=0)
+    assert rows[0][:1] == (0,) and rows[0][2] == 100.0
+    labels = [node.label for _, node, _, _ in rows]
+    assert any(label.startswith("gridfunction") for label in labels)
+    # the derivative is evaluated by the space, not from the GridFunction node
+    assert sum(label.startswith("GridFunctionCoefficientFunction") for label in labels) == 1
+    assert all(own <= total + 1e-9 for _, _, total, own in rows)
+    assert root.costliest(1)[0].own == max(n.own for _, n, _, _ in rows)
@@ -0,0 +1,101 @@
+"""Tests for the compiled-function cache."""
+
+from __future__ import annotations
+
+import gc
+import threading
+import weakref
+
+import ngsolve as ngs
+
+from ngsolve_gui import compiled
+from ngsolve_gui.benchmark import make_box_mesh
+
+
+def _expression(u, p):
+    cf = u
+    for _ in range(4):
+        cf = ngs.sin(cf) * p + ngs.cos(ngs.x * cf)
+    return cf
+
+
+def test_fingerprint_and_cache() -> None:
+    mesh = make_box_mesh(0.4)
+    fes = ngs.H1(mesh, order=2)
+    u, other = ngs.GridFunction(fes), ngs.GridFunction(fes)
+    p = ngs.Parameter(2.0)
+    cf = _expression(u, p)
+    assert compiled.fingerprint(cf) == compiled.fingerprint(_expression(u, p))
+    assert compiled.fingerprint(cf) != compiled.fingerprint(_expression(other, p))
+    assert compiled.fingerprint(cf) != compiled.fingerprint(_expression(u, ngs.Parameter(2.0)))
+
+    gradient = compiled.fingerprint(ngs.grad(u)[0])
+    assert gradient == compiled.fingerprint(ngs.grad(u)[0])
+    assert gradient != compiled.fingerprint(ngs.grad(other)[0])
+
+    assert compiled.compiled(cf, "off") is cf
+    fast = compiled.compiled(cf)
+    assert fast is not cf and compiled.compiled(_expression(u, p)) is fast
+
+    # the compiled function sees new values of its GridFunctions and Parameters
+    u.Set(ngs.y)
+    p.Set(3.0)
+    assert abs(ngs.Integrate(fast, mesh) - ngs.Integrate(cf, mesh)) < 1e-10
+
+
+def test_cache_holds_functions_while_used(monkeypatch) -> None:
+    mesh = make_box_mesh(0.4)
+    u = ngs.GridFunction(ngs.H1(mesh, order=2))
+    calls = []
+    compile_cf = ngs.CoefficientFunction.Compile
+    started, release = threading.Event(), threading.Event()
+
+    def slow_compile(cf, *args, **kwargs):
+        calls.append(1)
+        started.set()
+        release.wait()
+        return compile_cf(cf, *args, **kwargs)
+
+    monkeypatch.setattr(ngs.CoefficientFunction, "Compile", slow_compile)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(compiled.compiled(_expression(u, 2.0))))
+        for _ in range(3)
+    ]
+    threads[0].start()
+    started.wait()
+    # the cache is not locked while the first thread compiles
+    assert not compiled._lock.locked()
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results[0] is results[1] is results[2]
+
+    # released with its last user, and with it the GridFunction
+    gf_ref = weakref.ref(u)
+    del results, threads, u
+    gc.collect()
+    assert len(compiled._cache) == 0 and gf_ref() is None
+
+
+def test_compare_evaluation() -> None:
+    mesh = make_box_mesh(0.3)
+    times = compiled.compare_evaluation(_expression(ngs.y, 2.0), mesh, order=2)
+    assert set(times) == {"interpreted", "compiled", "compile_time"}
+    assert all(t >= 0 for t in times.values())
+
+
+def test_fingerprint_of_many_subexpressions() -> None:
+    # the child wrappers are new Python objects, the ids of freed ones are
+    # reused by the children of the next subexpression
+    prints = set()
+    for n in range(3, 13):
+        garbage = [ngs.CF(float(i)) * ngs.z for i in range(50 * n)]
+        different = ngs.CF(tuple(ngs.sin(k * ngs.x) * ngs.y for k in range(1, n)))
+        same = ngs.CF(tuple(ngs.sin(1 * ngs.x) * ngs.y for k in range(1, n)))
+        assert compiled.fingerprint(different) != compiled.fingerprint(same)
+        prints.add(compiled.fingerprint(different))
+        del garbage
+    assert len(prints) == 10
@@ -0,0 +1,58 @@
+"""Tests for the hibernation of inactive tabs."""
+
+from __future__ import annotations
+
+
+import ngsolve as ngs
+from ngapp.observable import Observable
+
+from ngsolve_gui.app_data import AppData
+from ngsolve_gui.benchmark import make_box_mesh
+from ngsolve_gui.hibernation import hibernation_order
+
+
+def test_hibernation_order() -> None:
+    left = {"a": 100.0, "b": 50.0, "c": 190.0}
+    assert hibernation_order(left, now=200.0, idle_time=60) == ["b", "a"]
+    assert hibernation_order(left, now=200.0, idle_time=0) == []
+    assert hibernation_order(left, now=200.0, idle_time=0, pressure=True) == ["b", "a", "c"]
+
+
+class _Tab:
+    def __init__(self, app_data, cf, mesh):
+        self.data = {"obj": cf}
+        self.colormap_name = Observable("viridis", "colormap_name")
+        self.func_data = app_data.get_function_gpu_data(cf, mesh, order=1)
+        self.mdata = self.func_data.mesh_data
+        self.released = 0
+
+    def release(self):
+        self.released += 1
+
+
+def test_hibernate_tab_releases_unshared_data() -> None:
+    mesh = make_box_mesh(0.4)
+    app_data = AppData()
+    for name, cf in (("u", ngs.x), ("v", ngs.y), ("w", ngs.z)):
+        app_data._data["tabs"][name] = {"type": "function", "name": name, "title": name}
+        app_data._data["tabs"][name]["component"] = _Tab(app_data, cf, mesh)
+    app_data.active_tab = "w"
+    assert len(app_data._gpu_cache) == 4
+
+    assert not app_data.hibernate_tab("w")
+    comp = app_data.get_tab("u")["component"]
+    assert app_data.hibernate_tab("u")
+    assert comp.released == 1
+    tab = app_data.get_tab("u")
+    assert "component" not in tab and tab["hibernated"]
+    assert tab["settings"] == {"colormap_name": "viridis"} and tab["data"]["obj"] is ngs.x
+    # the mesh data is still used by the other tabs
+    assert len(app_data._gpu_cache) == 3
+    assert not app_data.hibernate_tab("u")
+
+    app_data.hibernate_tab("v")
+    assert len(app_data._gpu_cache) == 2
+
+    comp = app_data.get_tab("w")["component"]
+    app_data.delete_tab("w")
+    assert comp.released == 1
@@ -0,0 +1,43 @@
+"""Tests for the NGSolve timer deltas."""
+
+from __future__ import annotations
+
+from ngsolve_gui import ngs_timers
+
+
+def test_delta_sums_timers_of_the_same_name() -> None:
+    before = {"a": (1.0, 2), "b": (0.5, 1)}
+    after = {"a": (1.25, 3), "b": (0.5, 1), "c": (2.0, 1)}
+    assert ngs_timers.delta(before, after) == [("c", 2.0, 1), ("a", 0.25, 1)]
+    assert ngs_timers.delta(before, after, top=1) == [("c", 2.0, 1)]
+
+
+class _Tab:
+    def trace_args(self):
+        return {"tab": "u"}
+
+    @ngs_timers.measured("draw")
+    def draw(self, mesh):
+        import ngsolve as ngs
+
+        return ngs.Integrate(ngs.x * ngs.y, mesh)
+
+
+def test_measured_records_only_while_enabled() -> None:
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    mesh = make_box_mesh(0.3)
+    measurements = []
+    ngs_timers.subscribe(measurements.append)
+    _Tab().draw(mesh)
+    assert not measurements
+    ngs_timers.set_enabled(True)
+    try:
+        _Tab().draw(mesh)
+    finally:
+        ngs_timers.set_enabled(False)
+    (m,) = measurements
+    assert m["label"] == "draw u" and m["wall"] > 0
+    assert ngs_timers.history()[-1] is m
+    assert all(seconds >= 0 and counts >= 0 for _, seconds, counts in m["timers"])
+    ngs_timers._listeners.remove(measurements.append)
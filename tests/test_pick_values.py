@@ -0,0 +1,73 @@
+"""Tests for hover values read from the drawn function data."""
+
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import ngsolve as ngs
+import numpy as np
+from ngsolve_webgpu.mesh import ElType
+
+from ngsolve_gui.benchmark import make_box_mesh
+from ngsolve_gui.pick_values import _trig_vertices, surface_value
+from ngsolve_gui.timed_data import TimedFunctionData, TimedMeshData
+
+
+def _function_data(mesh, cf, order=3):
+    mesh_data = TimedMeshData(mesh)
+    mesh_data.update(SimpleNamespace(timestamp=time.time()))
+    data = TimedFunctionData(mesh_data, cf, order=order)
+    data.update(SimpleNamespace(timestamp=time.time()))
+    return data
+
+
+def _check(mesh, data, cf, tol):
+    ntrigs = data.mesh_data.mesh_buffers.elements[ElType.TRIG][0]
+    for instance in range(0, ntrigs, 17):
+        p = _trig_vertices(data.mesh_data.mesh_buffers, instance)
+        pos = p.T @ np.array([0.2, 0.5, 0.3])
+        val = surface_value(data, instance, pos)
+        exact = np.atleast_1d(cf(mesh(*pos[:, None], ngs.BND)))
+        np.testing.assert_allclose(val, exact.flatten(), atol=tol)
+
+
+def test_surface_value_matches_evaluation() -> None:
+    mesh = make_box_mesh(0.3)
+    # polynomials of the drawn order are drawn exactly
+    for cf in (
+        ngs.x**2 * ngs.y + ngs.z,
+        ngs.CF((ngs.x * ngs.y, ngs.z, ngs.x**2)),
+        ngs.x + 1j * ngs.y * ngs.z,
+    ):
+        _check(mesh, _function_data(mesh, cf), cf, 1e-5)
+
+
+def test_surface_value_not_available() -> None:
+    mesh = make_box_mesh(0.3)
+    data = _function_data(mesh, ngs.x)
+    assert surface_value(data, 10**6, (0, 0, 0)) is None
+    assert surface_value(data, -1, (0, 0, 0)) is None
+
+
+def test_debounce_calls_once_with_last_arguments() -> None:
+    import threading
+
+    from ngsolve_gui.pick_values import Debounce
+
+    calls = []
+    done = threading.Event()
+    debounce = Debounce(lambda v: (calls.append(v), done.set()), 0.05)
+    threads = threading.active_count()
+    for v in range(10):
+        debounce.schedule(v)
+        time.sleep(0.005)
+    assert threading.active_count() <= threads + 1
+    assert done.wait(2.0)
+    time.sleep(0.1)
+    assert calls == [9]
+
+    debounce.schedule(10)
+    debounce.cancel()
+    time.sleep(0.1)
+    assert calls == [9] and debounce._thread is None
@@ -0,0 +1,123 @@
+"""Tests for the batched point probes."""
+
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import ngsolve as ngs
+
+from ngsolve_gui.probe import LineProbe
+
+
+def _box_mesh(maxh=0.2):
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    return make_box_mesh(maxh)
+
+
+def test_line_probe_values_and_outside_points() -> None:
+    mesh = _box_mesh()
+    probe = LineProbe(ngs.CF((ngs.x, ngs.y * ngs.z)), mesh, (-0.5, 0.5, 0.5), (1.5, 0.5, 0.5), 201)
+    values = probe.values()
+    assert values.shape == (201, 2)
+    x = probe.points[:, 0]
+    inside = (x > 1e-9) & (x < 1 - 1e-9)
+    assert probe.inside[inside].all() and not probe.inside[(x < 0) | (x > 1)].any()
+    np.testing.assert_allclose(values[inside, 0], x[inside], atol=1e-12)
+    np.testing.assert_allclose(values[inside, 1], 0.25, atol=1e-12)
+    assert np.isnan(values[~probe.inside]).all()
+    assert np.isclose(probe.distance[-1], 2.0)
+
+
+def test_line_probe_follows_function_changes() -> None:
+    mesh = _box_mesh()
+    gf = ngs.GridFunction(ngs.H1(mesh, order=1))
+    gf.Set(1)
+    probe = LineProbe(gf, mesh, (0.1, 0.1, 0.1), (0.9, 0.9, 0.9), 50)
+    assert np.allclose(probe.values(), 1)
+    gf.Set(ngs.x)
+    np.testing.assert_allclose(probe.values()[:, 0], probe.points[:, 0], atol=1e-12)
+    figure = probe.plot_figure()
+    assert len(figure["data"]) == 1 and len(figure["data"][0]["y"]) == 50
+
+    restored = pickle.loads(pickle.dumps(probe))
+    assert restored._located is None
+    np.testing.assert_allclose(restored.values(), probe.values())
+
+
+def test_point_monitor_history() -> None:
+    from ngsolve_gui.probe import PointMonitor
+
+    mesh = _box_mesh()
+    gf = ngs.GridFunction(ngs.H1(mesh, order=1))
+    monitor = PointMonitor(gf, mesh, [(0.5, 0.5, 0.5)])
+    for t in range(3):
+        gf.Set(t * ngs.x)
+        if t == 1:
+            monitor.add_point((0.25, 0.5, 0.5))
+        monitor.record()
+    history = monitor.history()
+    assert history.shape == (3, 2, 1) and monitor.steps == [0, 1, 2]
+    np.testing.assert_allclose(history[:, 0, 0], [0.0, 0.5, 1.0], atol=1e-12)
+    assert np.isnan(history[0, 1, 0])
+    np.testing.assert_allclose(history[1:, 1, 0], [0.25, 0.5], atol=1e-12)
+    assert len(monitor.plot_figure()["data"]) == 2
+
+
+def test_restored_monitor_records_on_redraw(capsys) -> None:
+    from ngsolve_gui.app_data import AppData
+    from ngsolve_gui.probe import PointMonitor
+    from ngsolve_gui.project_store import ProjectStore
+
+    from .test_project_store import _MemoryStorage
+
+    mesh = _box_mesh()
+    gf = ngs.GridFunction(ngs.H1(mesh, order=1))
+    storage = _MemoryStorage()
+    tab = {"type": "plot", "name": "monitor", "title": "Monitor"}
+    tab["data"] = {"obj": PointMonitor(gf, mesh, [(0.5, 0.5, 0.5)]), "monitor": "u"}
+    ProjectStore(storage).save({"tabs": {"monitor": tab}, "active_tab": None})
+
+    app_data = AppData()
+    store = ProjectStore(storage)
+    app_data._data.update(store.load())
+    app_data._materialize = store.materialize
+    app_data.restore_redraw_callbacks()
+
+    def broken():
+        raise RuntimeError("broken callback")
+
+    app_data.on_redraw("other", broken)
+    app_data.run_redraw_callbacks()
+    assert "broken callback" in capsys.readouterr().err
+    # the function tab was not drawn in this session, nothing to record
+    assert "blob" in app_data.get_tab("monitor")
+
+    # drawn again by the script: the monitor records the live function
+    live = ngs.GridFunction(ngs.H1(mesh, order=1))
+    app_data._data["tabs"]["u"] = {"data": {"obj": live, "mesh": mesh}}
+    app_data._added_tabs.add("u")
+    for t in (1, 2):
+        live.Set(t * ngs.x)
+        app_data.run_redraw_callbacks()
+    monitor = app_data.get_tab("monitor")["data"]["obj"]
+    assert monitor.cf is live and monitor.mesh is mesh
+    np.testing.assert_allclose(monitor.history()[:, 0, 0], [0.5, 1.0], atol=1e-12)
+
+
+def test_point_monitor_follows_replaced_function() -> None:
+    from ngsolve_gui.probe import PointMonitor
+
+    mesh = _box_mesh()
+    gf = ngs.GridFunction(ngs.H1(mesh, order=1))
+    monitor = PointMonitor(gf, mesh, [(0.5, 0.5, 0.5)])
+    monitor.record()
+    monitor._locate()
+    other = _box_mesh(0.3)
+    new = ngs.GridFunction(ngs.H1(other, order=1))
+    new.Set(ngs.x)
+    monitor.set_function(new, other)
+    assert monitor._located is None
+    monitor.record()
+    np.testing.assert_allclose(monitor.history()[:, 0, 0], [0.0, 0.5], atol=1e-12)
@@ -0,0 +1,48 @@
+"""Tests for the sampling profiler."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from ngsolve_gui.profiler import SamplingProfiler
+
+
+def _busy_inner(end):
+    x = 0
+    while time.perf_counter() < end:
+        x += 1
+    return x
+
+
+def _busy_outer(seconds):
+    return _busy_inner(time.perf_counter() + seconds)
+
+
+def test_samples_busy_thread_and_skips_idle_ones(tmp_path) -> None:
+    idle = threading.Event()
+    sleeper = threading.Thread(target=idle.wait, name="Sleeper", daemon=True)
+    sleeper.start()
+    worker = threading.Thread(target=_busy_outer, args=(0.5,), name="Busy")
+
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start(duration=0.4)
+    worker.start()
+    profiler.wait()
+    worker.join()
+    idle.set()
+
+    assert profiler.samples > 20 and not profiler.running
+    threads = {stack[0] for stack in profiler.stacks}
+    assert "Busy" in threads and "Sleeper" not in threads
+
+    top = profiler.top_functions(5)
+    assert top[0][0].startswith("_busy_inner")
+    outer = next(t for t in profiler.top_functions(50) if t[0].startswith("_busy_outer"))
+    assert outer[1] == 0 and outer[2] >= top[0][1]
+
+    path = tmp_path / "profile.collapsed"
+    profiler.write_collapsed(path)
+    lines = path.read_text().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profiler.stacks.values())
+    assert any(line.startswith("Busy;") and "_busy_outer" in line for line in lines)
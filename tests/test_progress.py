@@ -0,0 +1,64 @@
+"""Tests for the progress events of running jobs."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from ngsolve_gui import progress
+from ngsolve_gui.cancel import Cancelled, check_cancelled, job
+
+
+@pytest.fixture
+def events():
+    received = []
+
+    def listener(event, job):
+        received.append((event, job.name, job.text, job.fraction))
+
+    progress.subscribe(listener)
+    yield received
+    progress.unsubscribe(listener)
+
+
+def test_events_only_on_change(events, monkeypatch) -> None:
+    monkeypatch.setattr(progress, "MIN_INTERVAL", 0.05)
+    with job("load"):
+        progress.report(fraction=0.1)
+        progress.report(fraction=0.1)
+        # within MIN_INTERVAL: dropped unless the text changes or it is done
+        progress.report(fraction=0.2)
+        progress.report("meshing", 0.2)
+        time.sleep(0.06)
+        progress.report(fraction=0.3)
+        progress.report(fraction=1.0)
+        assert [j.name for j in progress.running()] == ["load"]
+    progress.report("outside of jobs")
+    assert events == [
+        ("start", "load", "load", None),
+        ("update", "load", "load", 0.1),
+        ("update", "load", "meshing", 0.2),
+        ("update", "load", "meshing", 0.3),
+        ("update", "load", "meshing", 1.0),
+        ("end", "load", "meshing", 1.0),
+    ]
+    assert progress.running() == []
+
+
+def test_nested_jobs_get_rows_and_cancel_with_parent(events) -> None:
+    with job("script") as script:
+        with job("draw") as draw:
+            assert {j.name for j in progress.running()} == {"script", "draw"}
+            script.cancel()
+            assert draw.cancelled
+            with pytest.raises(Cancelled):
+                check_cancelled()
+        with job("script again", script):
+            pass
+    assert [e[:2] for e in events] == [
+        ("start", "script"),
+        ("start", "draw"),
+        ("end", "draw"),
+        ("end", "script"),
+    ]
@@ -0,0 +1,132 @@
+"""Tests for the incremental project storage."""
+
+from __future__ import annotations
+
+from ngsolve_gui.project_store import MANIFEST_KEY, ProjectStore
+
+
+class _MemoryStorage:
+    """Minimal stand-in for ngapp's ``Storage`` that counts writes."""
+
+    def __init__(self):
+        self.entries = {}
+        self.writes = []
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def set(self, key, value):
+        self.writes.append(key)
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+
+def _save_data(obj, title="Mesh"):
+    return {
+        "active_tab": "mesh",
+        "tabs": {
+            "mesh": {
+                "type": "mesh",
+                "icon": "mdi-vector-triangle",
+                "name": "mesh",
+                "title": title,
+                "data": {"obj": obj, "order": 2},
+                "settings": {"wireframe_visible": False, "colormap": [True, False, 0.0, 1.0]},
+            }
+        },
+    }
+
+
+def _blob_keys(storage):
+    return [k for k in storage.entries if k != MANIFEST_KEY]
+
+
+def test_roundtrip() -> None:
+    storage = _MemoryStorage()
+    ProjectStore(storage).save(_save_data({1, 2, 3}))
+    store = ProjectStore(storage)
+    data = store.load()
+    tab = data["tabs"]["mesh"]
+    store.materialize("mesh", tab)
+    assert data["active_tab"] == "mesh"
+    assert tab["title"] == "Mesh"
+    assert tab["data"] == {"obj": {1, 2, 3}, "order": 2}
+    assert tab["settings"]["wireframe_visible"] is False
+
+
+def test_unchanged_objects_are_not_rewritten() -> None:
+    storage = _MemoryStorage()
+    store = ProjectStore(storage)
+    obj = {1, 2, 3}
+    store.save(_save_data(obj))
+    assert len(_blob_keys(storage)) == 1
+    storage.writes.clear()
+    store.save(_save_data(obj, title="Renamed"))
+    assert storage.writes == [MANIFEST_KEY]
+
+
+def test_changed_object_replaces_blob() -> None:
+    storage = _MemoryStorage()
+    store = ProjectStore(storage)
+    obj = {1, 2, 3}
+    store.save(_save_data(obj))
+    old_keys = _blob_keys(storage)
+    obj.add(4)
+    store.invalidate()
+    store.save(_save_data(obj))
+    new_keys = _blob_keys(storage)
+    assert len(new_keys) == 1 and new_keys != old_keys
+    loaded = ProjectStore(storage)
+    tab = loaded.load()["tabs"]["mesh"]
+    loaded.materialize("mesh", tab)
+    assert tab["data"]["obj"] == {1, 2, 3, 4}
+
+
+def test_placeholder_tabs_are_saved_without_unpickling() -> None:
+    storage = _MemoryStorage()
+    ProjectStore(storage).save(_save_data({1, 2, 3}))
+    blobs = _blob_keys(storage)
+    store = ProjectStore(storage)
+    data = store.load()
+    assert "obj" not in data["tabs"]["mesh"]["data"]
+    storage.writes.clear()
+    store.save(data)
+    assert storage.writes == [MANIFEST_KEY]
+    assert _blob_keys(storage) == blobs
+
+
+def test_equal_content_is_stored_once() -> None:
+    storage = _MemoryStorage()
+    data = _save_data({1, 2, 3})
+    data["tabs"]["copy"] = dict(data["tabs"]["mesh"], name="copy", data={"obj": {1, 2, 3}})
+    ProjectStore(storage).save(data)
+    assert len(_blob_keys(storage)) == 1
+
+
+def test_references_between_objects_survive_loading() -> None:
+    storage = _MemoryStorage()
+    mesh = {1.0, 2.0}
+    data = _save_data({"mesh": mesh})
+    data["tabs"]["mesh"]["data"]["mesh"] = mesh
+    ProjectStore(storage).save(data)
+    assert len(_blob_keys(storage)) == 1
+
+    loaded = ProjectStore(storage)
+    tab = loaded.load()["tabs"]["mesh"]
+    loaded.materialize("mesh", tab)
+    assert tab["data"]["obj"]["mesh"] is tab["data"]["mesh"]
+    storage.writes.clear()
+    loaded.save({"active_tab": "mesh", "tabs": {"mesh": tab}})
+    assert storage.writes == [MANIFEST_KEY]
+
+
+def test_first_save_removes_blobs_of_earlier_sessions() -> None:
+    storage = _MemoryStorage()
+    ProjectStore(storage).save(_save_data({1, 2, 3}))
+    ProjectStore(storage).save(_save_data({4}))
+    assert len(_blob_keys(storage)) == 1
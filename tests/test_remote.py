@@ -0,0 +1,94 @@
+"""Tests for the solver process messages and shared-memory transfer."""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+
+import numpy as np
+import ngsolve as ngs
+
+from ngsolve_gui import file_loader
+from ngsolve_gui.remote import _GuiSide, _SolverSide
+
+
+class _Component:
+    def __init__(self, obj, mesh=None):
+        self.obj = obj
+        self.mesh = mesh
+
+    def set_function(self, obj, mesh=None):
+        self.obj = obj
+        self.mesh = mesh
+
+
+def test_redraw_copies_vectors_into_drawn_functions(monkeypatch) -> None:
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    drawn, redraws = [], []
+
+    def draw(obj, mesh=None, name=None, **kwargs):
+        drawn.append(_Component(obj, mesh))
+        return drawn[-1]
+
+    monkeypatch.setattr(file_loader, "DrawImpl", draw)
+    monkeypatch.setattr(file_loader, "RedrawImpl", lambda: redraws.append(1))
+
+    gui_conn, solver_conn = mp.Pipe()
+    gui = _GuiSide(gui_conn)
+
+    listener = threading.Thread(target=gui.forward)
+    listener.start()
+    solver = _SolverSide(solver_conn)
+    try:
+        mesh = make_box_mesh(0.3)
+        gf = ngs.GridFunction(ngs.H1(mesh, order=2))
+        p = ngs.Parameter(2.0)
+        solver.draw(gf)
+        solver.draw(p * gf + ngs.grad(gf)[0], mesh)
+        for t in range(1, 4):
+            gf.Set(t * ngs.x)
+            p.Set(t)
+            solver.redraw()
+            if t == 1:
+                gui_gf, gui_cf = drawn[0].obj, drawn[1].obj
+        assert len(redraws) == 3
+        assert drawn[0].obj is gui_gf and drawn[1].obj is gui_cf
+        np.testing.assert_array_equal(gui_gf.vec.FV().NumPy(), gf.vec.FV().NumPy())
+        gui_mesh = drawn[1].mesh
+        # the mesh was sent once, both objects use the same copy
+        assert gui_gf.space.mesh is gui_mesh and len(gui._meshes) == 1
+        assert np.isclose(gui_cf(gui_mesh(0.5, 0.5, 0.5)), 3 * 1.5 + 3)
+
+        mesh.Refine()
+        gf.space.Update()
+        gf.Update()
+        gf.Set(ngs.y)
+        solver.redraw()
+        assert drawn[0].obj is not gui_gf and drawn[1].obj is not gui_cf
+        np.testing.assert_array_equal(drawn[0].obj.vec.FV().NumPy(), gf.vec.FV().NumPy())
+        assert np.isclose(drawn[1].obj(drawn[1].mesh(0.5, 0.5, 0.5)), 3 * 0.5 + 0)
+        assert drawn[0].obj.space.mesh is drawn[1].mesh is not gui_mesh
+    finally:
+        solver_conn.send(("done",))
+        solver.close()
+        listener.join()
+        gui.close()
+
+
+def test_bad_elements_are_searched_in_the_solver_process(monkeypatch) -> None:
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    shown = []
+    monkeypatch.setattr(file_loader, "ShowBadElements", lambda *args: shown.append(args))
+
+    gui_conn, solver_conn = mp.Pipe()
+    gui = _GuiSide(gui_conn)
+    solver = _SolverSide(solver_conn)
+    mesh = make_box_mesh(0.3)
+    solver.draw_bad_elements(mesh, threshold_3d=0)
+    while not shown:
+        gui.handle(gui_conn.recv())
+    gui_mesh, el2d, el3d, max_badness = shown[0]
+    assert gui_mesh is gui._meshes[solver._meshes[id(mesh)][2]]
+    assert el3d.all() and len(el3d) == mesh.ne and max_badness > 1
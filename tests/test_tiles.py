@@ -0,0 +1,152 @@
+"""Tests for the tiled (out-of-core) mesh drawing."""
+
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from ngsolve_gui.tiles import frustum_mask, octree_leaves, plane_side
+
+
+def _box_mesh(maxh=0.2):
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    return make_box_mesh(maxh)
+
+
+def test_octree_leaves_partition_points() -> None:
+    rng = np.random.default_rng(0)
+    points = rng.uniform(size=(5000, 3))
+    leaves = octree_leaves(points, max_points=300)
+    assert all(len(leaf) <= 300 for leaf in leaves)
+    assert np.array_equal(np.sort(np.concatenate(leaves)), np.arange(len(points)))
+
+
+def test_frustum_and_plane() -> None:
+    from webgpu.camera import Camera
+    from webgpu.clipping import Clipping
+
+    pmin = np.array([[0.0, 0, 0], [0.9, 0.9, 0.9]])
+    pmax = np.array([[0.1, 0.1, 0.1], [1.0, 1.0, 1.0]])
+    camera = Camera()
+    camera.reset(np.zeros(3), np.ones(3))
+    assert frustum_mask(pmin, pmax, camera).all()
+    camera.transform.translate(100, 0, 0)
+    assert not frustum_mask(pmin, pmax, camera).any()
+
+    clipping = Clipping(mode=Clipping.Mode.PLANE, center=[0.5, 0.5, 0.5], normal=[1, 0, 0])
+    vmin, vmax = plane_side(pmin, pmax, clipping)
+    # x > 0.5 is clipped away
+    assert vmax[0] < 0 and vmin[1] > 0
+
+
+def test_tile_data_holds_tile_vertices_only() -> None:
+    from ngsolve_webgpu.mesh import ElType
+    from ngsolve_gui.tiles import TiledMesh
+
+    mesh = _box_mesh()
+    tiles = TiledMesh(mesh, max_elements=500)
+    assert sum(len(t.el2d) for t in tiles.tiles) == len(mesh.ngmesh.Elements2D())
+    assert sum(len(t.el3d) for t in tiles.tiles) == len(mesh.ngmesh.Elements3D())
+
+    tile = max(tiles.tiles, key=lambda t: len(t.el2d))
+    mdata = tile.mesh_data()
+    mdata.need_3d = True
+    mdata.update(SimpleNamespace(timestamp=time.time()))
+    vertices = mdata.elements["vertices"]
+    assert len(vertices) < mesh.nv
+    coords = np.asarray(mesh.ngmesh.Coordinates())
+
+    trigs = mdata.elements[ElType.TRIG]
+    nodes = trigs[2 : 2 + 4 * trigs[0]].reshape(-1, 4)[:, :3]
+    expected = mesh.ngmesh.Elements2D().NumPy()["nodes"][tile.el2d] - 1
+    np.testing.assert_allclose(vertices[nodes], coords[expected], atol=1e-6)
+
+    tets = mdata.elements[ElType.TET]
+    nodes = tets[5 : 5 + 5 * tets[0]].reshape(-1, 5)[:, :4]
+    expected = mesh.ngmesh.Elements3D().NumPy()["nodes"][tile.el3d] - 1
+    np.testing.assert_allclose(vertices[nodes], coords[expected], atol=1e-6)
+
+    # whole-mesh data is not reachable through a tile
+    assert not hasattr(mdata.mesh, "Elements1D")
+    np.testing.assert_allclose(mdata.get_bounding_box(), [tile.pmin, tile.pmax])
+
+
+def test_tile_function_data_per_expression() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.tiles import TiledMesh
+
+    tile = TiledMesh(_box_mesh(), max_elements=500).tiles[0]
+    cf = ngs.x * ngs.y
+    data = tile.function_data(cf, 1)
+    assert tile.function_data(cf, 1) is data
+    assert tile.function_data(ngs.x * ngs.y, 1) is not data
+    assert tile.function_data(cf, 2) is not data
+
+
+def test_invisible_tiles_are_evicted_over_budget() -> None:
+    from webgpu.camera import Camera
+    from webgpu.renderer import BaseRenderer
+    from ngsolve_gui.tiles import TiledMesh
+
+    tiles = TiledMesh(_box_mesh(), max_elements=500, memory_budget=0)
+    renderer = tiles.renderer(lambda tile: BaseRenderer())
+    camera = Camera()
+    camera.reset(np.zeros(3), np.ones(3))
+    assert tiles.update_view(camera)
+    assert len(renderer.render_objects) == len(tiles.visible) == len(tiles.tiles)
+    for i in tiles.visible:
+        tiles.tiles[i].mesh_data().update(SimpleNamespace(timestamp=time.time()))
+    assert not tiles.update_view(camera)
+
+    camera.transform.translate(100, 0, 0)
+    assert tiles.update_view(camera)
+    assert tiles.visible == [] and renderer.render_objects == []
+    assert tiles.loaded() == [] and renderer.renderers == []
+
+
+def test_tile_mesh_holds_tile_rows_only() -> None:
+    from ngsolve_gui.tiles import TiledMesh
+
+    mesh = _box_mesh()
+    tile = TiledMesh(mesh, max_elements=500).tiles[0]
+    mdata = tile.mesh_data()
+    mdata.need_3d = True
+    mdata.update(SimpleNamespace(timestamp=time.time()))
+    assert len(mdata.mesh.Elements2D()) == len(tile.el2d)
+    assert len(mdata.mesh.Elements3D()) == len(tile.el3d)
+    assert mdata.el2d_bitarray is None and mdata.el3d_bitarray is None
+    assert tile.nbytes() >= mdata.mesh.nbytes() > 0
+
+
+def test_tile_function_data_matches_whole_mesh() -> None:
+    import ngsolve as ngs
+    from ngsolve_webgpu import FunctionData, MeshData
+    from ngsolve_gui.tiles import TiledMesh
+
+    mesh = _box_mesh()
+    mesh.Curve(2)
+    tile = TiledMesh(mesh, max_elements=500).tiles[0]
+    cf = ngs.CF((ngs.sin(3 * ngs.x), ngs.y * ngs.z))
+    options = SimpleNamespace(timestamp=time.time())
+    data = tile.function_data(cf, 2)
+    data.mesh_data.need_3d = True
+    data.need_3d = True
+    data.update(options)
+
+    el2d = np.zeros(mesh.ngmesh.Elements2D().NumPy().shape[0], dtype=bool)
+    el2d[tile.el2d] = True
+    el3d = np.zeros(mesh.ne, dtype=bool)
+    el3d[tile.el3d] = True
+    whole = FunctionData(MeshData(mesh, el2d, el3d), cf, 2)
+    whole.mesh_data.need_3d = True
+    whole.need_3d = True
+    whole.update(options)
+    np.testing.assert_allclose(data.data_2d, whole.data_2d, atol=1e-6)
+    np.testing.assert_allclose(data.data_3d, whole.data_3d, atol=1e-6)
+    np.testing.assert_allclose(data.minval, whole.minval)
+    np.testing.assert_allclose(data.maxval, whole.maxval)
+    # the curved tile also evaluates its curvature on its own elements
+    assert data.mesh_data.curvature_data.data_2d is not None
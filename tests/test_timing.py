@@ -0,0 +1,64 @@
+"""Tests for the frame and build timing helpers."""
+
+from __future__ import annotations
+
+from ngsolve_gui.timing import FrameStats, format_timings, last_builds, record_build
+
+
+class _Renderer:
+    def __init__(self, active=True, children=None):
+        self.active = active
+        if children is not None:
+            self.render_objects = children
+
+    def all_renderer(self):
+        children = getattr(self, "render_objects", [])
+        return [self] + [r for c in children for r in c.all_renderer()]
+
+
+class _Scene:
+    def __init__(self, render_objects):
+        self.render_objects = render_objects
+        self.rendered = 0
+
+    def _render_objects(self, to_canvas=True):
+        self.rendered += 1
+
+
+def test_frame_stats_counts_active_leaf_renderers() -> None:
+    group = _Renderer(children=[_Renderer(), _Renderer(active=False)])
+    scene = _Scene([_Renderer(), group, _Renderer(active=False)])
+    stats = FrameStats()
+    stats.attach(scene)
+    stats.attach(scene)
+    scene._render_objects()
+    assert scene.rendered == 1
+    summary = stats.summary()
+    assert summary["frames"] == 1
+    assert summary["draw_calls"] == 2
+    assert summary["last_ms"] >= 0.0
+
+
+def test_on_frame_callbacks() -> None:
+    scene = _Scene([])
+    stats = FrameStats()
+    calls = []
+    stats.on_frame.append(lambda: calls.append(1))
+    stats.attach(scene)
+    scene._render_objects()
+    scene._render_objects()
+    assert len(calls) == 2
+
+
+def test_format_timings() -> None:
+    record_build("function", "x*y", {"evaluate": 0.5, "pack": 0.1, "upload": 0.02})
+    build = last_builds()["function"]
+    assert build["label"] == "x*y"
+    assert abs(build["total"] - 0.62) < 1e-12
+    lines = format_timings(
+        {
+            "frame": FrameStats().summary(),
+            "builds": {"function": {"evaluate": 0.5, "pack": 0.1, "upload": 0.02}},
+        }
+    )
+    assert lines == ["frame -", "function: evaluate 500.0  pack 100.0  upload 20.0 ms"]
@@ -0,0 +1,60 @@
+"""Tests for the trace-event recording."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from ngsolve_gui import tracing
+
+
+class _Tab:
+    def trace_args(self):
+        return {"tab": "Mesh", "elements": 42}
+
+    @tracing.traced("draw")
+    def draw(self):
+        with tracing.span("inner") as args:
+            args["result"] = 1
+        return "drawn"
+
+
+def test_spans_and_trace_file(tmp_path) -> None:
+    tab = _Tab()
+    assert tab.draw() == "drawn" and not tracing.recording()
+    tracing.start()
+    tab.draw()
+    worker = threading.Thread(target=tab.draw, name="Worker")
+    worker.start()
+    worker.join()
+    path = tmp_path / "trace.json"
+    trace = tracing.stop(path)
+    assert tracing.stop() is None
+    assert json.loads(path.read_text()) == json.loads(json.dumps(trace))
+
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in spans] == ["inner", "draw", "inner", "draw"]
+    draw, inner = spans[1], spans[0]
+    assert draw["args"] == {"tab": "Mesh", "elements": 42}
+    assert inner["args"] == {"result": 1}
+    assert draw["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= draw["ts"] + draw["dur"]
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert "Worker" in names and spans[1]["tid"] != spans[3]["tid"]
+
+
+def test_function_data_build_is_traced() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.app_data import AppData
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    mesh = make_box_mesh(0.3)
+    tracing.start()
+    data = AppData().get_function_gpu_data(ngs.x, mesh, order=1)
+    data.update(SimpleNamespace(timestamp=time.time()))
+    trace = tracing.stop()
+    events = {e["name"]: e for e in trace["traceEvents"] if e["ph"] == "X"}
+    build = events["build function data"]
+    assert build["args"]["elements"] == mesh.ne and "evaluate" in build["args"]
+    assert "build mesh data" in events and events["get_function_gpu_data"]["args"]["cached"] is False
@@ -0,0 +1,86 @@
+"""Tests for the value statistics of function data."""
+
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from ngsolve_gui.value_stats import compute_statistics, merge_histograms
+
+
+def _packed(values, ncomps=1):
+    header = np.array([ncomps, 1, 0], dtype=np.float32)
+    return np.concatenate((header, np.asarray(values, dtype=np.float32).reshape(-1)))
+
+
+def test_statistics_and_percentiles() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.uniform(size=100_000)
+    values[:10] = 1000.0
+    stats = compute_statistics(_packed(values[:60_000]), _packed(values[60_000:]))
+    assert len(stats) == 2
+    s = stats[1]
+    assert s.count == len(values)
+    assert s.minval == float(values.astype(np.float32).min()) and s.maxval == 1000.0
+    assert np.isclose(s.mean, values.mean(), rtol=1e-5)
+    bin_width = s.edges[1] - s.edges[0]
+    assert abs(s.percentile(50) - np.percentile(values, 50)) < bin_width
+    assert s.percentile(99) < 5.0
+
+
+def test_robust_percentiles_with_an_outlier() -> None:
+    rng = np.random.default_rng(2)
+    values = rng.uniform(size=50_000)
+    values[0] = 1e6
+    s = compute_statistics(_packed(values))[1]
+    # all values but the outlier are in the first histogram bin
+    assert s.counts[0] == len(values) - 1
+    assert abs(s.percentile(1) - np.percentile(values, 1)) < 1e-3
+    assert abs(s.percentile(99) - np.percentile(values, 99)) < 1e-3
+
+
+def test_vector_statistics_norm_first() -> None:
+    values = np.array([[3.0, 4.0], [0.0, 1.0]])
+    stats = compute_statistics(_packed(values, ncomps=2), None)
+    assert [s.maxval for s in stats] == [5.0, 3.0, 4.0]
+    assert [s.minval for s in stats] == [1.0, 0.0, 1.0]
+    assert compute_statistics(None) is None
+
+
+def test_merge_histograms() -> None:
+    rng = np.random.default_rng(1)
+    a = rng.normal(size=20_000)
+    b = rng.normal(loc=5.0, size=10_000)
+    merged = merge_histograms([compute_statistics(_packed(a))[1], None,
+                               compute_statistics(_packed(b))[1]], nbins=64)
+    both = np.concatenate((a, b))
+    assert len(merged.counts) == 64 and merged.count == len(both)
+    assert merged.minval == float(both.astype(np.float32).min())
+    assert np.isclose(merged.mean, both.mean(), rtol=1e-4)
+    assert abs(merged.percentile(50) - np.percentile(both, 50)) < 2 * (merged.edges[1] - merged.edges[0])
+    assert merge_histograms([None]) is None
+
+
+def test_robust_range_of_function_data() -> None:
+    import ngsolve as ngs
+    from ngsolve_gui.app_data import AppData
+    from ngsolve_gui.benchmark import make_box_mesh
+
+    mesh = make_box_mesh(0.2)
+    cf = ngs.IfPos(ngs.x + ngs.y + ngs.z - 2.99, 100, ngs.x)
+    data = AppData().get_function_gpu_data(cf, mesh, order=1)
+    data.update(SimpleNamespace(timestamp=time.time()))
+    # only computed when needed
+    assert "statistics" not in data.build_timings
+    assert data.statistics is not None and data.maxval[1] == 100.0
+    data.robust_range = True
+    assert data.minval[1] >= 0.0 and data.maxval[1] <= 1.0
+    data.robust_range = False
+    assert data.maxval[1] == 100.0
+
+    data.robust_range = True
+    data.set_needs_update()
+    data.update(SimpleNamespace(timestamp=time.time()))
+    assert "statistics" in data.build_timings and data.maxval[1] <= 1.0